@@ -0,0 +1,364 @@
+"""Time and memory-profile the report pipeline stages on synthetic data.
+
+    python -m benchmarks.run --scales 1 10 --repeat 3
+    python -m benchmarks.run --scales 1 --compare benchmarks/results/<commit>.json
+
+Each stage runs on a synthetic registry of scale * BASE_REGISTRY_ROWS consultations. The
+wall time is the minimum and median of the repeats; the peak memory is measured with
+tracemalloc in a separate run so that tracing does not skew the times. Results are written
+as JSON (by default to benchmarks/results/<commit>.json) so runs of two commits can be
+compared with --compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import (
+    BASE_REGISTRY_ROWS,
+    mutate_registry,
+    synthetic_change_log,
+    synthetic_gazette_html,
+    synthetic_registry,
+)
+from consultations_tracker.as_of import AsOfIndex
+from consultations_tracker.changelog_store import ChangeLogStore
+from consultations_tracker.departments import DepartmentRollups
+from consultations_tracker.fingerprint import fingerprint_rows
+from consultations_tracker.gazette import (
+    GAZETTE_CHUNK_SIZE,
+    consultation_from_entry,
+    iter_gazette_entries,
+    join_bilingual_consultations,
+)
+from consultations_tracker.gazette_matching import match_gazette_consultations
+from consultations_tracker.registry import GAZETTE_MATCH_COLUMNS, REPORT_COLUMNS, apply_schema, read_registry
+from consultations_tracker.render import TABLE_STYLES, render_page
+from consultations_tracker.report import change_log_snapshot
+from consultations_tracker.report_rules import REPORT_RULES, build_report_tables
+from consultations_tracker.upptime_series import ROLLUP_DAYS, department_rollups
+from consultations_tracker.upptime_sites import dump_sites, read_sites
+from consultations_tracker.url_checks import classify_url_columns, describe_invalid_urls
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+class Stage:
+    """A benchmarked stage: setup(data) builds its inputs untimed, run(inputs) is measured."""
+
+    def __init__(self, name, run, setup=None, teardown=None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda data: data)
+        self.teardown = teardown or (lambda inputs: None)
+
+
+def _setup_log_merge(data):
+    # A store holding the history, and the next snapshot with change_rate of its rows edited.
+    root = tempfile.mkdtemp(prefix='bench-changelog-')
+    store = ChangeLogStore(os.path.join(root, 'changelog'), os.path.join(root, 'consultations_chng_log.csv'))
+    store.import_history(data['history'])
+    data['history'].to_csv(store.csv_export_path, index=False)
+    registry = mutate_registry(data['latest_registry'], np.random.default_rng(1))
+    snapshot = change_log_snapshot(registry, str(datetime.now()))
+    return {'root': root, 'store': store, 'snapshot': snapshot}
+
+
+def _log_merge(inputs):
+    return inputs['store'].record_snapshot(inputs['snapshot'])
+
+
+def _teardown_store(inputs):
+    import shutil
+
+    shutil.rmtree(inputs['root'], ignore_errors=True)
+
+
+def _setup_as_of(data):
+    # A store holding the history and an empty cache directory for its as-of index.
+    root = tempfile.mkdtemp(prefix='bench-as-of-')
+    store = ChangeLogStore(os.path.join(root, 'changelog'), os.path.join(root, 'consultations_chng_log.csv'))
+    store.import_history(data['history'])
+    return {'root': root, 'index': AsOfIndex(store, os.path.join(root, 'as_of'))}
+
+
+def _setup_as_of_query(data):
+    inputs = _setup_as_of(data)
+    inputs['index'].versions()
+    times = pd.to_datetime(data['history']['row_chng_datetime'])
+    inputs['when'] = times.min() + (times.max() - times.min()) / 2
+    return inputs
+
+
+def _as_of_query(inputs):
+    # A fresh index, as a CLI query would start: the cached intervals are read, then filtered.
+    index = AsOfIndex(inputs['index'].store, inputs['index'].cache_dir)
+    return index.snapshot(inputs['when'])
+
+
+def _setup_department_rollups(data):
+    # Rollups of the stored history, and the rows the next snapshot appends to the change log.
+    inputs = _setup_log_merge(data)
+    inputs['rollups'] = DepartmentRollups(os.path.join(inputs['root'], 'departments'))
+    inputs['rollups'].recompute(inputs['store'])
+    inputs['appended_rows'] = inputs['store'].record_snapshot(inputs['snapshot'])
+    return inputs
+
+
+def _department_rollups_update(inputs):
+    # Applying the same rows again leaves the rollups as they are, so every repeat does the same work.
+    inputs['rollups'].update(inputs['appended_rows'], inputs['store'])
+    return inputs['rollups'].table(date.today())
+
+
+def _department_rollups_recompute(inputs):
+    inputs['rollups'].recompute(inputs['store'])
+    return inputs['rollups'].table(date.today())
+
+
+def _registry_load_text(data):
+    # Every column as text, as the change log fingerprints need it.
+    return read_registry(data['registry_csv'], text=True)
+
+
+def _registry_load_typed(data):
+    # Only the report and Gazette matching columns, typed.
+    return read_registry(data['registry_csv'], list(dict.fromkeys(REPORT_COLUMNS + GAZETTE_MATCH_COLUMNS)))
+
+
+def _bad_url_classification(data):
+    registry = data['registry']
+    return describe_invalid_urls(registry, classify_url_columns(registry))
+
+
+def _report_filters(data):
+    return build_report_tables(data['report_subset'], data['today'])
+
+
+def _html_rendering(data):
+    tables = build_report_tables(data['report_subset'], data['today'])
+    sections = ''.join(
+        f'<h2>{rule.name}</h2>' + tables[rule.name].to_html(index=False, classes="data-table", border=0)
+        for rule in REPORT_RULES
+    )
+    return render_page('report.html', 'Report', 'Benchmark report', 'Report', sections, styles=(TABLE_STYLES,))
+
+
+def _yaml_dump(data):
+    sites = data['sites']
+    text = 'owner-name: PatLittle\n' + dump_sites(sites) + 'status-website:\n  name: Consultations\n'
+    return read_sites(text)
+
+
+def _gazette_parse(data):
+    def parse(html, language):
+        encoded = html.encode('utf-8')
+        chunks = (encoded[start:start + GAZETTE_CHUNK_SIZE] for start in range(0, len(encoded), GAZETTE_CHUNK_SIZE))
+        return [consultation_from_entry(entry, language) for entry in iter_gazette_entries(chunks)]
+
+    rows, _, _ = join_bilingual_consultations(parse(data['gazette_en'], 'en'), parse(data['gazette_fr'], 'fr'))
+    return rows
+
+
+def _gazette_matching(data):
+    return match_gazette_consultations(data['gazette'], data['registry'])
+
+
+def _setup_upptime_rollups(data):
+    # Four Upptime checks a day over ROLLUP_DAYS for every consultation with a profile page.
+    rng = np.random.default_rng(2)
+    sites = data['registry'].dropna(subset=['profile_page_en'])
+    checks = ROLLUP_DAYS * 4
+    rows = len(sites) * checks
+    hours_ago = np.tile(np.arange(checks)[::-1] * 6, len(sites))
+    series = pd.DataFrame({
+        'slug': np.repeat(sites['registration_number'].to_numpy(), checks),
+        'owner_org': np.repeat(sites['owner_org'].astype(str).to_numpy(), checks),
+        'checked_at': pd.Timestamp.now(tz='UTC').floor('h') - pd.to_timedelta(hours_ago, unit='h'),
+        'status': np.where(rng.random(rows) < 0.98, 'up', 'down'),
+        'response_time': pd.array(rng.lognormal(6, 0.6, rows).astype(int), dtype='Int32'),
+        'uptime_month': rng.uniform(90, 100, rows).round(2),
+    })
+    return {'series': series.sort_values('checked_at', kind='stable', ignore_index=True)}
+
+
+STAGES = [
+    Stage('registry_load_text', _registry_load_text),
+    Stage('registry_load_typed', _registry_load_typed),
+    Stage('row_hashing', lambda data: fingerprint_rows(data['registry'])),
+    Stage('log_merge', _log_merge, _setup_log_merge, _teardown_store),
+    Stage('as_of_index_build', lambda inputs: inputs['index'].versions(), _setup_as_of, _teardown_store),
+    Stage('as_of_query', _as_of_query, _setup_as_of_query, _teardown_store),
+    Stage('department_rollups_update', _department_rollups_update, _setup_department_rollups, _teardown_store),
+    Stage('department_rollups_recompute', _department_rollups_recompute, _setup_department_rollups, _teardown_store),
+    Stage('bad_url_classification', _bad_url_classification),
+    Stage('report_filters', _report_filters),
+    Stage('html_rendering', _html_rendering),
+    Stage('yaml_dump', _yaml_dump),
+    Stage('gazette_parse', _gazette_parse),
+    Stage('gazette_matching', _gazette_matching),
+    Stage('upptime_rollups', lambda inputs: department_rollups(inputs['series']), _setup_upptime_rollups),
+]
+
+
+def build_dataset(scale, snapshots, directory, seed=0):
+    """Return the synthetic inputs of every stage for a registry of scale * BASE_REGISTRY_ROWS rows.
+
+    The registry is also written to directory as a CSV, like the CKAN dump.
+    """
+    today = date.today()
+    registry = synthetic_registry(int(BASE_REGISTRY_ROWS * scale), seed=seed, today=today)
+    registry_csv = os.path.join(directory, 'registry.csv')
+    registry.to_csv(registry_csv, index=False)
+    history, latest_registry = synthetic_change_log(registry, snapshots=snapshots, seed=seed)
+
+    report_subset = apply_schema(registry[REPORT_COLUMNS])
+
+    gazette_entries = max(40, int(40 * scale))
+    gazette_en = synthetic_gazette_html(registry, gazette_entries, 'en', seed=seed, today=today)
+    gazette_fr = synthetic_gazette_html(registry, gazette_entries, 'fr', seed=seed, today=today)
+    data = {
+        'today': pd.Timestamp(today),
+        'registry': registry,
+        'registry_csv': registry_csv,
+        'history': history,
+        'latest_registry': latest_registry,
+        'report_subset': report_subset,
+        'sites': [{'name': title, 'url': url} for title, url in zip(registry['title_en'], registry['profile_page_en']) if url],
+        'gazette_en': gazette_en,
+        'gazette_fr': gazette_fr,
+    }
+    data['gazette'] = pd.DataFrame(_gazette_parse(data))
+    return data
+
+
+def frame_bytes(value):
+    """Return the deep memory usage of a DataFrame, or None for other values.
+
+    tracemalloc does not see the Arrow buffers behind pandas string columns, so the size of
+    a stage's resulting frame is reported separately.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return None
+
+
+def measure(stage, data, repeat):
+    """Return the wall times (s) of `repeat` runs, the tracemalloc peak (bytes) of one more and
+    the size of its result when it is a DataFrame."""
+    times = []
+    for _ in range(repeat):
+        inputs = stage.setup(data)
+        started = time.perf_counter()
+        stage.run(inputs)
+        times.append(time.perf_counter() - started)
+        stage.teardown(inputs)
+
+    inputs = stage.setup(data)
+    tracemalloc.start()
+    try:
+        result = stage.run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        stage.teardown(inputs)
+    return times, peak, frame_bytes(result)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(scales, repeat, snapshots, stage_names=None):
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix='bench-registry-') as directory:
+            results.extend(run_scale(scale, repeat, snapshots, directory, stage_names))
+    return results
+
+
+def run_scale(scale, repeat, snapshots, directory, stage_names=None):
+    data = build_dataset(scale, snapshots, directory)
+    rows = len(data['registry'])
+    print(f"Scale {scale}: {rows} registry rows, {len(data['history'])} change log rows")
+    results = []
+    for stage in STAGES:
+        if stage_names and stage.name not in stage_names:
+            continue
+        times, peak, result_bytes = measure(stage, data, repeat)
+        result = {
+            'stage': stage.name,
+            'scale': scale,
+            'rows': rows,
+            'min_seconds': round(min(times), 6),
+            'median_seconds': round(statistics.median(times), 6),
+            'peak_memory_bytes': peak,
+            'result_bytes': result_bytes,
+        }
+        results.append(result)
+        result_text = f"  result {result_bytes / 2 ** 20:>7.1f} MiB" if result_bytes is not None else ''
+        print(f"  {stage.name:<24} {result['median_seconds'] * 1000:>10.1f} ms  {peak / 2 ** 20:>8.1f} MiB{result_text}")
+    return results
+
+
+def compare(results, baseline_path):
+    """Print the median time and peak memory ratios against a previous results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    previous = {(row['stage'], row['scale']): row for row in baseline['results']}
+    print(f"\nCompared with {baseline['commit']}:")
+    for row in results:
+        before = previous.get((row['stage'], row['scale']))
+        if before is None:
+            continue
+        time_ratio = row['median_seconds'] / before['median_seconds'] if before['median_seconds'] else float('nan')
+        memory_ratio = row['peak_memory_bytes'] / before['peak_memory_bytes'] if before['peak_memory_bytes'] else float('nan')
+        print(f"  {row['stage']:<24} x{row['scale']:<4} time {time_ratio:>6.2f}x  memory {memory_ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0], help="registry sizes, in multiples of the base size")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--snapshots', type=int, default=30, help="change log snapshots in the synthetic history")
+    parser.add_argument('--stages', nargs='+', choices=[stage.name for stage in STAGES])
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="previous results file to compare with")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    results = run_benchmarks(args.scales, args.repeat, args.snapshots, args.stages)
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'repeat': args.repeat,
+            'results': results,
+        }, file, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
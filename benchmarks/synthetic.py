@@ -0,0 +1,252 @@
+"""Synthetic, CKAN-shaped consultations data for the benchmarks.
+
+The registry has the same columns as the datastore dump (those of bad-urls.csv plus the
+datastore '_id'), bilingual titles and descriptions, a mix of valid and invalid URLs in the
+same proportions the URL checks see in practice, and start/end dates around today with a
+share of inconsistent statuses so that every report rule matches some rows. Everything is
+generated from a seed, so a given scale always produces the same data.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from consultations_tracker.report import change_log_snapshot
+
+BASE_REGISTRY_ROWS = 1500
+
+REGISTRY_COLUMNS = [
+    '_id', 'registration_number', 'partner_departments', 'subjects', 'title_en', 'title_fr',
+    'description_en', 'description_fr', 'start_date', 'end_date', 'status', 'profile_page_en',
+    'profile_page_fr', 'report_available_online', 'report_link_en', 'report_link_fr', 'owner_org',
+    'owner_org_title',
+]
+
+ENGLISH_WORDS = (
+    'consultation regulations amending proposed review framework national strategy policy '
+    'program federal canada indigenous engagement public health safety environment climate '
+    'fisheries transport energy species habitat management plan guidance draft standard '
+    'licensing spectrum accessibility housing benefits tax budget immigration labour workers '
+    'privacy data digital water marine pollution emissions rules amendments discussion paper '
+    'share your thoughts ideas community development'
+).split()
+FRENCH_WORDS = (
+    'consultation règlement modifiant proposé examen cadre stratégie nationale politique '
+    'programme fédéral canada autochtones mobilisation santé publique sécurité environnement '
+    'climat pêches transports énergie espèces habitat gestion plan orientation ébauche norme '
+    'licences spectre accessibilité logement prestations impôt budget immigration travail '
+    'travailleurs données numérique eau marin pollution émissions règles modifications '
+    'document discussion partagez vos idées développement collectivités'
+).split()
+STOPWORDS_EN = ['of', 'the', 'and', 'for', 'to', 'on']
+STOPWORDS_FR = ['de', 'la', 'les', 'et', 'pour', 'sur', 'des']
+
+ORGANIZATIONS = [
+    ('aafc-aac', 'Agriculture and Agri-Food Canada'), ('cfia-acia', 'Canadian Food Inspection Agency'),
+    ('cra-arc', 'Canada Revenue Agency'), ('dfo-mpo', 'Fisheries and Oceans Canada'),
+    ('eccc', 'Environment and Climate Change Canada'), ('esdc-edsc', 'Employment and Social Development Canada'),
+    ('fin', 'Department of Finance Canada'), ('hc-sc', 'Health Canada'),
+    ('ircc', 'Immigration, Refugees and Citizenship Canada'), ('ised-isde', 'Innovation, Science and Economic Development Canada'),
+    ('nrcan-rncan', 'Natural Resources Canada'), ('pc', 'Parks Canada'), ('pch', 'Canadian Heritage'),
+    ('tc', 'Transport Canada'), ('crtc', 'Canadian Radio-television and Telecommunications Commission'),
+    ('cnsc-ccsn', 'Canadian Nuclear Safety Commission'), ('cer-rec', 'Canada Energy Regulator'),
+    ('isc-sac', 'Indigenous Services Canada'), ('phac-aspc', 'Public Health Agency of Canada'),
+    ('vac-acc', 'Veterans Affairs Canada'),
+]
+HOSTS = [
+    'www.canada.ca', 'inspection.canada.ca', 'www.dfo-mpo.gc.ca', 'crtc.gc.ca', 'www.cnsc-ccsn.gc.ca',
+    'www.cer-rec.gc.ca', 'ised-isde.canada.ca', 'tc.canada.ca', 'parks.canada.ca', 'gazette.gc.ca',
+    'www.letstalktransportation.ca', 'www.rcaanc-cirnac.gc.ca', 'natural-resources.canada.ca',
+]
+
+# Share of each kind of URL value; the remainder are valid https links.
+URL_MIX = [
+    ('missing', 0.08),
+    ('placeholder', 0.04),
+    ('no_scheme', 0.03),
+    ('mailto', 0.01),
+    ('preview', 0.01),
+    ('safelinks', 0.01),
+]
+
+
+def _phrases(rng, words, stopwords, count, min_words, max_words):
+    vocabulary = np.array(words + stopwords)
+    lengths = rng.integers(min_words, max_words + 1, size=count)
+    picks = rng.integers(0, len(vocabulary), size=int(lengths.sum()))
+    phrases = []
+    start = 0
+    for length in lengths:
+        phrases.append(' '.join(vocabulary[picks[start:start + length]]).capitalize())
+        start += length
+    return phrases
+
+
+PLACE_NAME_SYLLABLES = [
+    'ka', 'lo', 'wna', 'mi', 'ra', 'chi', 'sas', 'ke', 'ton', 'que', 'bec', 'nu', 'na', 'vut',
+    'yu', 'kon', 'tar', 'io', 'ma', 'ni', 'to', 'ba', 'win', 'nip', 'peg', 'hal', 'fax', 'vic',
+]
+
+
+def _place_names(rng, count):
+    # Titles usually name something specific (a project, species or place), which is what
+    # makes them distinguishable from each other; three syllables give ~22,000 such names.
+    syllables = np.array(PLACE_NAME_SYLLABLES)[rng.integers(0, len(PLACE_NAME_SYLLABLES), size=(count, 3))]
+    return [''.join(name).capitalize() for name in syllables]
+
+
+def _titles(rng, words, stopwords, names, min_words, max_words):
+    phrases = _phrases(rng, words, stopwords, len(names), min_words, max_words)
+    return [f'{phrase} {name}' for phrase, name in zip(phrases, names)]
+
+
+def _urls(rng, count, language, slugs):
+    kinds = rng.random(count)
+    hosts = np.array(HOSTS)[rng.integers(0, len(HOSTS), size=count)]
+    urls = np.array(
+        [f'https://{host}/{language}/consultations/{slug}.html' for host, slug in zip(hosts, slugs)],
+        dtype=object,
+    )
+    threshold = 0.0
+    for kind, share in URL_MIX:
+        selected = (kinds >= threshold) & (kinds < threshold + share)
+        threshold += share
+        if kind == 'missing':
+            urls[selected] = None
+        elif kind == 'placeholder':
+            urls[selected] = np.array(['N/A', 'n/a', 'S/O', 'none'], dtype=object)[rng.integers(0, 4, selected.sum())]
+        elif kind == 'no_scheme':
+            urls[selected] = [url.replace('https://', '') for url in urls[selected]]
+        elif kind == 'mailto':
+            urls[selected] = 'mailto:consultations@canada.ca'
+        elif kind == 'preview':
+            urls[selected] = [url.replace(urlhost, 'canada-preview.adobecqms.net') for url, urlhost in zip(urls[selected], hosts[selected])]
+        elif kind == 'safelinks':
+            urls[selected] = [f'https://can01.safelinks.protection.outlook.com/?url={url}' for url in urls[selected]]
+    return urls
+
+
+def synthetic_registry(rows=BASE_REGISTRY_ROWS, seed=0, today=None):
+    """Return a registry of `rows` consultations with the columns of the CKAN datastore dump."""
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+
+    slugs = [f'consultation-{number}' for number in range(rows)]
+    organizations = np.array(ORGANIZATIONS)[rng.integers(0, len(ORGANIZATIONS), size=rows)]
+    start_offsets = rng.integers(-730, 120, size=rows)
+    lengths = rng.integers(14, 120, size=rows)
+    starts = pd.to_datetime(today) + pd.to_timedelta(start_offsets, unit='D')
+    ends = starts + pd.to_timedelta(lengths, unit='D')
+
+    # Status follows the dates, with 10% of rows deliberately inconsistent.
+    today_ts = pd.Timestamp(today)
+    status = np.where(starts > today_ts, 'P', np.where(ends < today_ts, 'C', 'O'))
+    inconsistent = rng.random(rows) < 0.10
+    status[inconsistent] = np.array(['P', 'O', 'C'])[rng.integers(0, 3, size=int(inconsistent.sum()))]
+
+    start_text = starts.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    end_text = ends.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    start_text[rng.random(rows) < 0.01] = None
+    end_text[rng.random(rows) < 0.01] = None
+
+    names = _place_names(rng, rows)
+    report_available = rng.random(rows) < 0.3
+    report_link_en = _urls(rng, rows, 'en', slugs)
+    report_link_fr = _urls(rng, rows, 'fr', slugs)
+    report_link_en[~report_available] = None
+    report_link_fr[~report_available] = None
+
+    registry = pd.DataFrame({
+        '_id': np.arange(1, rows + 1).astype(str),
+        'registration_number': [f'C-{number:07d}' for number in range(rows)],
+        'partner_departments': np.where(rng.random(rows) < 0.2, organizations[::-1, 0], None),
+        'subjects': np.array(['HE,EN', 'TR', 'EC,SO', 'IN', 'EN'])[rng.integers(0, 5, size=rows)],
+        'title_en': _titles(rng, ENGLISH_WORDS, STOPWORDS_EN, names, 4, 12),
+        'title_fr': _titles(rng, FRENCH_WORDS, STOPWORDS_FR, names, 4, 14),
+        'description_en': _phrases(rng, ENGLISH_WORDS, STOPWORDS_EN, rows, 30, 120),
+        'description_fr': _phrases(rng, FRENCH_WORDS, STOPWORDS_FR, rows, 30, 130),
+        'start_date': start_text,
+        'end_date': end_text,
+        'status': status,
+        'profile_page_en': _urls(rng, rows, 'en', slugs),
+        'profile_page_fr': _urls(rng, rows, 'fr', slugs),
+        'report_available_online': np.where(report_available, 'Y', 'N'),
+        'report_link_en': report_link_en,
+        'report_link_fr': report_link_fr,
+        'owner_org': organizations[:, 0],
+        'owner_org_title': organizations[:, 1],
+    }, columns=REGISTRY_COLUMNS)
+    return registry.astype(object).where(registry.notna(), None)
+
+
+def mutate_registry(registry, rng, change_rate=0.02):
+    """Return a copy of the registry with change_rate of the rows edited the way updates usually are."""
+    registry = registry.copy()
+    changed = np.flatnonzero(rng.random(len(registry)) < change_rate)
+    half = len(changed) // 2
+    registry.loc[registry.index[changed[:half]], 'title_en'] = registry['title_en'].iloc[changed[:half]] + ' (updated)'
+    registry.loc[registry.index[changed[half:]], 'status'] = 'C'
+    return registry
+
+
+def synthetic_change_log(registry, snapshots=30, change_rate=0.02, seed=0, start=None):
+    """Return a change log history of the registry: a full first snapshot, then the rows that
+    changed in each of `snapshots` hourly snapshots."""
+    rng = np.random.default_rng(seed + 1)
+    start = pd.Timestamp(start or date.today()) - timedelta(hours=snapshots)
+    current = change_log_snapshot(registry, str(start))
+    versions = [current]
+    for number in range(1, snapshots + 1):
+        registry = mutate_registry(registry, rng, change_rate)
+        snapshot = change_log_snapshot(registry, str(start + timedelta(hours=number)))
+        changed = snapshot['hash'] != current['hash']
+        versions.append(snapshot[changed])
+        current = snapshot
+    return pd.concat(versions, ignore_index=True), registry
+
+
+def synthetic_gazette_html(registry, entries=40, language='en', seed=0, today=None):
+    """Return a Gazette consultations listing page in the layout the Gazette parser reads.
+
+    Half of the notices reuse registry titles so that the Gazette matching has matches to find.
+    """
+    rng = np.random.default_rng(seed + 2)
+    today = today or date.today()
+    suffix = 'eng' if language == 'en' else 'fra'
+    title_column = f'title_{language}'
+    words, stopwords = (ENGLISH_WORDS, STOPWORDS_EN) if language == 'en' else (FRENCH_WORDS, STOPWORDS_FR)
+    rows = rng.choice(len(registry), size=entries // 2, replace=False)
+    new_titles = _titles(rng, words, stopwords, _place_names(rng, entries - len(rows)), 5, 14)
+    titles = list(registry[title_column].iloc[rows]) + new_titles
+
+    published = [today - timedelta(days=int(days)) for days in sorted(rng.integers(0, 60, size=entries))]
+    blocks = []
+    for number, (title, day) in enumerate(zip(titles, published)):
+        close = day + timedelta(days=30)
+        link = f'/rp-pr/p1/{day.year}/{day:%Y-%m-%d}/html/reg{number}-{suffix}.html'
+        if language == 'en':
+            details = f'<li>Published: {day:%B} {day.day}, {day.year}</li><li>Comments accepted until {close:%B} {close.day}, {close.year}</li>'
+        else:
+            details = f'<li>Publié : {day.day} {_french_month(day)} {day.year}</li><li>Commentaires acceptés jusqu\'au {close.day} {_french_month(close)} {close.year}</li>'
+        blocks.append(f'<div class="entry"><p><a href="{link}">{title}</a></p><ul>{details}</ul></div>')
+
+    filler = '<p>' + ' '.join(words * 20) + '</p>'
+    return (
+        '<html><body><h2 id="a3">Other</h2><div><a href="/x">x</a></div>\n'
+        + '<h2 id="a4">Open consultations</h2>\n'
+        + '\n'.join(blocks)
+        + '\n<h2 id="a5">Closed consultations</h2>\n'
+        + filler * 50
+        + '</body></html>\n'
+    )
+
+
+FRENCH_MONTH_NAMES = [
+    'janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet', 'août', 'septembre', 'octobre',
+    'novembre', 'décembre',
+]
+
+
+def _french_month(day):
+    return FRENCH_MONTH_NAMES[day.month - 1]
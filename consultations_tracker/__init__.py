@@ -0,0 +1 @@
+"""Shared building blocks for the Consultations Tracker report and Upptime sync scripts."""
@@ -0,0 +1,3 @@
+from consultations_tracker.cli import main
+
+main()
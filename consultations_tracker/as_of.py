@@ -0,0 +1,157 @@
+"""Point-in-time ("as of") queries on the consultations change log.
+
+Every version of a registry row in the change log is valid from its row_chng_datetime
+until the next version of the same composite_key was recorded. The versions are read from
+the change log store once, with the fields of delta rows filled in, given valid_from and
+valid_to columns and cached under ``.cache/as_of/``, sorted by composite_key. The cache is
+extended with the segments the store gained since it was written and rebuilt when the
+store was reimported. A registry snapshot is then one vectorized filter on the interval
+columns, and the history of a consultation a binary search on the sorted keys.
+
+The change log only records new row versions, not removals: a consultation that left the
+registry keeps its last version in every later snapshot.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from consultations_tracker.changelog_store import SEGMENT_SUFFIX, ChangeLogStore, expand_deltas
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'as_of')
+INTERVAL_COLUMNS = ['valid_from', 'valid_to']
+
+
+def as_timestamp(value):
+    """Return value as a naive timestamp comparable with row_chng_datetime (UTC when it has a timezone)."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp
+
+
+def version_intervals(versions):
+    """Return the versions sorted by composite_key and change time, with valid_from and valid_to.
+
+    The latest version of a key has no valid_to. Rows of a key recorded at the same time (a
+    key can appear more than once in a snapshot) share their interval.
+    """
+    versions = versions.copy()
+    versions['valid_from'] = pd.to_datetime(versions['row_chng_datetime'], format='mixed')
+    versions = versions.sort_values(['composite_key', 'valid_from'], kind='stable', ignore_index=True)
+
+    # Number the distinct (key, change time) pairs; each ends where the next one of its key starts.
+    keys = versions['composite_key']
+    new_start = keys.ne(keys.shift()) | versions['valid_from'].ne(versions['valid_from'].shift())
+    starts = versions.loc[new_start, ['composite_key', 'valid_from']]
+    next_start = starts['valid_from'].shift(-1).where(starts['composite_key'].eq(starts['composite_key'].shift(-1)))
+    versions['valid_to'] = next_start.to_numpy()[new_start.cumsum().to_numpy() - 1]
+    return versions
+
+
+class AsOfIndex:
+    """The change log versions with their validity intervals, cached in cache_dir."""
+
+    def __init__(self, store=None, cache_dir=DEFAULT_CACHE_DIR):
+        self.store = store or ChangeLogStore()
+        self.cache_dir = cache_dir
+        self.versions_path = os.path.join(cache_dir, 'versions' + SEGMENT_SUFFIX)
+        self.sources_path = os.path.join(cache_dir, 'sources.json')
+        self._versions = None
+
+    def sources(self):
+        """Return {path: size} of the change log files the index is built from.
+
+        Those are the store segments, or the CSV export when there is no store yet.
+        """
+        paths = self.store.segment_paths()
+        if not paths and os.path.exists(self.store.csv_export_path):
+            paths = [self.store.csv_export_path]
+        return {path: os.path.getsize(path) for path in paths}
+
+    def versions(self, rebuild=False):
+        """Return every stored version with valid_from and valid_to, sorted by composite_key."""
+        if self._versions is None or rebuild:
+            self._versions = self._load(rebuild)
+            self._keys = self._versions['composite_key'].to_numpy()
+            self._valid_from = self._versions['valid_from'].to_numpy()
+            self._valid_to = self._versions['valid_to'].to_numpy()
+        return self._versions
+
+    def snapshot(self, when, columns=None):
+        """Return the registry as it was at when: the version of every consultation valid then."""
+        when = as_timestamp(when).to_datetime64()
+        versions = self.versions()
+        # NaT never compares true, so versions that are still current pass the valid_to test.
+        valid = (self._valid_from <= when) & ~(self._valid_to <= when)
+        columns = columns or [column for column in versions.columns if column not in INTERVAL_COLUMNS]
+        return versions.loc[valid, columns].reset_index(drop=True)
+
+    def history(self, composite_key, until=None):
+        """Return the versions of one consultation, oldest first, recorded up to until if given."""
+        versions = self.versions()
+        start = np.searchsorted(self._keys, composite_key, side='left')
+        end = np.searchsorted(self._keys, composite_key, side='right')
+        history = versions.iloc[start:end]
+        if until is not None:
+            history = history[history['valid_from'] <= as_timestamp(until)]
+        return history.reset_index(drop=True)
+
+    def _load(self, rebuild):
+        sources = self.sources()
+        cached_sources = None if rebuild else self._cached_sources()
+        if not sources:
+            return version_intervals(pd.DataFrame(columns=['composite_key', 'row_chng_datetime']))
+
+        # The store only ever adds segments, so a cache whose files are all unchanged only
+        # lacks the new ones; anything else means the store was rebuilt.
+        if cached_sources is not None and all(sources.get(path) == size for path, size in cached_sources.items()):
+            new_paths = [path for path in sources if path not in cached_sources]
+            if not new_paths:
+                return self._read_cache()
+            versions = pd.concat(
+                [self._read_cache().drop(columns=INTERVAL_COLUMNS), self._read_sources(new_paths)],
+                ignore_index=True,
+            )
+            print(f"As-of index extended with {len(new_paths)} change log segments.")
+        else:
+            versions = self._read_sources(list(sources))
+            print(f"As-of index built from {len(sources)} change log files.")
+
+        # The cached versions are complete, so the new delta rows only build on them.
+        versions = version_intervals(expand_deltas(versions).drop(columns='keyframe', errors='ignore'))
+        self._write_cache(versions, sources)
+        return versions
+
+    def _read_sources(self, paths):
+        return pd.concat([self.store.read_segment(path) for path in paths], ignore_index=True)
+
+    def _cached_sources(self):
+        try:
+            with open(self.sources_path, 'r', encoding='utf-8') as file:
+                sources = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return sources if os.path.exists(self.versions_path) else None
+
+    def _read_cache(self):
+        if self.versions_path.endswith('.parquet'):
+            return pd.read_parquet(self.versions_path)
+        versions = pd.read_csv(self.versions_path, dtype=str)
+        for column in INTERVAL_COLUMNS:
+            versions[column] = pd.to_datetime(versions[column], format='ISO8601')
+        return versions
+
+    def _write_cache(self, versions, sources):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Drop the source list first so an interrupted write is rebuilt rather than extended.
+        if os.path.exists(self.sources_path):
+            os.remove(self.sources_path)
+        if self.versions_path.endswith('.parquet'):
+            versions.to_parquet(self.versions_path, index=False)
+        else:
+            versions.to_csv(self.versions_path, index=False)
+        with open(self.sources_path, 'w', encoding='utf-8') as file:
+            json.dump(sources, file, indent=2)
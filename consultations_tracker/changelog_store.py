@@ -0,0 +1,333 @@
+"""Append-only, month-partitioned, delta-encoded storage for the consultations change log.
+
+Every version of a registry row is written once to a segment under
+``changelog/segments/month=YYYY-MM/``. A small index keeps the hashes of the latest
+version of each ``composite_key`` so that detecting changes only has to read the index.
+``consultations_chng_log.csv`` is kept up to date by appending the same rows, in full, so
+the flatgithub viewer linked from changelog.html keeps working.
+
+A stored version only holds the fields that differ from the previous version of its key,
+listed in its ``changed_fields`` column; a listed field without a value changed to a missing
+value, so missing values need no placeholder. The first version of a key and every
+KEYFRAME_INTERVAL-th one after it are keyframes holding every field, so rebuilding a row
+never has to go back more than KEYFRAME_INTERVAL versions. The full latest version of
+every key is kept in ``latest_rows`` (a local cache, rebuilt from the segments when it does
+not match the index) to compute the deltas of a new snapshot without reading the history.
+Segments written before delta encoding hold full rows and are read as keyframes.
+"""
+
+import importlib.util
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ['composite_key', 'hash']
+INDEX_COLUMNS = ['composite_key', 'hash', 'row_chng_datetime']
+
+# Bookkeeping columns of every stored version; the other columns are the fields deltas leave out.
+VERSION_COLUMNS = ['composite_key', 'hash', 'row_chng_datetime']
+STORAGE_COLUMNS = ['changed_fields', 'keyframe']
+CHANGED_FIELDS_SEPARATOR = ';'
+KEYFRAME_INTERVAL = 10
+
+# Parquet segments need pyarrow; fall back to compressed CSV segments without it.
+if importlib.util.find_spec('pyarrow') is not None:
+    SEGMENT_SUFFIX = '.parquet'
+else:
+    SEGMENT_SUFFIX = '.csv.gz'
+
+
+def _as_text(frame):
+    """Return the frame with every column stored as text, keeping missing values missing."""
+    return frame.astype(str).where(frame.notna(), None)
+
+
+def _fields(frame):
+    return [column for column in frame.columns if column not in VERSION_COLUMNS + STORAGE_COLUMNS]
+
+
+def _version_order(frame):
+    """Return the index of the frame sorted by composite_key, then change time, then position."""
+    times = pd.to_datetime(frame['row_chng_datetime'], format='mixed')
+    return pd.DataFrame({'key': frame['composite_key'], 'time': times}).sort_values(['key', 'time'], kind='stable').index
+
+
+def encode_deltas(rows, previous=None, keyframe_interval=KEYFRAME_INTERVAL):
+    """Return full row versions as they are stored, and the versions since each one's keyframe.
+
+    changed_fields lists the fields that differ from the previous version of the key, in
+    rows or in previous (the latest stored version of every key, with a
+    versions_since_keyframe column). Delta rows leave the other fields empty. A key's first
+    version, every keyframe_interval-th version after a keyframe and any version whose
+    previous one is ambiguous (a key recorded more than once at the same time) are keyframes.
+    """
+    rows = rows.drop(columns=STORAGE_COLUMNS, errors='ignore').reset_index(drop=True)
+    fields = _fields(rows)
+    frames = [rows.assign(_context=False, _offset=0)]
+    if previous is not None and not previous.empty:
+        previous = previous[previous['composite_key'].isin(rows['composite_key'])]
+        previous = previous[~previous['composite_key'].duplicated(keep=False)]
+        frames.insert(0, previous.reindex(columns=rows.columns).assign(
+            _context=True, _offset=previous['versions_since_keyframe'].astype(int),
+        ))
+    combined = pd.concat(frames, ignore_index=True)
+    combined['_time'] = pd.to_datetime(combined['row_chng_datetime'], format='mixed')
+    # The previous versions sort first within their key, whatever their change times.
+    combined['_new'] = ~combined['_context']
+    combined = combined.sort_values(['composite_key', '_new', '_time'], kind='stable').reset_index()
+
+    # Versions of a key recorded at the same time form a group; groups of more than one row
+    # leave the previous version of the next group ambiguous.
+    times = combined['_time']
+    same_key = combined['composite_key'].eq(combined['composite_key'].shift())
+    group = (~same_key | times.ne(times.shift())).cumsum()
+    group_size = group.map(group.value_counts())
+    ambiguous = (group_size > 1) | (same_key & (group_size.shift() > 1))
+    has_previous = same_key & ~ambiguous
+
+    # Count the versions since the last keyframe: runs start at a key's first version, an
+    # ambiguous version or a previous version that carries its own count.
+    run = (~has_previous | combined['_context']).cumsum()
+    since = combined['_offset'].groupby(run).transform('first') + combined.groupby(run).cumcount()
+    keyframe = (since % keyframe_interval == 0).to_numpy()
+
+    # A field changed when its value or its missingness differs; two missing values are equal.
+    values = combined[fields].astype(object)
+    missing = values.isna()
+    differs = values.ne(values.shift()) & ~(missing & missing.shift(fill_value=False))
+    changed = differs.to_numpy() & has_previous.to_numpy()[:, None]
+    names = np.array(fields, dtype=object)
+    combined['changed_fields'] = [CHANGED_FIELDS_SEPARATOR.join(names[row]) for row in changed]
+    combined[fields] = combined[fields].where(changed | keyframe[:, None])
+    combined['keyframe'] = np.where(keyframe, 'True', 'False')
+    combined['versions_since_keyframe'] = since % keyframe_interval
+
+    stored = combined[~combined['_context']].sort_values('index')
+    return (
+        stored[list(rows.columns) + STORAGE_COLUMNS].reset_index(drop=True),
+        stored['versions_since_keyframe'].reset_index(drop=True),
+    )
+
+
+def expand_deltas(stored):
+    """Return stored row versions, in the same order, with the fields delta rows left out filled in.
+
+    Rows without a keyframe flag (written before delta encoding) hold every field.
+    """
+    if 'keyframe' not in stored.columns:
+        return stored
+    stored = stored.reset_index(drop=True)
+    full = stored['keyframe'].ne('False')
+    wrapped = CHANGED_FIELDS_SEPARATOR + stored['changed_fields'].fillna('') + CHANGED_FIELDS_SEPARATOR
+    order = _version_order(stored)
+    run = full.loc[order].cumsum()
+
+    # Every field is taken from the last row of its run that stores it, found by forward
+    # filling row positions rather than values, so a stored missing value stays missing.
+    positions = pd.Series(np.arange(len(stored), dtype='float64'), index=stored.index)
+    expanded = stored.copy()
+    for field in _fields(stored):
+        present = full | wrapped.str.contains(CHANGED_FIELDS_SEPARATOR + field + CHANGED_FIELDS_SEPARATOR, regex=False)
+        source = positions.where(present).loc[order].groupby(run).ffill().reindex(stored.index)
+        values = stored[field].to_numpy(dtype=object)[source.fillna(0).astype(int).to_numpy()]
+        expanded[field] = pd.Series(values, index=stored.index).where(source.notna())
+    return expanded
+
+
+class ChangeLogStore:
+    def __init__(self, root='changelog', csv_export_path='consultations_chng_log.csv', keyframe_interval=KEYFRAME_INTERVAL):
+        self.root = root
+        self.segments_dir = os.path.join(root, 'segments')
+        self.index_path = os.path.join(root, 'latest_hash_index.csv')
+        self.latest_rows_path = os.path.join(root, 'latest_rows' + SEGMENT_SUFFIX)
+        self.csv_export_path = csv_export_path
+        self.keyframe_interval = keyframe_interval
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def is_delta_encoded(self):
+        """Return whether the store was written with changed_fields and keyframes."""
+        paths = self.segment_paths()
+        return bool(paths) and 'keyframe' in self.segment_columns(paths[0])
+
+    def latest_hashes(self):
+        """Return the hashes of the latest version of every composite_key."""
+        if not self.exists():
+            return pd.DataFrame(columns=INDEX_COLUMNS)
+        return pd.read_csv(self.index_path, dtype=str)
+
+    def latest_rows(self):
+        """Return the full latest version of every composite_key, with versions_since_keyframe."""
+        index = self.latest_hashes()
+        if os.path.exists(self.latest_rows_path):
+            latest = self.read_segment(self.latest_rows_path)
+            if _version_pairs(latest) == _version_pairs(index):
+                return latest
+
+        # Rebuild the cache from the segments, picking the versions the index holds.
+        stored = self._read_stored()
+        if stored.empty:
+            return pd.DataFrame(columns=INDEX_COLUMNS + ['versions_since_keyframe'])
+        history = expand_deltas(stored)
+        full = history['keyframe'].ne('False') if 'keyframe' in history.columns else pd.Series(True, index=history.index)
+        order = _version_order(history)
+        history['versions_since_keyframe'] = history.loc[order].groupby(full.loc[order].cumsum()).cumcount()
+        latest = history.loc[order].drop_duplicates(KEY_COLUMNS, keep='last').merge(
+            index[KEY_COLUMNS].drop_duplicates(), on=KEY_COLUMNS,
+        )
+        latest = _as_text(latest.drop(columns=STORAGE_COLUMNS, errors='ignore'))
+        self._write_latest_rows(latest)
+        print("Change log latest rows rebuilt from the segments.")
+        return latest
+
+    def detect_changes(self, snapshot):
+        """Return the snapshot rows whose hash is not the latest hash stored for their key."""
+        merged = snapshot.merge(
+            self.latest_hashes()[KEY_COLUMNS].drop_duplicates(),
+            on=KEY_COLUMNS,
+            how='left',
+            indicator=True,
+        )
+        return merged[merged['_merge'] == 'left_only'].drop(columns='_merge')
+
+    def record_snapshot(self, snapshot):
+        """Append the changed rows of a snapshot to the store and return them, with changed_fields."""
+        changed_rows = self.detect_changes(snapshot)
+        if changed_rows.empty:
+            return changed_rows
+
+        latest = self.latest_rows()
+        stored, since = encode_deltas(changed_rows, latest, self.keyframe_interval)
+        self._write_segments(stored)
+
+        # A key may appear more than once in a snapshot, so the index keeps every hash the
+        # snapshot holds for each changed key rather than a single hash per key.
+        changed_keys = changed_rows['composite_key'].unique()
+        current_rows = snapshot.loc[snapshot['composite_key'].isin(changed_keys)]
+        index = self.latest_hashes()
+        index = pd.concat(
+            [
+                index[~index['composite_key'].isin(changed_keys)],
+                _as_text(current_rows[INDEX_COLUMNS]),
+            ],
+            ignore_index=True,
+        )
+        self._write_index(index)
+
+        versions_since_keyframe = stored[KEY_COLUMNS].assign(versions_since_keyframe=since).drop_duplicates(KEY_COLUMNS)
+        current_rows = current_rows.merge(versions_since_keyframe, on=KEY_COLUMNS, how='left')
+        current_rows['versions_since_keyframe'] = current_rows['versions_since_keyframe'].fillna(0).astype(int)
+        self._write_latest_rows(pd.concat(
+            [latest[~latest['composite_key'].isin(changed_keys)], _as_text(current_rows)],
+            ignore_index=True,
+        ))
+
+        self._append_csv_export(changed_rows)
+        return changed_rows.assign(changed_fields=stored['changed_fields'].to_numpy())
+
+    def import_history(self, history):
+        """Replace the store contents with a full change log history, such as the legacy CSV."""
+        if os.path.isdir(self.segments_dir):
+            for dirpath, _, filenames in os.walk(self.segments_dir):
+                for filename in filenames:
+                    os.remove(os.path.join(dirpath, filename))
+
+        history = history.drop(columns=STORAGE_COLUMNS, errors='ignore').reset_index(drop=True)
+        stored, since = encode_deltas(history, keyframe_interval=self.keyframe_interval)
+        self._write_segments(stored)
+
+        change_times = pd.to_datetime(history['row_chng_datetime'], format='mixed')
+        latest_times = change_times.groupby(history['composite_key']).transform('max')
+        self._write_index(history.loc[change_times == latest_times, INDEX_COLUMNS])
+        self._write_latest_rows(_as_text(history.assign(versions_since_keyframe=since).loc[change_times == latest_times]))
+
+    def read_history(self, columns=None):
+        """Return every stored row version in full, in the order the versions were recorded."""
+        stored = self._read_stored()
+        if stored.empty:
+            return pd.DataFrame(columns=columns)
+        history = expand_deltas(stored).drop(columns='keyframe', errors='ignore')
+        return history[columns] if columns else history
+
+    def segment_paths(self):
+        if not os.path.isdir(self.segments_dir):
+            return []
+        paths = []
+        for partition in sorted(os.listdir(self.segments_dir)):
+            partition_dir = os.path.join(self.segments_dir, partition)
+            paths.extend(
+                os.path.join(partition_dir, filename)
+                for filename in sorted(os.listdir(partition_dir))
+                if filename.endswith(('.parquet', '.csv.gz'))
+            )
+        return paths
+
+    def export_csv(self, path=None):
+        """Rewrite the full CSV export, one complete row per version, from the stored segments."""
+        self.read_history().drop(columns=STORAGE_COLUMNS, errors='ignore').to_csv(path or self.csv_export_path, index=False)
+
+    @staticmethod
+    def read_segment(path, columns=None):
+        """Read one segment (or a change log CSV) with every value as text, as it is stored."""
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path, columns=columns)
+        return pd.read_csv(path, dtype=str, usecols=columns)
+
+    @staticmethod
+    def segment_columns(path):
+        """Return the column names of a segment without reading its rows."""
+        if path.endswith('.parquet'):
+            import pyarrow.parquet
+
+            return pyarrow.parquet.read_schema(path).names
+        return list(pd.read_csv(path, nrows=0).columns)
+
+    def _read_stored(self):
+        frames = [self.read_segment(path) for path in self.segment_paths()]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _write_segments(self, rows):
+        rows = _as_text(rows)
+        months = pd.to_datetime(rows['row_chng_datetime'], format='mixed').dt.strftime('%Y-%m')
+        segment_name = datetime.now().strftime('%Y%m%dT%H%M%S%f') + SEGMENT_SUFFIX
+        for month, month_rows in rows.groupby(months, sort=True):
+            partition_dir = os.path.join(self.segments_dir, f'month={month}')
+            os.makedirs(partition_dir, exist_ok=True)
+            path = os.path.join(partition_dir, segment_name)
+            self._write_frame(month_rows, path)
+
+    @staticmethod
+    def _write_frame(frame, path):
+        if path.endswith('.parquet'):
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+
+    def _write_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        index = _as_text(index[INDEX_COLUMNS]).sort_values(KEY_COLUMNS, kind='stable')
+        index.to_csv(self.index_path, index=False)
+
+    def _write_latest_rows(self, latest):
+        # The rows are already text: the cached ones were read back as written.
+        os.makedirs(self.root, exist_ok=True)
+        self._write_frame(latest.reset_index(drop=True), self.latest_rows_path)
+
+    def _append_csv_export(self, rows):
+        if os.path.exists(self.csv_export_path):
+            export_columns = pd.read_csv(self.csv_export_path, nrows=0).columns
+            rows.reindex(columns=export_columns).to_csv(
+                self.csv_export_path, mode='a', header=False, index=False
+            )
+        else:
+            rows.to_csv(self.csv_export_path, index=False)
+
+
+def _version_pairs(frame):
+    """Return the distinct (composite_key, hash) pairs of a frame, to compare latest rows with the index."""
+    return set(frame[KEY_COLUMNS].itertuples(index=False, name=None))
@@ -0,0 +1,192 @@
+"""Command line entry point: ``consultations-tracker <subcommand>``.
+
+    consultations-tracker report [--force]
+    consultations-tracker sync-upptime [--upptime-config .upptimerc.yml] [--skip-bad-urls] [--no-probe]
+    consultations-tracker bad-urls [--output bad-urls.csv] [--no-probe]
+    consultations-tracker all [--force] [--upptime-config .upptimerc.yml] [--no-probe]
+    consultations-tracker gazette [--output gazette.csv]
+    consultations-tracker as-of [WHEN] [--key COMPOSITE_KEY] [--output registry.csv] [--rebuild]
+    consultations-tracker departments [--recompute | --verify] [--output department_rollups.csv]
+    consultations-tracker status
+
+Each subcommand imports what it needs only when it runs, so ``gazette`` and ``status`` start
+without loading pandas. The FORCE_REPORT and PROBE_LINKS environment variables of the old
+scripts still set the defaults of --force and --no-probe.
+"""
+
+import argparse
+import os
+import sys
+
+
+def report(args):
+    from consultations_tracker.report import run_report
+
+    run_report(force=args.force)
+
+
+def sync_upptime(args):
+    from consultations_tracker.upptime_sync import run_sync_upptime
+
+    run_sync_upptime(args.upptime_config, bad_urls=not args.skip_bad_urls, probe=args.probe)
+
+
+def bad_urls(args):
+    from consultations_tracker.upptime_sync import run_bad_urls
+
+    run_bad_urls(probe=args.probe, path=args.output)
+
+
+def run_all(args):
+    from consultations_tracker.pipeline import run_all
+
+    run_all(force=args.force, config_path=args.upptime_config, probe=args.probe)
+
+
+def gazette(args):
+    """Write the open Gazette consultations as CSV, without matching them to the registry."""
+    import contextlib
+    import csv
+
+    from consultations_tracker.gazette import GAZETTE_COLUMNS, collect_gazette_consultations
+
+    # The progress messages go to stderr so the CSV can be written to stdout.
+    with contextlib.redirect_stdout(sys.stderr):
+        consultation_rows = collect_gazette_consultations()
+    with contextlib.ExitStack() as stack:
+        file = stack.enter_context(open(args.output, 'w', newline='', encoding='utf-8')) if args.output else sys.stdout
+        writer = csv.DictWriter(file, fieldnames=GAZETTE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(consultation_rows)
+
+
+def as_of(args):
+    """Write the registry as it was at args.when, or the versions of one consultation, as CSV."""
+    import contextlib
+
+    from consultations_tracker.as_of import AsOfIndex
+
+    if args.when is None and args.key is None:
+        sys.exit("as-of: give a date or time, a --key, or both")
+    index = AsOfIndex()
+    # The progress messages go to stderr so the CSV can be written to stdout.
+    with contextlib.redirect_stdout(sys.stderr):
+        index.versions(rebuild=args.rebuild)
+    if args.key is not None:
+        rows = index.history(args.key, until=args.when)
+    else:
+        rows = index.snapshot(args.when)
+    rows.to_csv(args.output or sys.stdout, index=False)
+
+
+def departments(args):
+    """Write the department rollups as CSV, or with --verify compare them with a full recompute."""
+    import contextlib
+    from datetime import date
+
+    from consultations_tracker.departments import DepartmentRollups
+
+    rollups = DepartmentRollups()
+    if args.verify:
+        differences = rollups.verify()
+        if differences.empty:
+            print("Department rollups match a full recompute of the change log.")
+            return
+        print(f"{len(differences)} department rollup counts differ from a full recompute of the change log:")
+        print(differences.to_string(index=False))
+        sys.exit(1)
+    # The progress messages go to stderr so the CSV can be written to stdout.
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.recompute or not rollups.exists():
+            rollups.recompute()
+    rollups.table(date.today()).to_csv(args.output or sys.stdout, index=False)
+
+
+def status(args):
+    """Print the last run of each subcommand and whether the report outputs are intact."""
+    import json
+
+    from consultations_tracker.manifest import DEFAULT_MANIFEST_PATH, file_digest
+    from consultations_tracker.metrics import DEFAULT_METRICS_PATH
+
+    try:
+        with open(DEFAULT_METRICS_PATH, 'r', encoding='utf-8') as file:
+            runs = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        runs = {}
+    for name, run in sorted(runs.items()):
+        slowest = max(run['stages'], key=lambda stage: stage['wall_seconds'], default=None)
+        slowest_text = f", slowest stage {slowest['name']} ({slowest['wall_seconds']:.2f}s)" if slowest else ''
+        print(f"{name}: {run['outcome']} at {run['started_at']} in {run['wall_seconds']:.2f}s{slowest_text}")
+    if not runs:
+        print(f"No runs recorded in {DEFAULT_METRICS_PATH}.")
+
+    try:
+        with open(DEFAULT_MANIFEST_PATH, 'r', encoding='utf-8') as file:
+            outputs = json.load(file).get('outputs', {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        outputs = {}
+    for output, recorded in sorted(outputs.items()):
+        modified = [path for path, digest in recorded.get('files', {}).items() if file_digest(path) != digest]
+        state = f"modified since the last run: {', '.join(modified)}" if modified else 'up to date'
+        print(f"  {output}: {state}")
+
+
+def build_parser():
+    probe_default = os.environ.get('PROBE_LINKS', '1') != '0'
+    parser = argparse.ArgumentParser(prog='consultations-tracker', description="Consultations Tracker jobs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help="build the report CSVs, change log and HTML pages")
+    report_parser.add_argument(
+        '--force', action='store_true', default=os.environ.get('FORCE_REPORT') == '1',
+        help="rebuild every output even when its inputs did not change",
+    )
+    report_parser.set_defaults(handler=report)
+
+    sync_parser = subparsers.add_parser('sync-upptime', help="update the Upptime sites from the open consultations")
+    sync_parser.add_argument('--upptime-config', default='.upptimerc.yml', help="path of the Upptime configuration")
+    sync_parser.add_argument('--skip-bad-urls', action='store_true', help="do not write bad-urls.csv")
+    sync_parser.add_argument('--no-probe', dest='probe', action='store_false', default=probe_default, help="only check URL syntax")
+    sync_parser.set_defaults(handler=sync_upptime)
+
+    bad_urls_parser = subparsers.add_parser('bad-urls', help="write the consultations with invalid or broken URLs")
+    bad_urls_parser.add_argument('--output', default='bad-urls.csv')
+    bad_urls_parser.add_argument('--no-probe', dest='probe', action='store_false', default=probe_default, help="only check URL syntax")
+    bad_urls_parser.set_defaults(handler=bad_urls)
+
+    all_parser = subparsers.add_parser('all', help="run the report, the bad URL scan and the Upptime sync from one download")
+    all_parser.add_argument(
+        '--force', action='store_true', default=os.environ.get('FORCE_REPORT') == '1',
+        help="rebuild every report output even when its inputs did not change",
+    )
+    all_parser.add_argument('--upptime-config', default='.upptimerc.yml', help="path of the Upptime configuration")
+    all_parser.add_argument('--no-probe', dest='probe', action='store_false', default=probe_default, help="only check URL syntax")
+    all_parser.set_defaults(handler=run_all)
+
+    gazette_parser = subparsers.add_parser('gazette', help="list the open Canada Gazette consultations as CSV")
+    gazette_parser.add_argument('--output', help="CSV file to write (default: standard output)")
+    gazette_parser.set_defaults(handler=gazette)
+
+    as_of_parser = subparsers.add_parser('as-of', help="show the registry, or one consultation's versions, as of a date")
+    as_of_parser.add_argument('when', nargs='?', help="date or time, e.g. 2024-05-01 or 2024-05-01T12:00 (UTC)")
+    as_of_parser.add_argument('--key', help="composite_key (owner_org-registration_number) whose versions to list")
+    as_of_parser.add_argument('--output', help="CSV file to write (default: standard output)")
+    as_of_parser.add_argument('--rebuild', action='store_true', help="rebuild the cached interval index")
+    as_of_parser.set_defaults(handler=as_of)
+
+    departments_parser = subparsers.add_parser('departments', help="show the consultation counts by department")
+    departments_mode = departments_parser.add_mutually_exclusive_group()
+    departments_mode.add_argument('--recompute', action='store_true', help="rebuild the rollups from the whole change log")
+    departments_mode.add_argument('--verify', action='store_true', help="compare the rollups with a full recompute")
+    departments_parser.add_argument('--output', help="CSV file to write (default: standard output)")
+    departments_parser.set_defaults(handler=departments)
+
+    status_parser = subparsers.add_parser('status', help="show the last runs and the state of the report outputs")
+    status_parser.set_defaults(handler=status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
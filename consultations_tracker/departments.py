@@ -0,0 +1,207 @@
+"""Per-department rollups maintained incrementally from the change log.
+
+For every owner_org the rollups count its consultations by status, the late closing, early
+closing and late starting ones (the report rules of the same names) and give the median
+length of its consultations. They are computed from the latest change log version of every
+composite_key and kept between runs under ``changelog/departments/``:
+
+* ``state`` holds the fields the rollups read from the latest version of each key, and
+* ``histograms`` holds, per owner_org, counts by status, by end date of the open and of the
+  closed consultations, by start date of the planned ones and by length in days.
+
+A run only applies the rows it appended to the change log: the previous version of each
+changed key is subtracted from the histograms and the new one added. The late and early
+counts depend on the day of the report, so they are summed from the date histograms on
+either side of today, and the median is read off the length histogram; neither needs the
+consultations themselves.
+
+The state is checked against the change log index after every update and recomputed from
+the full history when they differ (a first run, a reimported store or a lost cache);
+``consultations-tracker departments --verify`` recomputes it on demand and compares.
+Like the change log, the rollups keep the consultations removed from the registry, and a
+key registered more than once counts once, with its last recorded version.
+"""
+
+import os
+
+import pandas as pd
+
+from consultations_tracker.changelog_store import SEGMENT_SUFFIX, ChangeLogStore
+from consultations_tracker.registry import parse_dates
+
+DEFAULT_ROOT = os.path.join('changelog', 'departments')
+ROLLUPS_CSV = 'department_rollups.csv'
+
+STATE_COLUMNS = ['composite_key', 'hash', 'owner_org', 'status', 'start_date', 'end_date']
+HISTOGRAM_KEYS = ['owner_org', 'measure', 'value']
+STATUS_NAMES = {'O': 'open', 'P': 'planned', 'C': 'closed'}
+ROLLUP_COLUMNS = [
+    'owner_org', 'consultations', 'open', 'planned', 'closed', 'late_close', 'early_close', 'late_start',
+    'median_length_days',
+]
+
+
+def latest_versions(rows):
+    """Return the last of the rows of every composite_key, rows being in recorded order."""
+    return rows.drop_duplicates('composite_key', keep='last').reindex(columns=STATE_COLUMNS).reset_index(drop=True)
+
+
+def histogram_entries(state):
+    """Return the (owner_org, measure, value) histogram entries of the versions in state.
+
+    Dates are kept to the day, as the report rules compare them; lengths are whole days
+    and only counted when the consultation does not end before it starts.
+    """
+    status = state['status'].astype(object)
+    start = parse_dates(state['start_date']).dt.floor('D')
+    end = parse_dates(state['end_date']).dt.floor('D')
+    length = (end - start).dt.days
+    measures = [
+        ('status', status.notna(), status),
+        ('open_end', status.eq('O') & end.notna(), end.dt.strftime('%Y-%m-%d')),
+        ('closed_end', status.eq('C') & end.notna(), end.dt.strftime('%Y-%m-%d')),
+        ('planned_start', status.eq('P') & start.notna(), start.dt.strftime('%Y-%m-%d')),
+        ('length_days', length.ge(0), length.astype('Int64').astype(str)),
+    ]
+    return pd.concat(
+        [
+            pd.DataFrame({'owner_org': state.loc[mask, 'owner_org'], 'measure': measure, 'value': values[mask]})
+            for measure, mask, values in measures
+        ],
+        ignore_index=True,
+    )
+
+
+def histogram_counts(state, sign=1):
+    """Return the histograms of the versions in state, each entry counted sign times."""
+    counts = histogram_entries(state).groupby(HISTOGRAM_KEYS).size().mul(sign).rename('count')
+    return counts.reset_index()
+
+
+def apply_changes(histograms, removed, added):
+    """Return the histograms with the removed versions subtracted and the added ones counted."""
+    counts = pd.concat(
+        [histograms, histogram_counts(removed, -1), histogram_counts(added)], ignore_index=True,
+    ).groupby(HISTOGRAM_KEYS, as_index=False)['count'].sum()
+    return counts[counts['count'] != 0].reset_index(drop=True)
+
+
+def histogram_medians(lengths):
+    """Return the median length of every owner_org from its (owner_org, value, count) length histogram."""
+    lengths = lengths.assign(value=lengths['value'].astype(int)).sort_values(['owner_org', 'value'])
+    by_department = lengths.groupby('owner_org')['count']
+    seen = by_department.cumsum()
+    total = by_department.transform('sum')
+
+    # The value holding the 0-based rank k is the first whose running count exceeds k.
+    def value_at(rank):
+        return lengths.loc[seen > rank].groupby('owner_org')['value'].first()
+
+    return (value_at((total - 1) // 2) + value_at(total // 2)) / 2
+
+
+def rollup_table(histograms, today):
+    """Return one row of ROLLUP_COLUMNS per owner_org, with the late and early counts as of today."""
+    if histograms.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    today = f'{today:%Y-%m-%d}'
+    measure = histograms['measure']
+    statuses = histograms[measure.eq('status')].pivot_table(
+        index='owner_org', columns='value', values='count', aggfunc='sum', fill_value=0,
+    )
+    table = pd.DataFrame(index=statuses.index)
+    table['consultations'] = statuses.sum(axis=1)
+    for status, name in STATUS_NAMES.items():
+        table[name] = statuses[status] if status in statuses.columns else 0
+
+    def dated(name, before):
+        rows = histograms[measure.eq(name)]
+        rows = rows[rows['value'] < today] if before else rows[rows['value'] > today]
+        return rows.groupby('owner_org')['count'].sum()
+
+    table['late_close'] = dated('open_end', before=True)
+    table['early_close'] = dated('closed_end', before=False)
+    table['late_start'] = dated('planned_start', before=True)
+    counts = ROLLUP_COLUMNS[1:-1]
+    table[counts] = table[counts].fillna(0).astype(int)
+    table['median_length_days'] = histogram_medians(histograms[measure.eq('length_days')])
+    table = table.rename_axis('owner_org').reset_index()
+    return table.reindex(columns=ROLLUP_COLUMNS).sort_values('owner_org', ignore_index=True)
+
+
+class DepartmentRollups:
+    """The per-key state and department histograms kept under root."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.state_path = os.path.join(root, 'state' + SEGMENT_SUFFIX)
+        self.histograms_path = os.path.join(root, 'histograms.csv')
+
+    def exists(self):
+        return os.path.exists(self.state_path) and os.path.exists(self.histograms_path)
+
+    def histograms(self):
+        return pd.read_csv(self.histograms_path, dtype={'value': str})
+
+    def table(self, today):
+        return rollup_table(self.histograms(), today)
+
+    def update(self, appended_rows, store=None):
+        """Apply the rows a run appended to the change log in store; recompute when the state does not match it."""
+        store = store or ChangeLogStore()
+        if not self.exists():
+            self.recompute(store)
+            return
+        state = ChangeLogStore.read_segment(self.state_path)
+        if not appended_rows.empty:
+            added = latest_versions(appended_rows)
+            changed = state['composite_key'].isin(added['composite_key'])
+            histograms = apply_changes(self.histograms(), state[changed], added)
+            state = pd.concat([state[~changed], added], ignore_index=True)
+            self._write(state, histograms)
+        if not self.matches(state, store.latest_hashes()):
+            print("Department rollups recomputed: their state does not match the change log.")
+            self.recompute(store)
+
+    @staticmethod
+    def matches(state, index):
+        """Return whether state holds one of the latest versions of every key of the change log index."""
+        latest = pd.MultiIndex.from_frame(index[['composite_key', 'hash']])
+        return (
+            len(state) == index['composite_key'].nunique()
+            and pd.MultiIndex.from_frame(state[['composite_key', 'hash']]).isin(latest).all()
+        )
+
+    @staticmethod
+    def full_state(store):
+        """Return the state and histograms computed from the whole change log history in store."""
+        history = store.read_history(STATE_COLUMNS + ['row_chng_datetime'])
+        if history.empty:
+            state = pd.DataFrame(columns=STATE_COLUMNS)
+        else:
+            times = pd.to_datetime(history['row_chng_datetime'], format='mixed')
+            state = latest_versions(history.loc[times.sort_values(kind='stable').index])
+        return state, histogram_counts(state)
+
+    def recompute(self, store=None):
+        """Rebuild the state and histograms from the whole change log history."""
+        state, histograms = self.full_state(store or ChangeLogStore())
+        self._write(state, histograms)
+        print(f"Department rollups recomputed from the change log ({len(state)} consultations).")
+
+    def verify(self, store=None):
+        """Return the histogram entries whose stored count differs from a full recompute."""
+        _, expected = self.full_state(store or ChangeLogStore())
+        stored = self.histograms() if self.exists() else expected.iloc[:0]
+        compared = stored.merge(expected, on=HISTOGRAM_KEYS, how='outer', suffixes=('_stored', '_recomputed'))
+        compared = compared.fillna({'count_stored': 0, 'count_recomputed': 0})
+        return compared[compared['count_stored'] != compared['count_recomputed']].reset_index(drop=True)
+
+    def _write(self, state, histograms):
+        os.makedirs(self.root, exist_ok=True)
+        state = state.reset_index(drop=True)
+        if self.state_path.endswith('.parquet'):
+            state.to_parquet(self.state_path, index=False)
+        else:
+            state.to_csv(self.state_path, index=False)
+        histograms.sort_values(HISTOGRAM_KEYS).to_csv(self.histograms_path, index=False)
@@ -0,0 +1,175 @@
+"""Conditional-GET download cache shared by the report and Upptime sync scripts.
+
+Each URL is stored on disk next to its ETag/Last-Modified metadata. Later downloads send
+those validators and reuse the cached body when the server answers 304 Not Modified, and
+the cached body doubles as the last-known-good copy when the server cannot be reached.
+Within one process each URL is fetched at most once, transient failures are retried with
+jittered exponential backoff, and several URLs can be fetched concurrently with fetch_all.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'downloads')
+USER_AGENT = 'Consultations-Tracker/1.0'
+
+# status is 'downloaded', 'not-modified' or 'stale' (the server could not be reached).
+CachedDownload = namedtuple('CachedDownload', ['url', 'path', 'status', 'fetched_at'])
+
+# HTTP statuses worth retrying; other errors (404, 403, ...) fail immediately.
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+_downloads_this_run = {}
+_downloads_lock = threading.Lock()
+_bytes_downloaded = 0
+
+
+def bytes_downloaded():
+    """Return the number of response body bytes downloaded by this process so far."""
+    return _bytes_downloaded
+
+
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:24]
+    return os.path.join(cache_dir, f'{key}.body'), os.path.join(cache_dir, f'{key}.json')
+
+
+def _read_metadata(metadata_path):
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _download(url, headers, body_path, timeout, chunk_size=1024 * 1024, stop=None):
+    """Stream url into body_path and return the response metadata, logging latency and size.
+
+    When stop is given it is called with every chunk as it arrives, and the download ends
+    early, keeping only what was read so far, as soon as it returns True.
+    """
+    global _bytes_downloaded
+    started = time.perf_counter()
+    size = 0
+    truncated = False
+    with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+        temporary_path = body_path + '.part'
+        with open(temporary_path, 'wb') as file:
+            while chunk := response.read(chunk_size):
+                file.write(chunk)
+                size += len(chunk)
+                if stop is not None and stop(chunk):
+                    truncated = True
+                    break
+        os.replace(temporary_path, body_path)
+        metadata = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            'truncated': truncated,
+        }
+    with _downloads_lock:
+        _bytes_downloaded += size
+    stopped_early = ' (stopped early)' if truncated else ''
+    print(f"GET {url}: 200, {size} bytes in {time.perf_counter() - started:.2f}s{stopped_early}")
+    return metadata
+
+
+def _is_retryable(error):
+    if isinstance(error, HTTPError):
+        return error.code in RETRYABLE_STATUSES
+    return True
+
+
+def fetch_cached(
+    url, cache_dir=DEFAULT_CACHE_DIR, timeout=60, retries=3, backoff=1.0, chunk_size=1024 * 1024, stop_factory=None
+):
+    """Return a CachedDownload for url, downloading it only when the cached copy is out of date.
+
+    Failed attempts are retried up to `retries` times, sleeping a jittered `backoff * 2**attempt`
+    seconds in between. `stop_factory`, when given, returns a fresh chunk predicate for every
+    attempt; the download stops reading the response once the predicate returns True.
+
+    Raises URLError (or another OSError) when the server cannot be reached and nothing is
+    cached yet; the failure is remembered for the rest of the run.
+    """
+    with _downloads_lock:
+        if url in _downloads_this_run:
+            download = _downloads_this_run[url]
+            if isinstance(download, Exception):
+                raise download
+            return download
+
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, metadata_path = _cache_paths(url, cache_dir)
+    metadata = _read_metadata(metadata_path) if os.path.exists(body_path) else {}
+
+    headers = {'User-Agent': USER_AGENT}
+    if metadata.get('etag'):
+        headers['If-None-Match'] = metadata['etag']
+    if metadata.get('last_modified'):
+        headers['If-Modified-Since'] = metadata['last_modified']
+
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            stop = stop_factory() if stop_factory else None
+            metadata = _download(url, headers, body_path, timeout, chunk_size, stop)
+            with open(metadata_path, 'w', encoding='utf-8') as file:
+                json.dump(metadata, file, indent=2)
+            status = 'downloaded'
+            break
+        except HTTPError as error:
+            if error.code == 304 and metadata:
+                print(f"GET {url}: 304, not modified in {time.perf_counter() - started:.2f}s")
+                status = 'not-modified'
+                break
+            failure = error
+        except OSError as error:
+            # URLError, timeouts and dropped connections all land here.
+            failure = error
+
+        print(f"GET {url}: attempt {attempt + 1} failed after {time.perf_counter() - started:.2f}s ({failure})")
+        if attempt == retries or not _is_retryable(failure):
+            if not metadata:
+                with _downloads_lock:
+                    _downloads_this_run[url] = failure
+                raise failure
+            print(f"Using the copy of {url} from {metadata.get('fetched_at')}.")
+            status = 'stale'
+            break
+        time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    download = CachedDownload(url, body_path, status, metadata.get('fetched_at'))
+    with _downloads_lock:
+        _downloads_this_run[url] = download
+    return download
+
+
+def fetch_all(requests, max_workers=4):
+    """Fetch several downloads concurrently.
+
+    `requests` maps a name to a URL, fetched with the fetch_cached defaults, or to a callable
+    that performs the download and returns a CachedDownload. Returns a dict mapping each name
+    to its CachedDownload, or to the exception raised when it could not be fetched, so the run
+    is bounded by the slowest single request rather than their sum.
+    """
+    def fetch(request):
+        try:
+            return request() if callable(request) else fetch_cached(request)
+        except OSError as error:
+            return error
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(fetch, request) for name, request in requests.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,52 @@
+"""Versioned row fingerprints stored in the change log's 'hash' column."""
+
+import hashlib
+
+import pandas as pd
+
+# Version tag of the row fingerprint scheme stored in the change log's 'hash' column.
+# Bump it whenever the canonical serialization below changes so stored hashes get migrated.
+HASH_SCHEME = 'v2'
+HASH_EXCLUDED_COLUMNS = {'_id', 'hash', 'datetime', 'row_chng_datetime', 'composite_key'}
+HASH_FIELD_SEPARATOR = '\x1f'
+
+
+def canonical_text(column):
+    """Return the text of a column as it is serialized for row fingerprints (missing values are empty)."""
+    return column.astype(str).where(column.notna(), '')
+
+
+def fingerprint_rows(frame):
+    """Return a versioned SHA-256 fingerprint for every row of the frame.
+
+    The source columns are taken in name order, so the fingerprint does not depend on the
+    column order of the download, and are joined into one canonical string per row before
+    hashing. The datastore '_id' and the change log bookkeeping columns are left out.
+    """
+    source_columns = sorted(column for column in frame.columns if column not in HASH_EXCLUDED_COLUMNS)
+    if not source_columns or frame.empty:
+        return pd.Series('', index=frame.index, dtype=object)
+
+    first_column, *other_columns = (canonical_text(frame[column]) for column in source_columns)
+    serialized_rows = first_column.str.cat(other_columns, sep=HASH_FIELD_SEPARATOR)
+    return pd.Series(
+        [
+            f"{HASH_SCHEME}:{hashlib.sha256(row.encode('utf-8')).hexdigest()}"
+            for row in serialized_rows
+        ],
+        index=frame.index,
+        dtype=object,
+    )
+
+
+def migrate_change_log_hashes(log_df, log_path='consultations_chng_log.csv'):
+    """Rehash change log rows written with an older hash scheme and rewrite the log once."""
+    stale_rows = ~log_df['hash'].astype(str).str.startswith(f'{HASH_SCHEME}:')
+    if not stale_rows.any():
+        return log_df
+
+    log_df = log_df.copy()
+    log_df.loc[stale_rows, 'hash'] = fingerprint_rows(log_df.loc[stale_rows])
+    log_df.to_csv(log_path, index=False)
+    print(f"Migrated {stale_rows.sum()} change log hashes to scheme {HASH_SCHEME}.")
+    return log_df
@@ -0,0 +1,424 @@
+"""Scraper for the open consultations listed in the Canada Gazette, Part I.
+
+The English and French listing pages are parsed separately and paired into bilingual rows
+by a hash join on the notice identifier taken from each link's path.
+"""
+
+import codecs
+import re
+from collections import defaultdict, deque
+from datetime import date
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from consultations_tracker.download import fetch_cached
+
+gazette_consultations_en_url = 'https://gazette.gc.ca/consult/consult-eng.html#a4'
+gazette_consultations_fr_url = 'https://gazette.gc.ca/consult/consult-fra.html#a4'
+gazette_base_url = 'https://gazette.gc.ca'
+
+GAZETTE_COLUMNS = ['date_published', 'date_close', 'title_en', 'title_fr', 'link_en', 'link_fr']
+
+# The listing pages are streamed in small chunks so reading can stop right after the open section.
+GAZETTE_CHUNK_SIZE = 16 * 1024
+
+# Entries parsed while each listing page was downloaded this run, by URL.
+_streamed_entries = {}
+
+# Language marker at the end of a Gazette page name, e.g. the '-eng' in 'reg1-eng.html'.
+NOTICE_LANGUAGE_SUFFIX = re.compile(r'-(?:eng|fra)(?=\.html?$)')
+
+ENGLISH_MONTHS = {
+    'january': 1,
+    'february': 2,
+    'march': 3,
+    'april': 4,
+    'may': 5,
+    'june': 6,
+    'july': 7,
+    'august': 8,
+    'september': 9,
+    'october': 10,
+    'november': 11,
+    'december': 12,
+}
+FRENCH_MONTHS = {
+    'janvier': 1,
+    'février': 2,
+    'fevrier': 2,
+    'mars': 3,
+    'avril': 4,
+    'mai': 5,
+    'juin': 6,
+    'juillet': 7,
+    'août': 8,
+    'aout': 8,
+    'septembre': 9,
+    'octobre': 10,
+    'novembre': 11,
+    'décembre': 12,
+    'decembre': 12,
+}
+MONTHS = {**ENGLISH_MONTHS, **FRENCH_MONTHS}
+
+_YEAR = r'(?:,?\s+(?P<year_{}>\d{{4}}))?'
+
+
+def _date_pattern(months, day_suffix, connectors, month_first):
+    """Compile the date forms of one language; the year of every form is optional.
+
+    The forms are, in order: a) "July 1 to 15, 2026"  b) "du 1er au 15 juillet 2026"
+    c) "July 18, 2026"  d) "18 juillet 2026"; the month-first ones only when month_first.
+    """
+    names = '|'.join(sorted((re.escape(name) for name in months), key=len, reverse=True))
+    def day(group):
+        return rf'(?P<{group}>\d{{1,2}})(?:{day_suffix})?'
+
+    def days(form):
+        return day(f'start_{form}') + rf'\s*(?:{connectors})\s*' + day(f'end_{form}')
+
+    forms = [
+        days('b') + rf'\s+(?P<month_b>{names})' + _YEAR.format('b'),
+        day('day_d') + rf'\s+(?P<month_d>{names})' + _YEAR.format('d'),
+    ]
+    if month_first:
+        forms = [
+            rf'(?P<month_a>{names})\s+' + days('a') + _YEAR.format('a'),
+            forms[0],
+            rf'(?P<month_c>{names})\s+' + day('day_c') + _YEAR.format('c'),
+            forms[1],
+        ]
+    return re.compile(rf'\b(?:{"|".join(forms)})\b', re.IGNORECASE)
+
+
+# One compiled engine per language, so English prose is never read with French month names
+# or French forms, and the other way around.
+DATE_PATTERNS = {
+    'en': _date_pattern(ENGLISH_MONTHS, 'st|nd|rd|th', '-|–|to|and', month_first=True),
+    'fr': _date_pattern(FRENCH_MONTHS, 'er|re|e', '-|–|au|et', month_first=False),
+}
+
+# What may stand between a date without a year and the dated end of its range.
+RANGE_CONNECTOR = re.compile(r"\s*(?:-|–|to|and|until|au|et|jusqu'au|jusqu’au)\s*", re.IGNORECASE)
+FIRST_OF_MONTH = re.compile(r'\b1er\b', re.IGNORECASE)
+
+
+class GazetteConsultationParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.finished = False
+        self.in_open_section = False
+        self.in_entry = False
+        self.in_link = False
+        self.in_list_item = False
+        self.current_entry = None
+        self.current_text = []
+        self.entries = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'h2' and attrs.get('id') == 'a4':
+            self.in_open_section = True
+            return
+
+        if not self.in_open_section:
+            return
+
+        if tag == 'h2':
+            self.in_open_section = False
+            self.finished = True
+            return
+
+        if tag == 'div':
+            self.in_entry = True
+            self.current_entry = {'title': '', 'link': '', 'items': []}
+            return
+
+        if not self.in_entry:
+            return
+
+        if tag == 'a':
+            self.in_link = True
+            self.current_text = []
+            self.current_entry['link'] = attrs.get('href', '')
+        elif tag == 'li':
+            self.in_list_item = True
+            self.current_text = []
+
+    def handle_endtag(self, tag):
+        if tag == 'h2' and self.in_open_section and not self.in_entry:
+            return
+
+        if not self.in_open_section or not self.in_entry:
+            return
+
+        if tag == 'a' and self.in_link:
+            self.current_entry['title'] = normalize_space(''.join(self.current_text))
+            self.in_link = False
+            self.current_text = []
+        elif tag == 'li' and self.in_list_item:
+            self.current_entry['items'].append(normalize_space(''.join(self.current_text)))
+            self.in_list_item = False
+            self.current_text = []
+        elif tag == 'div':
+            if self.current_entry and self.current_entry.get('title'):
+                self.entries.append(self.current_entry)
+            self.current_entry = None
+            self.in_entry = False
+
+    def handle_data(self, data):
+        if self.in_link or self.in_list_item:
+            self.current_text.append(data)
+
+    def feed_chunk(self, chunk):
+        """Feed raw bytes, decoding them incrementally, and return True once the open section has ended."""
+        self.feed(self.decoder.decode(chunk))
+        return self.finished
+
+    def pop_entries(self):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def iter_gazette_entries(chunks):
+    """Parse an iterable of HTML byte chunks and yield each open consultation entry as it completes.
+
+    No more chunks are consumed once the parser has left the open consultations section.
+    """
+    parser = GazetteConsultationParser()
+    for chunk in chunks:
+        finished = parser.feed_chunk(chunk)
+        yield from parser.pop_entries()
+        if finished:
+            return
+    yield from _final_entries(parser)
+
+
+def _final_entries(parser):
+    """Return the entries left in parser once its input has ended, flushing it when the section had not."""
+    if not parser.finished:
+        parser.feed(parser.decoder.decode(b'', final=True))
+        parser.close()
+    return parser.pop_entries()
+
+
+def normalize_space(value):
+    return re.sub(r'\s+', ' ', value).strip()
+
+
+def _date_parts(match):
+    """Return the (day, month, year) parts of a DATE_PATTERNS match; a range gives two parts."""
+    groups = match.groupdict()
+    for form in 'ab':
+        if groups.get(f'month_{form}'):
+            month = MONTHS[groups[f'month_{form}'].lower()]
+            year = groups[f'year_{form}']
+            return [(int(groups[f'start_{form}']), month, year), (int(groups[f'end_{form}']), month, year)]
+    for form in 'cd':
+        if groups.get(f'month_{form}'):
+            return [(int(groups[f'day_{form}']), MONTHS[groups[f'month_{form}'].lower()], groups[f'year_{form}'])]
+    return []
+
+
+def extract_dates(value, language, reference_year=None):
+    """Return every date of the language ('en' or 'fr') in value as ISO text, in order of appearance.
+
+    Day and month numbers are common in prose ("section 21 may 2 times"), so a date without
+    a year is only read when it starts a range whose end has one ("December 15 to January
+    15, 2027") or is the French "1er" of a month. It then takes the year of the next dated
+    part, moved back a year when it would otherwise fall after it, or reference_year (the
+    current year by default).
+    """
+    text = normalize_space(value)
+    matches = list(DATE_PATTERNS[language].finditer(text))
+    parts = []
+    for position, match in enumerate(matches):
+        date_parts = _date_parts(match)
+        if not date_parts[0][2]:
+            following = matches[position + 1] if position + 1 < len(matches) else None
+            ends_in_dated_range = (
+                following is not None
+                and _date_parts(following)[-1][2]
+                and RANGE_CONNECTOR.fullmatch(text[match.end():following.start()])
+            )
+            if not ends_in_dated_range and not FIRST_OF_MONTH.search(match.group(0)):
+                continue
+        parts.extend(date_parts)
+
+    dates = []
+    next_year = reference_year or date.today().year
+    next_month_day = None
+    for day, month, year in reversed(parts):
+        if year:
+            year = int(year)
+        else:
+            year = next_year
+            if next_month_day and (month, day) > next_month_day:
+                year -= 1
+        try:
+            dates.append(date(year, month, day).isoformat())
+        except ValueError:
+            continue
+        next_year, next_month_day = year, (month, day)
+    return dates[::-1]
+
+
+def parse_text_date(value, language, reference_year=None):
+    """Return the first date of the language in value as ISO text, or an empty string."""
+    dates = extract_dates(value, language, reference_year)
+    return dates[0] if dates else ''
+
+
+def parse_date_range(value, language, reference_year=None):
+    """Return the first and last dates of the language in value ("from X to Y"), or two empty strings."""
+    dates = extract_dates(value, language, reference_year)
+    return (dates[0], dates[-1]) if dates else ('', '')
+
+
+def fetch_gazette_page(url):
+    """Download a Gazette listing page, stopping as soon as its open consultations section ends.
+
+    The parser that decides where to stop also collects the entries; when the page is
+    downloaded they are kept for gazette_page_entries, so the page is only parsed once.
+    """
+    parsers = []
+
+    def stop_factory():
+        # A fresh parser for every attempt; only the last one read the stored page.
+        parsers.append(GazetteConsultationParser())
+        return parsers[-1].feed_chunk
+
+    gazette_download = fetch_cached(url, timeout=30, chunk_size=GAZETTE_CHUNK_SIZE, stop_factory=stop_factory)
+    if gazette_download.status == 'downloaded' and parsers:
+        _streamed_entries[url] = _final_entries(parsers[-1])
+    return gazette_download
+
+
+def gazette_page_entries(url):
+    """Return the open consultation entries of a Gazette listing page.
+
+    The entries parsed while the page was downloaded are reused; the cached copy is only
+    read back from disk when the server answered 304 Not Modified or could not be reached.
+    """
+    gazette_download = fetch_gazette_page(url)
+    if gazette_download.status == 'downloaded' and url in _streamed_entries:
+        return _streamed_entries[url]
+    with open(gazette_download.path, 'rb') as file:
+        return list(iter_gazette_entries(iter(lambda: file.read(GAZETTE_CHUNK_SIZE), b'')))
+
+
+def consultation_from_entry(entry, language):
+    published_text = next(
+        (item for item in entry['items'] if 'published' in item.lower() or 'publié' in item.lower()),
+        '',
+    )
+    close_text = next(
+        (item for item in entry['items'] if 'until' in item.lower() or 'jusqu' in item.lower()),
+        '',
+    )
+    date_published = parse_text_date(published_text, language)
+    reference_year = int(date_published[:4]) if date_published else None
+    return {
+        f'title_{language}': entry['title'],
+        f'link_{language}': urljoin(gazette_base_url, entry['link']),
+        'date_published': date_published,
+        # "from X until Y" closes on the last date.
+        'date_close': parse_date_range(close_text, language, reference_year)[1],
+    }
+
+
+def iter_gazette_consultations(url, language):
+    """Yield the open consultations of a Gazette listing page."""
+    for entry in gazette_page_entries(url):
+        yield consultation_from_entry(entry, language)
+
+
+def fetch_gazette_consultations(url, language):
+    return list(iter_gazette_consultations(url, language))
+
+
+def notice_identifier(link):
+    """Return a language-neutral identifier for a Gazette notice link.
+
+    The host is ignored and the -eng/-fra suffix is dropped from the page name, so
+    .../html/reg1-eng.html#ne1 and .../html/reg1-fra.html#ne1 share one identifier. A link
+    without a path, to the site itself, identifies no notice and gives None.
+    """
+    parts = urlsplit(link)
+    path = NOTICE_LANGUAGE_SUFFIX.sub('', parts.path.lower())
+    if not path.strip('/'):
+        return None
+    return f'{path}#{parts.fragment.lower()}' if parts.fragment else path
+
+
+def join_bilingual_consultations(english_consultations, french_consultations):
+    """Pair English and French entries on their notice identifier.
+
+    Returns the bilingual rows together with the English-only and French-only entries. The
+    unmatched entries are kept in the rows too, with the other language left blank; entries
+    whose link identifies no notice are never paired. Entries sharing a notice identifier
+    are paired in page order, and those left over are reported as unmatched.
+    """
+    french_by_notice = defaultdict(deque)
+    for french_entry in french_consultations:
+        notice = notice_identifier(french_entry['link_fr'])
+        if notice is not None:
+            french_by_notice[notice].append(french_entry)
+
+    consultation_rows = []
+    english_only = []
+    paired = set()
+    for english_entry in english_consultations:
+        french_entries = french_by_notice.get(notice_identifier(english_entry['link_en']))
+        if french_entries:
+            french_entry = french_entries.popleft()
+            paired.add(id(french_entry))
+        else:
+            english_only.append(english_entry)
+            french_entry = {'link_fr': english_entry['link_en'].replace('-eng.html', '-fra.html')}
+        consultation_rows.append(
+            {
+                'date_published': english_entry['date_published'] or french_entry.get('date_published', ''),
+                'date_close': english_entry['date_close'] or french_entry.get('date_close', ''),
+                'title_en': english_entry['title_en'],
+                'title_fr': french_entry.get('title_fr', ''),
+                'link_en': english_entry['link_en'],
+                'link_fr': french_entry['link_fr'],
+            }
+        )
+
+    french_only = [french_entry for french_entry in french_consultations if id(french_entry) not in paired]
+    for french_entry in french_only:
+        consultation_rows.append(
+            {
+                'date_published': french_entry['date_published'],
+                'date_close': french_entry['date_close'],
+                'title_en': '',
+                'title_fr': french_entry['title_fr'],
+                'link_en': '',
+                'link_fr': french_entry['link_fr'],
+            }
+        )
+
+    return consultation_rows, english_only, french_only
+
+
+def collect_gazette_consultations():
+    """Return the open Gazette consultations as bilingual rows with the GAZETTE_COLUMNS keys."""
+    english_consultations = fetch_gazette_consultations(gazette_consultations_en_url, 'en')
+    french_consultations = fetch_gazette_consultations(gazette_consultations_fr_url, 'fr')
+    consultation_rows, english_only, french_only = join_bilingual_consultations(
+        english_consultations, french_consultations
+    )
+
+    print(
+        f"Gazette consultations: {len(consultation_rows) - len(english_only) - len(french_only)} matched, "
+        f"{len(english_only)} English only, {len(french_only)} French only."
+    )
+    for entry in english_only:
+        print(f"  No French notice for {entry['link_en']}")
+    for entry in french_only:
+        print(f"  No English notice for {entry['link_fr']}")
+
+    return consultation_rows
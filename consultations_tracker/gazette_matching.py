@@ -0,0 +1,132 @@
+"""Match Canada Gazette consultations to the consultations registry.
+
+An inverted index maps every title token of the registry (English and French titles kept
+apart) to the rows that contain it, so each Gazette notice is only scored against the
+registry rows sharing one of its informative tokens instead of the whole registry. The
+score is an IDF-weighted Dice coefficient of the title tokens, taking the better of the
+English and French titles. A registry row whose profile or report link points at the
+notice itself is a match with confidence 1.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from consultations_tracker.gazette import notice_identifier
+
+MATCH_THRESHOLD = 0.6
+MATCH_COLUMNS = ['registration_number', 'match_confidence']
+
+# Tokens shared by more than this share of the registry do not select candidates; they still
+# count towards the score of the candidates found through rarer tokens.
+MAX_CANDIDATE_TOKEN_SHARE = 0.05
+
+STOPWORDS = {
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in', 'into', 'of', 'on', 'or', 'the',
+    'to', 'with', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les',
+    'par', 'pour', 'sur', 'un', 'une',
+}
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+LINK_COLUMNS = ['profile_page_en', 'profile_page_fr', 'report_link_en', 'report_link_fr']
+
+
+def title_tokens(title):
+    """Return the set of lowercase, accent-free title words that are not stopwords."""
+    if not isinstance(title, str):
+        return set()
+    text = unicodedata.normalize('NFKD', title.lower()).encode('ascii', 'ignore').decode('ascii')
+    return {token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS}
+
+
+class TitleIndex:
+    """Inverted index over the English and French titles of the registry rows."""
+
+    def __init__(self, registry):
+        self.registration_numbers = registry['registration_number'].tolist()
+        self.row_tokens = {
+            language: [title_tokens(title) for title in registry[f'title_{language}']]
+            for language in ('en', 'fr')
+        }
+        self.postings = {language: defaultdict(list) for language in ('en', 'fr')}
+        for language, rows in self.row_tokens.items():
+            for row, tokens in enumerate(rows):
+                for token in tokens:
+                    self.postings[language][token].append(row)
+
+        row_count = max(len(self.registration_numbers), 1)
+        self.max_postings = max(1, int(row_count * MAX_CANDIDATE_TOKEN_SHARE))
+        self.idf = {
+            language: {token: math.log(1 + row_count / len(rows)) for token, rows in postings.items()}
+            for language, postings in self.postings.items()
+        }
+        self.links = {}
+        for column in LINK_COLUMNS:
+            if column in registry.columns:
+                for row, link in enumerate(registry[column]):
+                    if not isinstance(link, str) or 'gazette.gc.ca' not in link:
+                        continue
+                    notice = notice_identifier(link.strip())
+                    if notice is not None:
+                        self.links.setdefault(notice, row)
+
+    def _weight(self, language, tokens):
+        # Tokens the registry never uses are as informative as its rarest ones.
+        idf = self.idf[language]
+        unseen = math.log(1 + len(self.registration_numbers))
+        return sum(idf.get(token, unseen) for token in tokens)
+
+    def candidates(self, titles):
+        """Return the rows sharing an informative token with one of the titles."""
+        rows = set()
+        for language, tokens in titles.items():
+            for token in tokens:
+                posting = self.postings[language].get(token, ())
+                if len(posting) <= self.max_postings:
+                    rows.update(posting)
+        return rows
+
+    def score(self, titles, row):
+        best = 0.0
+        for language, tokens in titles.items():
+            row_tokens = self.row_tokens[language][row]
+            total = self._weight(language, tokens) + self._weight(language, row_tokens)
+            if total:
+                best = max(best, 2 * self._weight(language, tokens & row_tokens) / total)
+        return best
+
+    def match(self, title_en, title_fr, links=()):
+        """Return (registration_number, confidence) of the best registry match, or (None, 0.0)."""
+        for link in links:
+            # Links that identify no notice are not in self.links, so they never match.
+            notice = notice_identifier(link) if isinstance(link, str) else None
+            if notice in self.links:
+                return self.registration_numbers[self.links[notice]], 1.0
+
+        titles = {'en': title_tokens(title_en), 'fr': title_tokens(title_fr)}
+        scores = Counter({row: self.score(titles, row) for row in self.candidates(titles)})
+        if not scores:
+            return None, 0.0
+        row, confidence = scores.most_common(1)[0]
+        return self.registration_numbers[row], round(confidence, 3)
+
+
+def match_gazette_consultations(gazette, registry):
+    """Return the Gazette table with the best matching registration_number and its match_confidence."""
+    index = TitleIndex(registry.drop_duplicates('registration_number').reset_index(drop=True))
+    matches = [
+        index.match(row.title_en, row.title_fr, (row.link_en, row.link_fr))
+        for row in gazette.itertuples(index=False)
+    ]
+    if not matches:
+        return gazette.reindex(columns=list(gazette.columns) + MATCH_COLUMNS)
+    registration_numbers, confidences = zip(*matches)
+    return gazette.assign(registration_number=registration_numbers, match_confidence=confidences)
+
+
+def unregistered_gazette_consultations(matched_gazette, threshold=MATCH_THRESHOLD):
+    """Return the Gazette consultations without a registry match of at least threshold confidence."""
+    confidence = pd.to_numeric(matched_gazette['match_confidence'], errors='coerce').fillna(0)
+    return matched_gazette[confidence < threshold]
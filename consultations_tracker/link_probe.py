@@ -0,0 +1,219 @@
+"""Concurrent liveness checks for the consultation profile and report links.
+
+Every distinct URL is probed once per run, concurrently: asyncio schedules the requests,
+each host gets its own pool of reusable http.client connections and a limit on concurrent
+requests, and the blocking requests run in a thread pool. A HEAD request is tried first
+and a GET is only sent when HEAD fails, with an error status or no answer at all, since
+some servers reject HEAD. Redirects are followed by hand so a redirect to a site's generic
+landing page can be reported.
+
+Results are cached on disk; a later run only probes the URLs whose cached result is older
+than the TTL. URLs that could not be reached at all are not cached. When none of the probed
+URLs, nor a few that answered before, can be reached, the network is assumed to be down
+and no link is reported.
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import ssl
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from consultations_tracker.download import USER_AGENT
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'link_probe.json')
+DEFAULT_TTL = 24 * 60 * 60
+MAX_REDIRECTS = 5
+GET_BODY_LIMIT = 64 * 1024
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+# Paths that only lead to a site's home page once '/', 'index' and extensions are stripped.
+LANDING_PAGE_PATHS = {'', 'en', 'fr', 'eng', 'fra', 'home', 'accueil', 'index', 'en/index', 'fr/index'}
+
+LinkCheck = namedtuple('LinkCheck', ['url', 'status', 'final_url', 'reason', 'checked_at'])
+
+
+def _landing_path(path):
+    path = path.strip('/').lower()
+    for suffix in ('.html', '.htm', '.aspx', '.php'):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    if path.endswith('/index') or path == 'index':
+        path = path[:-len('index')].rstrip('/') or 'index'
+    return path
+
+
+def is_landing_page_redirect(url, final_url):
+    """Return True when url redirected to the home page of a site while pointing somewhere deeper."""
+    original_path = _landing_path(urlsplit(url).path)
+    final_path = _landing_path(urlsplit(final_url).path)
+    return final_path in LANDING_PAGE_PATHS and original_path not in LANDING_PAGE_PATHS
+
+
+def link_reason(check):
+    """Return the bad-urls.csv explanation for a LinkCheck, or '' when the link works."""
+    if check.reason:
+        return check.reason
+    if check.status is not None and check.status >= 400:
+        return f"Link returns HTTP {check.status}"
+    if check.final_url and is_landing_page_redirect(check.url, check.final_url):
+        return "Link redirects to a generic landing page"
+    return ""
+
+
+def _blocking_request(connection, parts, method, timeout):
+    """Send one request on connection (a new one when None); return status, location and reusability."""
+    if connection is None:
+        if parts.scheme == 'https':
+            connection = http.client.HTTPSConnection(
+                parts.netloc, timeout=timeout, context=ssl.create_default_context()
+            )
+        else:
+            connection = http.client.HTTPConnection(parts.netloc, timeout=timeout)
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    connection.request(method, target, headers={'User-Agent': USER_AGENT, 'Accept': '*/*'})
+    response = connection.getresponse()
+    if method == 'GET':
+        response.read(GET_BODY_LIMIT)
+    else:
+        response.read()
+    reusable = response.isclosed() and not response.will_close
+    return connection, response.status, response.getheader('Location'), reusable
+
+
+class _HostPool:
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.idle = []
+
+
+class LinkProber:
+    def __init__(self, per_host_limit=4, max_concurrency=32, timeout=10):
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.pools = {}
+
+    def close(self):
+        for pool in self.pools.values():
+            for connection in pool.idle:
+                connection.close()
+        self.executor.shutdown(wait=False)
+
+    async def request(self, method, url):
+        """Send one request through the host's connection pool; return (status, location)."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc.lower())
+        pool = self.pools.setdefault(key, _HostPool(self.per_host_limit))
+        loop = asyncio.get_running_loop()
+        async with pool.semaphore:
+            connection = pool.idle.pop() if pool.idle else None
+            try:
+                connection, status, location, reusable = await loop.run_in_executor(
+                    self.executor, _blocking_request, connection, parts, method, self.timeout
+                )
+            except (OSError, http.client.HTTPException):
+                if connection is None:
+                    raise
+                # The pooled connection went stale; retry once on a fresh one.
+                connection.close()
+                connection, status, location, reusable = await loop.run_in_executor(
+                    self.executor, _blocking_request, None, parts, method, self.timeout
+                )
+            if reusable:
+                pool.idle.append(connection)
+            else:
+                connection.close()
+        return status, location
+
+    async def follow(self, method, url):
+        """Request url, following redirects; return (status, final_url) or (None, url) on a redirect loop."""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, location = await self.request(method, url)
+            if status not in REDIRECT_STATUSES or not location:
+                return status, url
+            url = urljoin(url, location)
+        return None, url
+
+    async def check(self, url):
+        checked_at = time.time()
+        try:
+            try:
+                status, final_url = await self.follow('HEAD', url)
+                head_failed = status is not None and status >= 400
+            except (OSError, http.client.HTTPException):
+                # Some servers drop HEAD requests instead of answering them.
+                head_failed = True
+            if head_failed:
+                status, final_url = await self.follow('GET', url)
+        except (OSError, http.client.HTTPException, ValueError, UnicodeError):
+            return LinkCheck(url, None, None, "Link could not be reached", checked_at)
+        if status is None:
+            return LinkCheck(url, None, final_url, "Link redirects too many times", checked_at)
+        return LinkCheck(url, status, final_url, "", checked_at)
+
+    async def check_all(self, urls):
+        return await asyncio.gather(*(self.check(url) for url in urls))
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            return {url: LinkCheck(**entry) for url, entry in json.load(file).items()}
+    except (FileNotFoundError, json.JSONDecodeError, TypeError):
+        return {}
+
+
+def _write_cache(cache_path, checks):
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as file:
+        json.dump({url: check._asdict() for url, check in sorted(checks.items())}, file, indent=1)
+
+
+def _check_links(urls, per_host_limit, max_concurrency, timeout):
+    if not urls:
+        return []
+    prober = LinkProber(per_host_limit, max_concurrency, timeout)
+    try:
+        return asyncio.run(prober.check_all(urls))
+    finally:
+        prober.close()
+
+
+def probe_links(urls, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, per_host_limit=4, max_concurrency=32, timeout=10):
+    """Return {url: reason} for the given URLs, with '' for links that work.
+
+    Only the URLs without a cached result younger than ttl seconds are probed.
+    """
+    urls = sorted(set(urls))
+    cached = _read_cache(cache_path)
+    now = time.time()
+    stale_urls = [url for url in urls if url not in cached or now - cached[url].checked_at > ttl]
+
+    started = time.perf_counter()
+    checks = _check_links(stale_urls, per_host_limit, max_concurrency, timeout)
+    reachable = [check for check in checks if check.status is not None or check.final_url]
+    print(
+        f"Probed {len(stale_urls)} of {len(urls)} links in {time.perf_counter() - started:.1f}s "
+        f"({len(reachable)} reachable, {len(urls) - len(stale_urls)} cached)."
+    )
+    if checks and not reachable:
+        # Nothing answered: re-probe a few links that worked before to tell dead links from
+        # a network outage.
+        canaries = [url for url, check in cached.items() if check.status is not None][:3]
+        canary_checks = _check_links(canaries, per_host_limit, max_concurrency, timeout)
+        if not any(check.status is not None for check in canary_checks):
+            print("No link could be reached; assuming the network is down and skipping link checks.")
+            checks = []
+
+    # Keep only the URLs still in use; unreachable results are reported but probed again next run.
+    cached = {url: cached[url] for url in urls if url in cached}
+    cached.update((check.url, check) for check in reachable)
+    _write_cache(cache_path, cached)
+    results = dict(cached)
+    results.update((check.url, check) for check in checks)
+    return {url: link_reason(results[url]) if url in results else "" for url in urls}
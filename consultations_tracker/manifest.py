@@ -0,0 +1,93 @@
+"""Content-addressed run manifest used to skip outputs whose inputs did not change.
+
+The manifest records a digest for every input of a run (downloads, the date window, the
+code that produced the outputs) and, for every output, the digest of the inputs it was
+built from together with the digests of the files it wrote. An output is only rebuilt when
+one of its inputs changed or one of its files was modified or removed since.
+"""
+
+import hashlib
+import json
+import os
+
+DEFAULT_MANIFEST_PATH = 'run_manifest.json'
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file, or None when it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def text_digest(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+class RunManifest:
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, force=False):
+        self.path = path
+        self.force = force
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                previous = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = {}
+        self.previous_inputs = previous.get('inputs', {})
+        self.outputs = previous.get('outputs', {})
+        self.inputs = {}
+
+    def add_input(self, name, digest):
+        """Record the digest of an input; None marks an input that could not be read."""
+        self.inputs[name] = digest
+
+    def add_input_file(self, name, path):
+        self.add_input(name, file_digest(path) if path else None)
+
+    def changed_inputs(self):
+        return sorted(name for name, digest in self.inputs.items() if digest != self.previous_inputs.get(name))
+
+    def _inputs_digest(self, input_names):
+        if any(self.inputs.get(name) is None for name in input_names):
+            return None
+        return text_digest(json.dumps({name: self.inputs[name] for name in sorted(input_names)}))
+
+    def is_stale(self, output, input_names):
+        """Return True when an output has to be rebuilt for the current inputs."""
+        recorded = self.outputs.get(output)
+        inputs_digest = self._inputs_digest(input_names)
+        if self.force or recorded is None or inputs_digest is None:
+            return True
+        if recorded.get('inputs_digest') != inputs_digest:
+            return True
+        return any(file_digest(path) != digest for path, digest in recorded.get('files', {}).items())
+
+    def record(self, output, input_names, paths):
+        """Record that an output was rebuilt from the current inputs and wrote the given files."""
+        self.outputs[output] = {
+            'inputs_digest': self._inputs_digest(input_names),
+            'files': {path: file_digest(path) for path in paths},
+        }
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump({'inputs': self.inputs, 'outputs': self.outputs}, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+
+def report_no_change(message):
+    """Print a no-change status and expose it to GitHub Actions as the 'changed' step output."""
+    print(f"No change: {message}")
+    set_github_output('changed', 'false')
+
+
+def set_github_output(name, value):
+    github_output = os.environ.get('GITHUB_OUTPUT')
+    if github_output:
+        with open(github_output, 'a', encoding='utf-8') as file:
+            file.write(f'{name}={value}\n')
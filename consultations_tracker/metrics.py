@@ -0,0 +1,250 @@
+"""Per-stage timing and memory metrics for the report and Upptime sync runs.
+
+Each named stage records its wall and CPU time, the process peak RSS when it ended, the
+rows it handled and the bytes it downloaded and wrote. The run is written to
+run_metrics.json (one entry per script, so both scripts can share the file) and, when
+RUN_METRICS_HISTORY names a file, appended to it as one compact JSON line for charting.
+A run that raises is written too, with the outcome 'failed' and the stages it finished.
+
+RUN_PROFILE turns on deeper capture for every stage: 'cprofile' saves a cProfile dump per
+stage under profiles/ and lists the slowest functions in the run metrics, 'tracemalloc'
+records each stage's traced peak and the allocation sites holding the most memory
+when it ends. 'all' turns on both.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from consultations_tracker import download
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+DEFAULT_METRICS_PATH = 'run_metrics.json'
+PROFILE_DIR = 'profiles'
+PROFILE_ENV = 'RUN_PROFILE'
+HISTORY_ENV = 'RUN_METRICS_HISTORY'
+PROFILE_TOP_FUNCTIONS = 15
+TRACEMALLOC_TOP_LINES = 10
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of the process so far, or None when unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+def path_size(path):
+    """Return the size of a file or the total size of a directory's files; 0 when missing."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        size += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+    return size
+
+
+def profile_modes(value=None):
+    """Return the set of deep capture modes requested through RUN_PROFILE."""
+    value = os.environ.get(PROFILE_ENV, '') if value is None else value
+    modes = {mode.strip().lower() for mode in value.split(',') if mode.strip()}
+    if 'all' in modes:
+        modes = {'cprofile', 'tracemalloc'}
+    return modes
+
+
+class StageMetrics:
+    """Measurements of one stage; the stage sets `rows` and reports the files it writes through `wrote`."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.bytes_downloaded = 0
+        self.bytes_written = 0
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_bytes = None
+        self.watched = []
+        self.details = {}
+
+    def wrote(self, *paths):
+        """Count the size of files (or whole directories) the stage wrote."""
+        self.bytes_written += sum(path_size(path) for path in paths)
+
+    def watch(self, *paths):
+        """Count how much the files or directories at paths grow until the stage ends, for
+        append-only outputs such as the change log store."""
+        self.watched.extend((path, path_size(path)) for path in paths)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'rows': self.rows,
+            'bytes_downloaded': self.bytes_downloaded,
+            'bytes_written': self.bytes_written,
+            **self.details,
+        }
+
+
+class RunMetrics:
+    def __init__(self, script, profile=None):
+        self.script = script
+        self.profile = profile_modes(profile)
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self.stages = []
+        self.outcome = None
+        self.downloaded_before = download.bytes_downloaded()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Measure the stage `name` for the duration of a with block, which gets its StageMetrics.
+
+        Such stages may run concurrently on several threads: their CPU time is that of their
+        own thread, while the bytes downloaded and, with tracemalloc, the traced peak cover
+        every stage running meanwhile.
+        """
+        stage = StageMetrics(name)
+        state = self._begin(time.thread_time)
+        try:
+            yield stage
+        finally:
+            self._end(stage, state)
+
+    def _begin(self, cpu_clock):
+        if 'tracemalloc' in self.profile:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+        profiler = cProfile.Profile() if 'cprofile' in self.profile else None
+        state = (profiler, download.bytes_downloaded(), time.perf_counter(), cpu_clock, cpu_clock())
+        if profiler is not None:
+            profiler.enable()
+        return state
+
+    def _end(self, stage, state):
+        profiler, downloaded_before, started, cpu_clock, started_cpu = state
+        if profiler is not None:
+            profiler.disable()
+        stage.wall_seconds = time.perf_counter() - started
+        stage.cpu_seconds = cpu_clock() - started_cpu
+        stage.peak_rss_bytes = peak_rss_bytes()
+        stage.bytes_downloaded += download.bytes_downloaded() - downloaded_before
+        stage.bytes_written += sum(max(0, path_size(path) - size) for path, size in stage.watched)
+        if profiler is not None:
+            stage.details['profile'] = self._save_profile(stage.name, profiler)
+        if tracemalloc.is_tracing():
+            stage.details.update(self._tracemalloc_details())
+        with self._lock:
+            self.stages.append(stage)
+
+    def _save_profile(self, name, profiler):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f'{self.script}.{name}.prof')
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+        return {'path': path, 'top_cumulative': report.getvalue().strip().splitlines()[-PROFILE_TOP_FUNCTIONS:]}
+
+    @staticmethod
+    def _tracemalloc_details():
+        _, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:TRACEMALLOC_TOP_LINES]
+        return {
+            'traced_peak_bytes': peak,
+            'top_live_allocations': [f'{statistic.traceback[0]}: {statistic.size} bytes' for statistic in top],
+        }
+
+    def as_dict(self):
+        return {
+            'script': self.script,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'outcome': self.outcome,
+            'wall_seconds': round(time.perf_counter() - self.started, 4),
+            'cpu_seconds': round(time.process_time() - self.started_cpu, 4),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'bytes_downloaded': download.bytes_downloaded() - self.downloaded_before,
+            'bytes_written': sum(stage.bytes_written for stage in self.stages),
+            'python': platform.python_version(),
+            'profile': sorted(self.profile),
+            'stages': [stage.as_dict() for stage in self.stages],
+        }
+
+    def write(self, outcome='completed', path=DEFAULT_METRICS_PATH, history_path=None):
+        """Write the run to path, replacing this script's previous run, and append it to the history.
+
+        history_path defaults to the RUN_METRICS_HISTORY environment variable; no history is
+        kept when neither is set.
+        """
+        self.outcome = outcome
+        run = self.as_dict()
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                runs = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            runs = {}
+        runs[self.script] = run
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(runs, file, indent=2, sort_keys=True)
+
+        history_path = history_path or os.environ.get(HISTORY_ENV)
+        if history_path:
+            os.makedirs(os.path.dirname(history_path) or '.', exist_ok=True)
+            with open(history_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(compact_run(run), separators=(',', ':')) + '\n')
+        print_run_metrics(run)
+        return run
+
+
+def compact_run(run):
+    """Return the history line of a run: totals plus [wall, cpu, peak RSS MiB, rows] per stage."""
+    return {
+        'script': run['script'],
+        'at': run['started_at'],
+        'outcome': run['outcome'],
+        'wall': run['wall_seconds'],
+        'cpu': run['cpu_seconds'],
+        'rss_mib': round((run['peak_rss_bytes'] or 0) / 2 ** 20, 1),
+        'down': run['bytes_downloaded'],
+        'written': run['bytes_written'],
+        'stages': {
+            stage['name']: [
+                round(stage['wall_seconds'], 3),
+                round(stage['cpu_seconds'], 3),
+                round((stage['peak_rss_bytes'] or 0) / 2 ** 20, 1),
+                stage['rows'],
+            ]
+            for stage in run['stages']
+        },
+    }
+
+
+def print_run_metrics(run):
+    print(f"\nRun metrics ({run['script']}, {run['outcome']}): {run['wall_seconds']:.2f}s wall, {run['cpu_seconds']:.2f}s CPU")
+    for stage in run['stages']:
+        rows = '' if stage['rows'] is None else f", {stage['rows']} rows"
+        print(
+            f"  {stage['name']:<22} {stage['wall_seconds']:>8.2f}s wall {stage['cpu_seconds']:>8.2f}s CPU "
+            f"{(stage['peak_rss_bytes'] or 0) / 2 ** 20:>7.1f} MiB peak{rows}"
+        )
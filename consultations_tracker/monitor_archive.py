@@ -0,0 +1,175 @@
+"""Archive and remove the Upptime files of sites that are no longer monitored.
+
+Upptime keeps ``history/<slug>.yml``, ``api/<slug>/`` and ``graphs/<slug>/`` for every
+site it ever monitored. A slug is orphaned when the URL in its history file is no longer in
+the sites list and Upptime has not checked it for PRUNE_GRACE_DAYS. Its final history,
+its summary entry and its uptime/response-time JSON are appended as one JSON line to a
+gzip archive (graphs are rendered from the same data and are not kept), its last-known
+status is added to a small CSV index, and the per-site files are removed.
+"""
+
+import gzip
+import json
+import os
+import shutil
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import yaml
+
+from consultations_tracker.upptime_sites import YamlLoader
+
+PRUNE_GRACE_DAYS = 7
+ARCHIVE_DIR = 'archive'
+ARCHIVE_NAME = 'monitors.jsonl.gz'
+INDEX_NAME = 'monitors_index.csv'
+INDEX_COLUMNS = [
+    'slug', 'name', 'url', 'status', 'code', 'response_time', 'uptime', 'start_time', 'last_updated', 'pruned_at'
+]
+
+OrphanedMonitor = namedtuple('OrphanedMonitor', ['slug', 'history'])
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _isoformat(value):
+    value = _as_datetime(value)
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def find_orphaned_monitors(site_urls, root='.', grace_days=PRUNE_GRACE_DAYS, now=None):
+    """Return the monitors whose URL is not in site_urls and that were last checked over grace_days ago."""
+    history_dir = os.path.join(root, 'history')
+    if not os.path.isdir(history_dir):
+        return []
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=grace_days)
+
+    orphans = []
+    for filename in sorted(os.listdir(history_dir)):
+        if not filename.endswith('.yml'):
+            continue
+        with open(os.path.join(history_dir, filename), 'r', encoding='utf8') as file:
+            history = yaml.load(file, Loader=YamlLoader) or {}
+        if history.get('url') in site_urls:
+            continue
+        last_updated = _as_datetime(history.get('lastUpdated'))
+        if isinstance(last_updated, datetime) and last_updated > cutoff:
+            continue
+        orphans.append(OrphanedMonitor(filename[:-len('.yml')], history))
+    return orphans
+
+
+def _read_api_badges(api_dir):
+    if not os.path.isdir(api_dir):
+        return {}
+    badges = {}
+    for filename in sorted(os.listdir(api_dir)):
+        if filename.endswith('.json'):
+            with open(os.path.join(api_dir, filename), 'r', encoding='utf8') as file:
+                badges[filename[:-len('.json')]] = json.load(file)
+    return badges
+
+
+def _read_summary(root):
+    try:
+        with open(os.path.join(root, 'history', 'summary.json'), 'r', encoding='utf8') as file:
+            return {entry.get('slug'): entry for entry in json.load(file)}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def prune_monitors(site_urls, root='.', grace_days=PRUNE_GRACE_DAYS, archive_dir=ARCHIVE_DIR, now=None):
+    """Archive and remove the files of orphaned monitors; return the OrphanedMonitors pruned.
+
+    Nothing is pruned when site_urls is empty, so a failed download cannot wipe the history.
+    """
+    if not site_urls:
+        return []
+    orphans = find_orphaned_monitors(site_urls, root, grace_days, now)
+    if not orphans:
+        return []
+
+    pruned_at = (now or datetime.now(timezone.utc)).isoformat(timespec='seconds')
+    summary = _read_summary(root)
+    records = []
+    index_rows = []
+    for orphan in orphans:
+        entry = summary.get(orphan.slug) or {}
+        records.append({
+            'slug': orphan.slug,
+            'pruned_at': pruned_at,
+            'history': orphan.history,
+            'summary': entry or None,
+            'api': _read_api_badges(os.path.join(root, 'api', orphan.slug)),
+        })
+        index_rows.append({
+            'slug': orphan.slug,
+            'name': entry.get('name'),
+            'url': orphan.history.get('url'),
+            'status': orphan.history.get('status'),
+            'code': orphan.history.get('code'),
+            'response_time': orphan.history.get('responseTime'),
+            'uptime': entry.get('uptime'),
+            'start_time': _isoformat(orphan.history.get('startTime')),
+            'last_updated': _isoformat(orphan.history.get('lastUpdated')),
+            'pruned_at': pruned_at,
+        })
+
+    # Each run appends one gzip member; gzip readers read concatenated members as one stream.
+    archive_dir = os.path.join(root, archive_dir)
+    os.makedirs(archive_dir, exist_ok=True)
+    with gzip.open(os.path.join(archive_dir, ARCHIVE_NAME), 'at', encoding='utf8') as file:
+        for record in records:
+            file.write(json.dumps(record, default=_json_default, ensure_ascii=False, sort_keys=True) + '\n')
+
+    index_path = os.path.join(archive_dir, INDEX_NAME)
+    index = pd.DataFrame(index_rows, columns=INDEX_COLUMNS)
+    if os.path.exists(index_path):
+        previous = pd.read_csv(index_path, dtype=str)
+        index = pd.concat([previous[~previous['slug'].isin(index['slug'])], index], ignore_index=True)
+    index.sort_values('slug').to_csv(index_path, index=False)
+
+    for orphan in orphans:
+        history_path = os.path.join(root, 'history', f'{orphan.slug}.yml')
+        if os.path.exists(history_path):
+            os.remove(history_path)
+        for directory in ('api', 'graphs'):
+            shutil.rmtree(os.path.join(root, directory, orphan.slug), ignore_errors=True)
+    return orphans
+
+
+def read_archived_monitor(slug, root='.', archive_dir=ARCHIVE_DIR):
+    """Return the latest archived record of a pruned monitor, or None."""
+    record = None
+    path = os.path.join(root, archive_dir, ARCHIVE_NAME)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt', encoding='utf8') as file:
+        for line in file:
+            if f'"slug": "{slug}"' in line:
+                candidate = json.loads(line)
+                if candidate['slug'] == slug:
+                    record = candidate
+    return record
+
+
+def print_pruned_monitors(orphans):
+    if not orphans:
+        print("No stale Upptime monitors to prune.")
+        return
+    print(f"Archived and removed {len(orphans)} stale Upptime monitors:")
+    for orphan in orphans:
+        print(f"  {orphan.slug} <{orphan.history.get('url')}>")
@@ -0,0 +1,106 @@
+"""In-process dependency graph runner for the report and Upptime sync steps.
+
+A run is a list of Steps. Each step names the steps whose results it needs; it is called
+with its StageMetrics and those results, as keyword arguments, as soon as they are all
+available, and its result is kept in memory for the steps that need it. Every input is
+therefore downloaded and parsed once, however many steps use it, and steps whose needs are
+met run concurrently on a thread pool: the Gazette matching, the report tables, the bad
+URL scan and its link probes and the Upptime sites update overlap instead of running one
+after the other. Downloads, link probes and file writes release the GIL; the pandas steps
+overlap where pandas does.
+
+run_all() runs the report and the Upptime sync as one graph, from a single download of the
+registry, so one invocation produces every artifact of both workflows.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from consultations_tracker.metrics import RunMetrics
+
+DEFAULT_WORKERS = 4
+WORKERS_ENV = 'PIPELINE_WORKERS'
+
+
+class Step:
+    """A named step of a run: run(stage, **results of needs) returns the step's result."""
+
+    def __init__(self, name, run, needs=()):
+        self.name = name
+        self.run = run
+        self.needs = list(needs)
+
+
+def required_steps(steps, targets=None):
+    """Return the names of the steps targets need, themselves included, in declaration order."""
+    required = set()
+    todo = list(steps if targets is None else targets)
+    while todo:
+        name = todo.pop()
+        if name in required:
+            continue
+        if name not in steps:
+            raise ValueError(f"Unknown pipeline step: {name}")
+        required.add(name)
+        todo.extend(steps[name].needs)
+    return [name for name in steps if name in required]
+
+
+def run_steps(steps, metrics, targets=None, max_workers=None):
+    """Run the steps targets need (every step by default), each once; return {name: result}.
+
+    A step starts as soon as the steps it needs are done. When a step fails, no other step
+    is started, the running ones are waited for and the error is raised. With RUN_PROFILE
+    the steps run one at a time, so each profile and traced peak covers a single step.
+    """
+    steps = {step.name: step for step in steps}
+    pending = required_steps(steps, targets)
+    max_workers = max_workers or int(os.environ.get(WORKERS_ENV, DEFAULT_WORKERS))
+    if metrics.profile:
+        max_workers = 1
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            for name in [name for name in pending if all(need in results for need in steps[name].needs)]:
+                pending.remove(name)
+                step = steps[name]
+                needs = {need: results[need] for need in step.needs}
+                running[executor.submit(_run_step, step, metrics, needs)] = name
+            if not running:
+                raise ValueError(f"Pipeline steps with circular needs: {', '.join(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def _run_step(step, metrics, needs):
+    with metrics.stage(step.name) as stage:
+        return step.run(stage, **needs)
+
+
+def run_all(force=False, config_path='.upptimerc.yml', probe=True):
+    """Rebuild the report outputs, bad-urls.csv and the Upptime sites in one run; return
+    whether any report output was rebuilt.
+
+    The registry is downloaded once, from the CKAN datastore dump the report uses; the
+    Upptime steps use it without the datastore '_id' column, which is what the
+    consultations.csv download holds.
+    """
+    # report and upptime_sync build their steps with this module's Step.
+    from consultations_tracker.report import report_steps
+    from consultations_tracker.upptime_sync import upptime_steps
+
+    metrics = RunMetrics('all')
+    steps = report_steps(force=force, shared_registry=True) + upptime_steps(
+        config_path, probe=probe, consultations_from='registry',
+    )
+    outcome = 'failed'
+    try:
+        changed = run_steps(steps, metrics)['write_pages']
+        outcome = 'completed' if changed else 'unchanged'
+    finally:
+        # A failed run is recorded too, with the steps it finished.
+        metrics.write(outcome)
+    return changed
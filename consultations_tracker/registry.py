@@ -0,0 +1,85 @@
+"""Typed loader for the consultations registry CSV.
+
+The CKAN datastore dump and the consultations.csv download share one schema. Each caller
+reads only the columns it needs: status and the organization columns become categoricals,
+and the start and end dates are parsed once, with an explicit ISO format. Rows that are
+fingerprinted for the change log or written back out (bad-urls.csv) are read as published
+text instead, so their values do not depend on type inference.
+
+REGISTRY_CSV_ENGINE=pyarrow reads the CSV with the multithreaded Arrow parser when pyarrow
+is installed.
+"""
+
+import importlib.util
+import os
+
+import pandas as pd
+
+REGISTRY_COLUMNS = [
+    '_id', 'registration_number', 'partner_departments', 'subjects', 'title_en', 'title_fr',
+    'description_en', 'description_fr', 'start_date', 'end_date', 'status', 'profile_page_en',
+    'profile_page_fr', 'report_available_online', 'report_link_en', 'report_link_fr', 'owner_org',
+    'owner_org_title',
+]
+CATEGORY_COLUMNS = ['status', 'owner_org', 'owner_org_title']
+DATE_COLUMNS = ['start_date', 'end_date']
+DATE_FORMAT = 'ISO8601'
+
+# Columns read by each consumer of the registry.
+REPORT_COLUMNS = ['registration_number', 'title_en', 'start_date', 'end_date', 'status', 'owner_org']
+GAZETTE_MATCH_COLUMNS = [
+    'registration_number', 'title_en', 'title_fr', 'profile_page_en', 'profile_page_fr',
+    'report_link_en', 'report_link_fr',
+]
+UPPTIME_SERIES_COLUMNS = ['profile_page_en', 'owner_org']
+
+ENGINE_ENV = 'REGISTRY_CSV_ENGINE'
+
+
+def csv_engine(engine=None):
+    """Return the read_csv engine: the one asked for, or REGISTRY_CSV_ENGINE, or 'c'."""
+    engine = engine or os.environ.get(ENGINE_ENV) or 'c'
+    if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+        return 'c'
+    return engine
+
+
+def parse_dates(column):
+    """Parse ISO dates; values that are not dates become NaT."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    return pd.to_datetime(column, format=DATE_FORMAT, errors='coerce')
+
+
+def apply_schema(frame, dates=True):
+    """Return the frame with categorical status/organization columns and, with dates, parsed dates."""
+    frame = frame.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in frame.columns and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype('category')
+    if dates:
+        for column in DATE_COLUMNS:
+            if column in frame.columns:
+                frame[column] = parse_dates(frame[column])
+    return frame
+
+
+def read_registry(path, columns=None, text=False, dates=True, engine=None):
+    """Read the registry CSV at path.
+
+    columns limits the read to those columns (the ones the file does not have are skipped).
+    With text every value is read as published text, missing values staying missing;
+    otherwise the schema is applied, with the dates left as text unless dates is True.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in header if columns is None or column in columns]
+    if text:
+        dtype = str
+    else:
+        dtype = {column: ('category' if column in CATEGORY_COLUMNS else str) for column in usecols}
+    frame = pd.read_csv(path, usecols=usecols, dtype=dtype, engine=csv_engine(engine))
+    if not text and dates:
+        for column in DATE_COLUMNS:
+            if column in frame.columns:
+                frame[column] = parse_dates(frame[column])
+    return frame
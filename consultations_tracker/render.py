@@ -0,0 +1,408 @@
+"""Shared page layout for the generated HTML reports.
+
+Every page uses the same head, header, side navigation and footer, so the layout is
+compiled once as a string.Template and each page only supplies its own sections. Pages
+are written only when their bytes change. The time a page was generated is kept out of the
+page itself, in report_metadata.json, which the page loads when it is viewed; an unchanged
+report therefore produces a byte-identical page and no commit.
+"""
+
+import json
+import os
+from string import Template
+
+SITE_URL = 'https://patlittle.github.io/Consultations-Tracker/'
+DEFAULT_METADATA_PATH = 'report_metadata.json'
+
+# Side navigation entries; relative hrefs are pages of this site.
+NAV_LINKS = [
+    ('report.html', 'Consultations Tracker Report'),
+    ('url_errors.html', 'URL Errors Report'),
+    ('changelog.html', 'Change Log Report'),
+    ('consultations_dataset.html', 'Consultations Data View'),
+    ('https://open.canada.ca/data/en/dataset/7c03f039-3753-4093-af60-74b0f7b2385d', 'Source Open Data Set'),
+    ('https://www.canada.ca/en/government/system/consultations/consultingcanadians.html', 'Consulting with Canadians'),
+]
+
+LAYOUT_STYLES = """
+      .page-layout {
+        display: grid;
+        gap: 2rem;
+      }
+
+      @media (min-width: 64em) {
+        .page-layout {
+          grid-template-columns: minmax(220px, 280px) 1fr;
+        }
+      }
+
+      .side-nav {
+        position: sticky;
+        top: 2rem;
+        align-self: start;
+      }
+
+      .page-content > section + section {
+        margin-block-start: 2rem;
+      }
+"""
+
+TABLE_STYLES = """
+      .table-wrapper {
+        overflow-x: auto;
+        margin-block: 1.5rem;
+      }
+
+      table {
+        width: 100%;
+        border-collapse: collapse;
+        min-width: 640px;
+      }
+
+      th,
+      td {
+        padding: 0.75rem;
+        border: 1px solid #d6d6d6;
+        text-align: left;
+      }
+
+      th {
+        background-color: #26374a;
+        color: #ffffff;
+      }
+
+      tr:nth-child(even) {
+        background-color: #f5f5f5;
+      }
+
+      .table-of-contents {
+        margin-block-start: 2rem;
+      }
+
+      .table-of-contents ul {
+        margin: 0;
+        padding-inline-start: 1.25rem;
+      }
+
+      .table-of-contents li {
+        margin-block-end: 0.75rem;
+      }
+"""
+
+VIEWER_STYLES = """
+      .shard-viewer {
+        margin-block-start: 2rem;
+      }
+
+      .shard-viewer-body {
+        height: 70vh;
+        overflow: auto;
+        position: relative;
+        box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
+      }
+
+      .shard-viewer-row {
+        display: grid;
+        height: 2.25rem;
+        min-width: max-content;
+      }
+
+      .shard-viewer-row > div {
+        width: 12rem;
+        padding: 0.5rem 0.75rem;
+        overflow: hidden;
+        white-space: nowrap;
+        text-overflow: ellipsis;
+        border-bottom: 1px solid #d6d6d6;
+      }
+
+      .shard-viewer-head {
+        position: sticky;
+        top: 0;
+        z-index: 1;
+        background-color: #26374a;
+        color: #ffffff;
+        font-weight: bold;
+      }
+
+      .shard-viewer-rows {
+        position: absolute;
+        left: 0;
+        background: #ffffff;
+      }
+"""
+
+# Virtualized table over the JSON page shards written by consultations_tracker.shards: only
+# the rows in view are in the DOM, and only the pages holding them are downloaded.
+VIEWER_SCRIPT = """
+    <script>
+      document.querySelectorAll("[data-shard-viewer]").forEach(async (viewer) => {
+        const base = viewer.getAttribute("data-shard-viewer");
+        const body = viewer.querySelector(".shard-viewer-body");
+        const head = viewer.querySelector(".shard-viewer-head");
+        const spacer = viewer.querySelector(".shard-viewer-spacer");
+        const rows = viewer.querySelector(".shard-viewer-rows");
+        const status = viewer.querySelector("[data-shard-viewer-status]");
+        const manifest = await fetch(base + "manifest.json", { cache: "no-cache" }).then((r) => r.json());
+        const pages = new Map();
+        const loadPage = (number) => {
+          if (!pages.has(number)) {
+            pages.set(number, fetch(base + manifest.pages[number], { cache: "no-cache" }).then((r) => r.json()));
+          }
+          return pages.get(number);
+        };
+        const cell = (value) => {
+          const element = document.createElement("div");
+          element.textContent = value ?? "";
+          element.title = value ?? "";
+          return element;
+        };
+
+        const columns = "repeat(" + manifest.columns.length + ", 12rem)";
+        head.style.gridTemplateColumns = columns;
+        head.replaceChildren(...manifest.columns.map(cell));
+        const rowHeight = head.getBoundingClientRect().height;
+        spacer.style.height = manifest.row_count * rowHeight + "px";
+        status.textContent = manifest.row_count + " rows";
+
+        let renderId = 0;
+        const render = async () => {
+          const id = ++renderId;
+          const first = Math.max(0, Math.floor(body.scrollTop / rowHeight) - 5);
+          const last = Math.min(manifest.row_count, first + Math.ceil(body.clientHeight / rowHeight) + 10);
+          const indexes = [];
+          for (let position = first; position < last; position++) {
+            indexes.push(manifest.reverse ? manifest.row_count - 1 - position : position);
+          }
+          const pageNumbers = [...new Set(indexes.map((index) => Math.floor(index / manifest.page_size)))];
+          const loaded = new Map(await Promise.all(pageNumbers.map(async (n) => [n, await loadPage(n)])));
+          if (id !== renderId) {
+            return;
+          }
+          rows.style.top = head.offsetHeight + first * rowHeight + "px";
+          rows.replaceChildren(
+            ...indexes.map((index) => {
+              const row = document.createElement("div");
+              row.className = "shard-viewer-row";
+              row.style.gridTemplateColumns = columns;
+              const values = loaded.get(Math.floor(index / manifest.page_size))[index % manifest.page_size];
+              row.replaceChildren(...values.map(cell));
+              return row;
+            })
+          );
+        };
+        body.addEventListener("scroll", () => requestAnimationFrame(render), { passive: true });
+        render();
+      });
+    </script>
+"""
+
+SORTABLE_TABLE_STYLES = """
+      .sortable-table th button {
+        font: inherit;
+        color: inherit;
+        text-align: inherit;
+        background: none;
+        border: 0;
+        padding: 0;
+        cursor: pointer;
+      }
+
+      .sortable-table th[aria-sort="ascending"] button::after {
+        content: " \\25B2";
+      }
+
+      .sortable-table th[aria-sort="descending"] button::after {
+        content: " \\25BC";
+      }
+"""
+
+# Tables with the sortable-table class sort by a column when its heading is clicked, as
+# numbers when both cells are numbers and as text otherwise; a second click reverses it.
+SORTABLE_TABLE_SCRIPT = """
+    <script>
+      document.querySelectorAll("table.sortable-table").forEach((table) => {
+        const headers = [...table.querySelectorAll("thead th")];
+        const body = table.tBodies[0];
+        headers.forEach((header, column) => {
+          const button = document.createElement("button");
+          button.type = "button";
+          button.textContent = header.textContent;
+          header.replaceChildren(button);
+          button.addEventListener("click", () => {
+            const ascending = header.getAttribute("aria-sort") !== "ascending";
+            headers.forEach((other) => other.removeAttribute("aria-sort"));
+            header.setAttribute("aria-sort", ascending ? "ascending" : "descending");
+            const cell = (row) => row.cells[column].textContent.trim();
+            const compare = (a, b) => {
+              const x = cell(a);
+              const y = cell(b);
+              const numeric = x !== "" && y !== "" && !isNaN(x) && !isNaN(y);
+              return numeric ? x - y : x.localeCompare(y);
+            };
+            body.append(...[...body.rows].sort((a, b) => (ascending ? compare(a, b) : compare(b, a))));
+          });
+        });
+      });
+    </script>
+"""
+
+PAGE_LAYOUT = Template("""<!DOCTYPE html>
+<html dir="ltr" lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <meta
+      name="description"
+      content="$description"
+    />
+    <title>$title</title>
+    <link
+      rel="stylesheet"
+      href="https://cdn.design-system.alpha.canada.ca/@gcds-core/css-shortcuts@1.0.1/dist/gcds-css-shortcuts.min.css"
+    />
+    <link
+      rel="stylesheet"
+      href="https://cdn.design-system.alpha.canada.ca/@cdssnc/gcds-components@0.43.1/dist/gcds/gcds.css"
+    />
+    <script
+      type="module"
+      src="https://cdn.design-system.alpha.canada.ca/@cdssnc/gcds-components@0.43.1/dist/gcds/gcds.esm.js"
+    ></script>
+    <style>$styles    </style>
+  </head>
+  <body>
+    <gcds-header
+      lang-href="$page_url"
+      skip-to-href="#main-content"
+    >
+      <gcds-breadcrumbs slot="breadcrumb">
+        <gcds-breadcrumbs-item href="$site_url">
+          Consultations Tracker
+        </gcds-breadcrumbs-item>
+        <gcds-breadcrumbs-item href="$page_url">
+          $breadcrumb
+        </gcds-breadcrumbs-item>
+      </gcds-breadcrumbs>
+    </gcds-header>
+    <gcds-container
+      id="main-content"
+      main-container
+      size="xl"
+      centered
+      tag="main"
+    >
+      <div class="page-layout">
+        <aside class="side-nav" aria-label="Consultations Tracker navigation">
+          <gcds-side-nav label="Consultations Tracker navigation">
+$nav_links
+          </gcds-side-nav>
+        </aside>
+        <div class="page-content">
+          <section>
+            <gcds-heading tag="h1">$title</gcds-heading>
+            <gcds-notice type="success" notice-title-tag="h2" notice-title="Report Generated">
+              <gcds-text data-generated-datetime></gcds-text>
+            </gcds-notice>
+          </section>
+$content
+          <gcds-date-modified data-generated-date></gcds-date-modified>
+        </div>
+      </div>
+    </gcds-container>
+    <gcds-footer display="simple"></gcds-footer>
+    <script>
+      fetch("$metadata_path", { cache: "no-cache" })
+        .then((response) => response.json())
+        .then((metadata) => {
+          const generated = metadata.pages["$page"];
+          if (!generated) {
+            return;
+          }
+          document.querySelectorAll("[data-generated-datetime]").forEach((element) => {
+            element.textContent = generated;
+          });
+          document.querySelectorAll("[data-generated-date]").forEach((element) => {
+            element.textContent = generated.slice(0, 10);
+          });
+        })
+        .catch(() => {});
+    </script>
+$scripts  </body>
+</html>
+""")
+
+
+def _nav_links(page):
+    links = []
+    for href, label in NAV_LINKS:
+        current = ' current' if href == page else ''
+        url = href if '://' in href else SITE_URL + href
+        links.append(f"""            <gcds-nav-link href="{url}"{current}>
+              {label}
+            </gcds-nav-link>""")
+    return '\n'.join(links)
+
+
+def render_page(page, title, description, breadcrumb, content, styles=(), scripts=()):
+    """Return the HTML of a site page: the shared layout around the page's own sections.
+
+    `page` is the page's file name, used for its URL, its side navigation entry and its
+    entry in the metadata file. `styles` and `scripts` are extra blocks such as
+    TABLE_STYLES or VIEWER_SCRIPT.
+    """
+    return PAGE_LAYOUT.substitute(
+        page=page,
+        page_url=SITE_URL + page,
+        site_url=SITE_URL,
+        metadata_path=DEFAULT_METADATA_PATH,
+        title=title,
+        description=description,
+        breadcrumb=breadcrumb,
+        styles=''.join((LAYOUT_STYLES,) + tuple(styles)),
+        nav_links=_nav_links(page),
+        content=content,
+        scripts=''.join(scripts),
+    )
+
+
+def viewer_section(shards_url, title, full_table_url):
+    """Return a virtualized table over the JSON page shards in shards_url, with a link to the full table."""
+    return f"""          <section class="shard-viewer" data-shard-viewer="{shards_url}" aria-label="{title}">
+            <gcds-text data-shard-viewer-status></gcds-text>
+            <div class="shard-viewer-body" tabindex="0">
+              <div class="shard-viewer-row shard-viewer-head"></div>
+              <div class="shard-viewer-spacer"></div>
+              <div class="shard-viewer-rows"></div>
+            </div>
+            <gcds-text>
+              <gcds-link href="{full_table_url}">Open the full table, including descriptions</gcds-link>
+            </gcds-text>
+          </section>"""
+
+
+def write_if_changed(path, content):
+    """Write content to path unless the file already holds exactly these bytes; return True if written."""
+    data = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as file:
+            if file.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as file:
+        file.write(data)
+    return True
+
+
+def update_page_metadata(pages, generated_datetime, path=DEFAULT_METADATA_PATH):
+    """Record generated_datetime as the generation time of the given pages in the metadata file."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            metadata = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        metadata = {}
+    metadata.setdefault('pages', {})
+    for page in pages:
+        metadata['pages'][os.path.basename(page)] = generated_datetime
+    return write_if_changed(path, json.dumps(metadata, indent=2, sort_keys=True) + '\n')
@@ -0,0 +1,645 @@
+"""Report CSVs, change log and HTML pages (the ``report`` subcommand).
+
+run_report downloads the CKAN dump and the Gazette pages, works out from the run manifest
+which outputs are out of date and rebuilds only those. report_steps declares the run as a
+graph of pipeline steps, so the change log, the report tables, the Gazette matching and the
+Upptime department rollups run concurrently on one copy of the registry. The functions the steps are made of take and
+return data frames, so they can be run on their own without any download.
+"""
+
+import glob
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from consultations_tracker.changelog_store import ChangeLogStore
+from consultations_tracker.departments import ROLLUPS_CSV, DepartmentRollups
+from consultations_tracker.download import fetch_all
+from consultations_tracker.fingerprint import HASH_SCHEME, fingerprint_rows, migrate_change_log_hashes
+from consultations_tracker.gazette import (
+    GAZETTE_COLUMNS,
+    collect_gazette_consultations,
+    fetch_gazette_page,
+    gazette_consultations_en_url,
+    gazette_consultations_fr_url,
+)
+from consultations_tracker.gazette_matching import (
+    MATCH_THRESHOLD,
+    match_gazette_consultations,
+    unregistered_gazette_consultations,
+)
+from consultations_tracker.manifest import RunManifest, file_digest, report_no_change, set_github_output, text_digest
+from consultations_tracker.metrics import RunMetrics
+from consultations_tracker.pipeline import Step, run_steps
+from consultations_tracker.registry import (
+    GAZETTE_MATCH_COLUMNS,
+    REPORT_COLUMNS,
+    UPPTIME_SERIES_COLUMNS,
+    apply_schema,
+    read_registry,
+)
+from consultations_tracker.render import (
+    SORTABLE_TABLE_SCRIPT,
+    SORTABLE_TABLE_STYLES,
+    TABLE_STYLES,
+    VIEWER_SCRIPT,
+    VIEWER_STYLES,
+    render_page,
+    update_page_metadata,
+    viewer_section,
+    write_if_changed,
+)
+from consultations_tracker.report_rules import REPORT_RULES, build_report_tables
+from consultations_tracker.shards import append_json_shards, read_shard_manifest, write_json_shards
+from consultations_tracker.upptime_series import (
+    DEPARTMENTS_CSV,
+    ROLLUP_DAYS,
+    UpptimeSeries,
+    department_rollups,
+    ingest_upptime,
+    least_available_departments,
+    slowest_departments,
+    upptime_digest,
+)
+
+# URL to the CSV file from the Government Open Data portal.
+csv_url = 'https://open.canada.ca/data/en/datastore/dump/92bec4b7-6feb-4215-a5f7-61da342b2354'  # Replace with the actual URL if necessary
+
+# JSON page shards read by the change log and URL errors viewers.
+CHANGE_LOG_SHARDS_DIR = 'views/changelog'
+URL_ERRORS_SHARDS_DIR = 'views/url_errors'
+
+# Outputs written by the report, with the inputs each one is built from and the files it writes.
+REPORT_OUTPUTS = {
+    'change_log': (
+        ['generator', 'ckan'],
+        ['consultations_chng_log.csv', 'changelog/latest_hash_index.csv', f'{CHANGE_LOG_SHARDS_DIR}/manifest.json'],
+    ),
+    'report_tables': (
+        ['generator', 'ckan', 'date_window'],
+        [f'{rule.name}.csv' for rule in REPORT_RULES],
+    ),
+    'gazette_table': (
+        ['generator', 'ckan', 'gazette_en', 'gazette_fr'],
+        ['gazette_consultations.csv', 'unregistered_gazette_consultations.csv'],
+    ),
+    'department_rollups': (['generator', 'ckan', 'date_window'], [ROLLUPS_CSV]),
+    'upptime_series': (['generator', 'ckan', 'upptime'], [DEPARTMENTS_CSV]),
+    # The page shows the Upptime rollups, not the raw history Upptime rewrites every few minutes.
+    'report_page': (
+        ['generator', 'ckan', 'gazette_en', 'gazette_fr', 'date_window', 'upptime_departments'], ['report.html'],
+    ),
+    'change_log_page': (['generator', 'ckan'], ['changelog.html']),
+    'url_errors_page': (['generator', 'bad_urls'], ['url_errors.html', f'{URL_ERRORS_SHARDS_DIR}/manifest.json']),
+}
+
+# The outputs whose rebuild may change the report page: its own, and the Upptime rollups it shows.
+PAGE_OUTPUTS = {'report_page', 'upptime_series'}
+
+# Registry columns used once the change log is recorded, and the outputs that read them.
+REGISTRY_VIEW_COLUMNS = list(dict.fromkeys(REPORT_COLUMNS + GAZETTE_MATCH_COLUMNS + UPPTIME_SERIES_COLUMNS))
+REGISTRY_OUTPUTS = {'change_log', 'report_tables', 'gazette_table', 'upptime_series', 'report_page'}
+
+
+def download_inputs():
+    """Download the CKAN dump and both Gazette pages concurrently; inputs that failed are None.
+
+    Every input is downloaded first, through the shared conditional-GET cache, so the run
+    manifest can tell which outputs are out of date before anything is recomputed.
+    """
+    downloads = fetch_all(
+        {
+            'ckan': csv_url,
+            'gazette_en': lambda: fetch_gazette_page(gazette_consultations_en_url),
+            'gazette_fr': lambda: fetch_gazette_page(gazette_consultations_fr_url),
+        }
+    )
+    for input_name, download in downloads.items():
+        if isinstance(download, Exception):
+            print(f"Could not download {input_name}: {download}")
+            downloads[input_name] = None
+    return downloads
+
+
+def report_window(today):
+    """Return the (start, end) dates of the five days around today."""
+    return today - timedelta(days=5), today + timedelta(days=5)
+
+
+def generator_digest():
+    """Return a digest of the package code, so a code change rebuilds every output."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(glob.glob(os.path.join(package_dir, '*.py')))
+    return text_digest(' '.join(file_digest(path) for path in paths))
+
+
+def build_run_manifest(downloads, today, force=False):
+    run_manifest = RunManifest(force=force)
+    run_manifest.add_input('generator', generator_digest())
+    for input_name, download in downloads.items():
+        run_manifest.add_input_file(input_name, download.path if download else None)
+    m5, p5 = report_window(today)
+    run_manifest.add_input('date_window', f'{m5:%Y-%m-%d}..{p5:%Y-%m-%d}')
+    run_manifest.add_input_file('bad_urls', 'bad-urls.csv')
+    run_manifest.add_input('upptime', upptime_digest())
+    run_manifest.add_input_file('upptime_departments', DEPARTMENTS_CSV)
+    return run_manifest
+
+
+def stale_report_outputs(run_manifest):
+    return {
+        output
+        for output, (input_names, _) in REPORT_OUTPUTS.items()
+        if run_manifest.is_stale(output, input_names)
+    }
+
+
+def load_registry(ckan_download, columns=None, text=False):
+    """Return the registry and whether it is a fresh copy from CKAN.
+
+    The change log needs every column as published text, so that the row fingerprints do
+    not depend on pandas type inference; the report alone only reads the typed columns it
+    uses. When CKAN is unreachable the cached copy is used and nothing new is recorded in
+    the change log.
+    """
+    if ckan_download is None:
+        return read_registry('consultations_chng_log.csv', columns, text), False
+    return read_registry(ckan_download.path, columns, text), ckan_download.status != 'stale'
+
+
+def change_log_snapshot(df, changed_at):
+    """Return the registry as change log rows: composite_key first, with the row hash and change time."""
+    # Fingerprint every row from its source columns in one batched pass and store it in the 'hash' column.
+    log_df = df.copy()
+    log_df['hash'] = fingerprint_rows(log_df)
+
+    # Add current datetime
+    log_df['row_chng_datetime'] = changed_at
+
+    # Create the 'composite_key' column
+    log_df['composite_key'] = log_df['owner_org'].astype(str) + "-" + log_df['registration_number'].astype(str)
+
+    # Move 'composite_key' to the first column position
+    cols = ['composite_key'] + [col for col in log_df.columns if col != 'composite_key']
+    return log_df[cols]
+
+
+def update_change_log(log_df, change_log_store=None):
+    """Record a snapshot in the change log store and its viewer shards; return the appended rows.
+
+    Only the small latest-hash index is read to find changed rows; the first run imports the
+    existing CSV log into the store.
+    """
+    change_log_store = change_log_store or ChangeLogStore()
+    newly_appended_rows = pd.DataFrame()
+    stored_hashes = change_log_store.latest_hashes()['hash']
+    store_is_current = (
+        change_log_store.exists()
+        and stored_hashes.str.startswith(f'{HASH_SCHEME}:').all()
+        and change_log_store.is_delta_encoded()
+    )
+    if not store_is_current and os.path.exists('consultations_chng_log.csv'):
+        existing_df = pd.read_csv('consultations_chng_log.csv', dtype=str)
+        change_log_store.import_history(migrate_change_log_hashes(existing_df))
+        print("Change log store rebuilt from consultations_chng_log.csv.")
+
+    if not change_log_store.exists():
+        log_df.to_csv('consultations_chng_log.csv', index=False)
+        change_log_store.import_history(log_df)
+        store_is_current = False
+        print("Log file created.")
+    else:
+        rows_to_append = change_log_store.record_snapshot(log_df)
+        if not rows_to_append.empty:
+            print(f"{len(rows_to_append)} new rows appended to consultations_chng_log.csv")
+            newly_appended_rows = rows_to_append
+        else:
+            print("No new rows to append.")
+
+    # Keep the change log viewer's page shards in step with the store: new rows only touch
+    # the last page, and the shards are rewritten in full when the store was (re)imported or
+    # predate the changed_fields column.
+    shard_manifest = read_shard_manifest(CHANGE_LOG_SHARDS_DIR)
+    if not store_is_current or shard_manifest is None or 'changed_fields' not in shard_manifest['columns']:
+        write_json_shards(change_log_store.read_history(), CHANGE_LOG_SHARDS_DIR, reverse=True)
+    elif not newly_appended_rows.empty:
+        append_json_shards(newly_appended_rows, CHANGE_LOG_SHARDS_DIR)
+    return newly_appended_rows
+
+
+def report_tables_for(df, today):
+    """Return {rule name: table} for the report rules.
+
+    1-5. Every consultation is classified against the report rules (consultations starting
+    or ending within five days of today, late or early closing and starting consultations
+    and the date consistency checks) in one pass.
+    """
+    return build_report_tables(apply_schema(df[REPORT_COLUMNS]), today)
+
+
+def load_gazette_consultations():
+    """Return the open Canada Gazette consultations, falling back to the last saved table."""
+    try:
+        return pd.DataFrame(collect_gazette_consultations(), columns=GAZETTE_COLUMNS)
+    except OSError:
+        try:
+            return pd.read_csv('gazette_consultations.csv', usecols=GAZETTE_COLUMNS)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=GAZETTE_COLUMNS)
+
+
+def gazette_tables(gazette_consultations_df, registry):
+    """Match every Gazette consultation to the registry through the title index; return the
+    matched table and the consultations without a confident match."""
+    gazette_consultations_df = match_gazette_consultations(gazette_consultations_df, registry)
+    return gazette_consultations_df, unregistered_gazette_consultations(gazette_consultations_df)
+
+
+def upptime_department_tables(rollups):
+    """Return the slowest and the least available departments as HTML tables."""
+    display_columns = {
+        'owner_org': 'Department',
+        'sites': 'Monitored sites',
+        'sites_down': 'Sites down',
+        'uptime_month': 'Uptime, 30 days (%)',
+        'p50_response_time': 'Median response time (ms)',
+        'p95_response_time': '95th percentile response time (ms)',
+        'checks': 'Checks',
+    }
+    return tuple(
+        table.rename(columns=display_columns).to_html(index=False, classes="data-table", border=0, na_rep='')
+        for table in (slowest_departments(rollups), least_available_departments(rollups))
+    )
+
+
+def render_report_page(report_tables, gazette_consultations_df, unregistered_gazette_df, today, department_rollups,
+                       upptime_rollups):
+    html_department_rollups = department_rollups.rename(columns={
+        'owner_org': 'Department',
+        'consultations': 'Consultations',
+        'open': 'Open',
+        'planned': 'Planned',
+        'closed': 'Closed',
+        'late_close': 'Late closing',
+        'early_close': 'Early closing',
+        'late_start': 'Late starting',
+        'median_length_days': 'Median length (days)',
+    }).to_html(index=False, classes="data-table sortable-table", border=0, na_rep='')
+    html_slowest_departments, html_least_available_departments = upptime_department_tables(upptime_rollups)
+    html_gazette_consultations = gazette_consultations_df.to_html(
+        index=False,
+        classes="data-table",
+        border=0,
+        render_links=True,
+    )
+    html_unregistered_gazette = unregistered_gazette_df.to_html(
+        index=False,
+        classes="data-table",
+        border=0,
+        render_links=True,
+    )
+
+    m5, p5 = report_window(today)
+    range_start_str = m5.strftime("%Y-%m-%d")
+    range_end_str = p5.strftime("%Y-%m-%d")
+
+    report_rule_titles = {
+        rule.name: rule.title.format(range_start=range_start_str, range_end=range_end_str) for rule in REPORT_RULES
+    }
+    report_rule_links = "\n".join(
+        f"""              <li class="mb-75">
+                <gcds-link href="#{rule.anchor}">
+                  {report_rule_titles[rule.name]}
+                </gcds-link>
+              </li>"""
+        for rule in REPORT_RULES
+    )
+    report_rule_sections = "\n".join(
+        f"""          <section id="{rule.anchor}">
+            <gcds-heading tag="h2">
+              {rule.emoji}{report_rule_titles[rule.name]}
+            </gcds-heading>
+            <div class="table-wrapper">
+              {report_tables[rule.name].to_html(index=False, classes="data-table", border=0)}
+            </div>
+          </section>"""
+        for rule in REPORT_RULES
+    )
+
+    return render_page(
+        'report.html',
+        title="Consultations Tracker Report",
+        description="Consultations Tracker report summarizing upcoming consultation activity.",
+        breadcrumb="Report",
+        styles=[TABLE_STYLES, SORTABLE_TABLE_STYLES],
+        scripts=[SORTABLE_TABLE_SCRIPT],
+        content=f"""          <section class="table-of-contents" aria-label="On this page">
+            <gcds-heading tag="h2">On this page</gcds-heading>
+            <ul class="list-disc mb-300">
+{report_rule_links}
+              <li class="mb-75">
+                <gcds-link href="#gazette-consultations">
+                  Open Canada Gazette Consultations
+                </gcds-link>
+              </li>
+              <li class="mb-75">
+                <gcds-link href="#unregistered-gazette-consultations">
+                  Unregistered Gazette Consultations
+                </gcds-link>
+              </li>
+              <li class="mb-75">
+                <gcds-link href="#departments">
+                  Consultations by Department
+                </gcds-link>
+              </li>
+              <li>
+                <gcds-link href="#upptime-departments">
+                  Slowest and Least Available Departments
+                </gcds-link>
+              </li>
+            </ul>
+          </section>
+{report_rule_sections}
+          <section id="gazette-consultations">
+            <gcds-heading tag="h2">
+              Open Canada Gazette Consultations
+            </gcds-heading>
+            <div class="table-wrapper">
+              {html_gazette_consultations}
+            </div>
+          </section>
+          <section id="unregistered-gazette-consultations">
+            <gcds-heading tag="h2">
+              Unregistered Gazette Consultations
+            </gcds-heading>
+            <gcds-text>
+              Open Canada Gazette consultations without a registry consultation whose title matches
+              with a confidence of at least {MATCH_THRESHOLD}.
+            </gcds-text>
+            <div class="table-wrapper">
+              {html_unregistered_gazette}
+            </div>
+          </section>
+          <section id="departments">
+            <gcds-heading tag="h2">
+              Consultations by Department
+            </gcds-heading>
+            <gcds-text>
+              Every consultation recorded in the change log, by department, with the late and early
+              counts of the report rules as of today. Select a column heading to sort the table.
+            </gcds-text>
+            <div class="table-wrapper">
+              {html_department_rollups}
+            </div>
+          </section>
+          <section id="upptime-departments">
+            <gcds-heading tag="h2">
+              Slowest and Least Available Departments
+            </gcds-heading>
+            <gcds-text>
+              Consultation pages monitored by Upptime, grouped by department, over the last
+              {ROLLUP_DAYS} days of checks. Response times are those of the checks that were up.
+            </gcds-text>
+            <gcds-heading tag="h3">Slowest departments</gcds-heading>
+            <div class="table-wrapper">
+              {html_slowest_departments}
+            </div>
+            <gcds-heading tag="h3">Least available departments</gcds-heading>
+            <div class="table-wrapper">
+              {html_least_available_departments}
+            </div>
+          </section>""",
+    )
+
+
+def render_change_log_page():
+    return render_page(
+        'changelog.html',
+        title="Consultations Change Log Report",
+        description="Change log view of consultation updates sourced from the Consultations Tracker.",
+        breadcrumb="Change Log Report",
+        styles=[VIEWER_STYLES],
+        scripts=[VIEWER_SCRIPT],
+        content=viewer_section(
+            f"{CHANGE_LOG_SHARDS_DIR}/",
+            "Consultations Tracker change log table",
+            "https://flatgithub.com/PatLittle/Consultations-Tracker/blob/master/consultations_chng_log.csv?filename=consultations_chng_log.csv&sort=row_chng_datetime%2Cdesc&stickyColumnName=row_chng_datetime",
+        ),
+    )
+
+
+def render_url_errors_page():
+    return render_page(
+        'url_errors.html',
+        title="Consultations URL Errors Report",
+        description="Report highlighting consultation URL errors sourced from the Consultations Tracker.",
+        breadcrumb="URL Errors Report",
+        styles=[VIEWER_STYLES],
+        scripts=[VIEWER_SCRIPT],
+        content=viewer_section(
+            f"{URL_ERRORS_SHARDS_DIR}/",
+            "Consultations Tracker URL errors table",
+            "https://flatgithub.com/PatLittle/Consultations-Tracker/blob/master/bad-urls.csv?filename=bad-urls.csv",
+        ),
+    )
+
+
+def report_steps(force=False, shared_registry=False):
+    """Return the pipeline steps of the report; write_pages returns whether anything was rebuilt.
+
+    The run manifest tells every step whether its outputs are out of date, so unchanged
+    outputs are skipped and the registry is only read when a step needs it. With
+    shared_registry the registry is always read in full, as text, for the Upptime steps of
+    the same run, and the URL errors page waits for their bad URL scan.
+    """
+    today = datetime.today().date()
+
+    def downloads(stage):
+        downloads = download_inputs()
+        stage.rows = sum(download is not None for download in downloads.values())
+        return downloads
+
+    def run_manifest(stage, downloads):
+        return build_run_manifest(downloads, today, force)
+
+    def stale_outputs(stage, run_manifest):
+        stale_outputs = stale_report_outputs(run_manifest)
+        if stale_outputs:
+            print(f"Changed inputs: {', '.join(run_manifest.changed_inputs()) or 'none'}")
+            print(f"Rebuilding: {', '.join(sorted(stale_outputs))}")
+        return stale_outputs
+
+    def registry(stage, downloads, stale_outputs):
+        # The change log hashes every column as published; the other outputs only read the
+        # report and Gazette matching columns.
+        if shared_registry or 'change_log' in stale_outputs:
+            registry = load_registry(downloads['ckan'], text=True)
+        elif stale_outputs & REGISTRY_OUTPUTS:
+            registry = load_registry(downloads['ckan'], REGISTRY_VIEW_COLUMNS)
+        else:
+            return None
+        stage.rows = len(registry[0])
+        return registry
+
+    def change_log(stage, registry, stale_outputs):
+        newly_appended_rows = pd.DataFrame()
+        if 'change_log' not in stale_outputs:
+            return newly_appended_rows
+        df, data_from_remote = registry
+        log_df = change_log_snapshot(df, datetime.now())
+        if data_from_remote:
+            change_log_store = ChangeLogStore()
+            stage.watch(change_log_store.root, 'consultations_chng_log.csv', CHANGE_LOG_SHARDS_DIR)
+            newly_appended_rows = update_change_log(log_df, change_log_store)
+        stage.rows = len(newly_appended_rows)
+
+        print("\nNewly appended rows (if any):")
+        print(newly_appended_rows)
+        print(f"\nTotal rows appended in this run: {len(newly_appended_rows)}")
+        return newly_appended_rows
+
+    def report_tables(stage, registry, stale_outputs):
+        if not stale_outputs & {'report_tables', *PAGE_OUTPUTS}:
+            return None
+        report_tables = report_tables_for(registry[0], today)
+        if 'report_tables' in stale_outputs:
+            for rule in REPORT_RULES:
+                report_tables[rule.name].to_csv(f"{rule.name}.csv", index=False)
+                stage.wrote(f"{rule.name}.csv")
+        stage.rows = sum(len(table) for table in report_tables.values())
+        return report_tables
+
+    # 6-7. Open Canada Gazette consultations, and the ones without a registry match.
+    def gazette(stage, registry, stale_outputs):
+        if not stale_outputs & {'gazette_table', *PAGE_OUTPUTS}:
+            return None
+        gazette_consultations_df, unregistered_gazette_df = gazette_tables(load_gazette_consultations(), registry[0])
+        if 'gazette_table' in stale_outputs:
+            gazette_consultations_df.to_csv("gazette_consultations.csv", index=False)
+            unregistered_gazette_df.to_csv("unregistered_gazette_consultations.csv", index=False)
+            stage.wrote("gazette_consultations.csv", "unregistered_gazette_consultations.csv")
+        stage.rows = len(gazette_consultations_df)
+        return gazette_consultations_df, unregistered_gazette_df
+
+    # Apply the rows appended to the change log to the department rollups.
+    def departments(stage, change_log, stale_outputs):
+        if not stale_outputs & {'department_rollups', *PAGE_OUTPUTS}:
+            return None
+        department_rollups = DepartmentRollups()
+        stage.watch(department_rollups.root)
+        department_rollups.update(change_log)
+        rollups = department_rollups.table(today)
+        if 'department_rollups' in stale_outputs:
+            rollups.to_csv(ROLLUPS_CSV, index=False)
+            stage.wrote(ROLLUPS_CSV)
+        stage.rows = len(rollups)
+        return rollups
+
+    # Add the new Upptime checks to the series and roll the recent ones up by department.
+    def upptime_series(stage, registry, stale_outputs, **sites):
+        if not stale_outputs & PAGE_OUTPUTS:
+            return None
+        series = UpptimeSeries()
+        if 'upptime_series' in stale_outputs:
+            stage.watch(series.root)
+            new_checks = ingest_upptime(registry[0])
+            print(f"{len(new_checks)} new Upptime checks added to {series.root}.")
+        rollups = department_rollups(series.recent())
+        if 'upptime_series' in stale_outputs:
+            rollups.to_csv(DEPARTMENTS_CSV, index=False)
+            stage.wrote(DEPARTMENTS_CSV)
+        stage.rows = len(rollups)
+        return rollups
+
+    # Create the HTML pages from the shared layout. upptime_departments.csv may have been
+    # rewritten by this run, so the report page checks its own inputs.
+    def report_page(stage, run_manifest, report_tables, gazette, departments, upptime_series):
+        run_manifest.add_input_file('upptime_departments', DEPARTMENTS_CSV)
+        if not run_manifest.is_stale('report_page', REPORT_OUTPUTS['report_page'][0]):
+            return None
+        return render_report_page(report_tables, *gazette, today, departments, upptime_series)
+
+    def change_log_page(stage, stale_outputs):
+        return render_change_log_page() if 'change_log_page' in stale_outputs else None
+
+    # bad-urls.csv may have been rewritten by this run, so the page checks its own inputs.
+    def url_errors_page(stage, run_manifest, **bad_urls):
+        run_manifest.add_input_file('bad_urls', 'bad-urls.csv')
+        if not run_manifest.is_stale('url_errors_page', REPORT_OUTPUTS['url_errors_page'][0]):
+            return None
+        bad_urls_df = pd.read_csv('bad-urls.csv', dtype=str)
+        write_json_shards(bad_urls_df, URL_ERRORS_SHARDS_DIR)
+        stage.rows = len(bad_urls_df)
+        stage.wrote(URL_ERRORS_SHARDS_DIR)
+        return render_url_errors_page()
+
+    # Write only the pages whose bytes changed. The generation time is not part of the
+    # pages; it goes into report_metadata.json for the pages whose content changed. The
+    # steps writing the other outputs are needed so they finish before those are recorded.
+    def write_pages(stage, run_manifest, stale_outputs, report_page, change_log_page, url_errors_page, **written):
+        rebuilt_outputs = stale_outputs - {'report_page', 'url_errors_page'}
+        if report_page is not None:
+            rebuilt_outputs.add('report_page')
+        if url_errors_page is not None:
+            rebuilt_outputs.add('url_errors_page')
+        if not rebuilt_outputs:
+            report_no_change(
+                "the CKAN dump, the Gazette pages, bad-urls.csv, the Upptime history and the date window "
+                "are unchanged since the last run."
+            )
+            return False
+
+        generated_datetime_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        pages = {'report.html': report_page, 'changelog.html': change_log_page, 'url_errors.html': url_errors_page}
+        changed_pages = [path for path, html in pages.items() if html is not None and write_if_changed(path, html)]
+        update_page_metadata(changed_pages, generated_datetime_str)
+        stage.rows = len(changed_pages)
+        stage.wrote(*changed_pages)
+        print(f"Pages written: {', '.join(changed_pages) or 'none'}")
+
+        # Record what this run rebuilt so the next run can skip unchanged outputs.
+        for output in sorted(rebuilt_outputs):
+            input_names, paths = REPORT_OUTPUTS[output]
+            run_manifest.record(output, input_names, paths)
+        run_manifest.save()
+        set_github_output('changed', 'true')
+        return True
+
+    return [
+        Step('downloads', downloads),
+        Step('run_manifest', run_manifest, ['downloads']),
+        Step('stale_outputs', stale_outputs, ['run_manifest']),
+        Step('registry', registry, ['downloads', 'stale_outputs']),
+        Step('change_log', change_log, ['registry', 'stale_outputs']),
+        Step('report_tables', report_tables, ['registry', 'stale_outputs']),
+        Step('gazette', gazette, ['registry', 'stale_outputs']),
+        Step('departments', departments, ['change_log', 'stale_outputs']),
+        # With the Upptime sync in the same run, the series joins the updated sites list and
+        # reads the history once the files of the sites no longer monitored are archived.
+        Step(
+            'upptime_series', upptime_series,
+            ['registry', 'stale_outputs'] + (['upptime_sites', 'prune_monitors'] if shared_registry else []),
+        ),
+        Step('report_page', report_page, ['run_manifest', 'report_tables', 'gazette', 'departments', 'upptime_series']),
+        Step('change_log_page', change_log_page, ['stale_outputs']),
+        Step('url_errors_page', url_errors_page, ['run_manifest'] + (['bad_urls'] if shared_registry else [])),
+        Step('write_pages', write_pages, [
+            'run_manifest', 'stale_outputs', 'report_page', 'change_log_page', 'url_errors_page',
+            'change_log', 'report_tables', 'gazette', 'departments', 'upptime_series',
+        ]),
+    ]
+
+
+def run_report(force=False):
+    """Rebuild the out-of-date report outputs; return False when nothing had to be rebuilt."""
+    # Time every step of the run; the measurements are written to run_metrics.json at the end.
+    metrics = RunMetrics('report')
+    outcome = 'failed'
+    try:
+        changed = run_steps(report_steps(force), metrics)['write_pages']
+        outcome = 'completed' if changed else 'unchanged'
+    finally:
+        # A failed run is recorded too, with the steps it finished.
+        metrics.write(outcome)
+    return changed
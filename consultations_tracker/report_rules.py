@@ -0,0 +1,112 @@
+"""Declarative consistency rules for the consultations report.
+
+Each report table is a ReportRule: a predicate over the consultation status and its start
+and end dates relative to today. classify_consultations evaluates every rule in one pass
+over native datetime64 arrays and returns a bitmask per row (bit i set when REPORT_RULES[i]
+matches), so adding a new check is one more entry in REPORT_RULES.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from consultations_tracker.registry import parse_dates
+
+# title is formatted with range_start and range_end; emoji prefixes the section heading.
+ReportRule = namedtuple('ReportRule', ['name', 'anchor', 'title', 'emoji', 'sort_column', 'predicate'])
+
+REPORT_RULES = [
+    ReportRule(
+        'p5m5_start',
+        'consultations-starting',
+        'Consultations Starting Between {range_start} and {range_end}',
+        '🆕🔜',
+        'start_date',
+        lambda c: (c.start >= c.window_start) & (c.start <= c.window_end),
+    ),
+    ReportRule(
+        'p5m5_close',
+        'consultations-ending',
+        'Consultations Ending Between {range_start} and {range_end}',
+        '⌛🔚',
+        'end_date',
+        lambda c: (c.end >= c.window_start) & (c.end <= c.window_end),
+    ),
+    ReportRule(
+        'late_close',
+        'late-closing',
+        "Late Closing Consultations (Status 'O')",
+        '😴',
+        'end_date',
+        lambda c: (c.status == 'O') & (c.end < c.today),
+    ),
+    ReportRule(
+        'early_close',
+        'early-closing',
+        "Early Closing Consultations (Status 'C')",
+        '🏎️',
+        'end_date',
+        lambda c: (c.status == 'C') & (c.end > c.today),
+    ),
+    ReportRule(
+        'late_start',
+        'late-starting',
+        "Late Starting Consultations (Status 'P')",
+        '🐌',
+        'start_date',
+        lambda c: (c.status == 'P') & (c.start < c.today),
+    ),
+    ReportRule(
+        'end_before_start',
+        'end-before-start',
+        'Consultations Ending Before They Start',
+        '🔀',
+        'start_date',
+        lambda c: c.end < c.start,
+    ),
+    ReportRule(
+        'missing_dates',
+        'missing-dates',
+        'Consultations Missing a Start or End Date',
+        '❓',
+        'registration_number',
+        lambda c: np.isnat(c.start) | np.isnat(c.end),
+    ),
+]
+
+
+class RuleContext:
+    """Day-precision arrays the rule predicates are evaluated against."""
+
+    def __init__(self, frame, today, window_days=5):
+        self.status = frame['status'].astype(object).to_numpy()
+        self.start = _day_array(frame['start_date'])
+        self.end = _day_array(frame['end_date'])
+        self.today = np.datetime64(today, 'D')
+        self.window_start = self.today - np.timedelta64(window_days, 'D')
+        self.window_end = self.today + np.timedelta64(window_days, 'D')
+
+
+def _day_array(column):
+    # NaT compares False against everything, like the missing dates did with .dt.date.
+    return parse_dates(column).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+
+def classify_consultations(frame, today, rules=REPORT_RULES, window_days=5):
+    """Return a bitmask per row of frame with bit i set when rules[i] matches the row."""
+    context = RuleContext(frame, today, window_days)
+    categories = np.zeros(len(frame), dtype=np.uint64)
+    for bit, rule in enumerate(rules):
+        categories |= rule.predicate(context).astype(np.uint64) << np.uint64(bit)
+    return categories
+
+
+def build_report_tables(frame, today, rules=REPORT_RULES, window_days=5):
+    """Return {rule name: matching rows of frame sorted by the rule's column, newest first}."""
+    categories = classify_consultations(frame, today, rules, window_days)
+    return {
+        rule.name: frame[(categories >> np.uint64(bit)) & np.uint64(1) == 1].sort_values(
+            by=rule.sort_column, ascending=False
+        )
+        for bit, rule in enumerate(rules)
+    }
@@ -0,0 +1,109 @@
+"""Fixed-size JSON page shards backing the change log and URL error table viewers.
+
+A table is written as ``page-00000.json``, ``page-00001.json``, ... (each a list of rows,
+each row a list of values) next to a small ``manifest.json`` with the column names, the
+page size, the row count and the page file names. The viewer only downloads the manifest
+and the pages that are scrolled into view, so a page view costs the same however long the
+table gets.
+
+The change log is stored oldest first and appended to, so every full page is written once
+and never changes; the manifest's ``reverse`` flag tells the viewer to show it newest first.
+"""
+
+import json
+import os
+
+from consultations_tracker.render import write_if_changed
+
+DEFAULT_PAGE_SIZE = 200
+MANIFEST_NAME = 'manifest.json'
+
+# Long free-text columns the viewers leave out; the full text stays in the CSV files.
+VIEW_EXCLUDED_COLUMNS = {'description_en', 'description_fr', 'hash', '_id'}
+
+
+def view_columns(columns):
+    return [column for column in columns if column not in VIEW_EXCLUDED_COLUMNS]
+
+
+def read_shard_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _rows(frame, columns):
+    frame = frame.reindex(columns=columns).astype(object)
+    return frame.astype(str).where(frame.notna(), None).values.tolist()
+
+
+def _page_name(number):
+    return f'page-{number:05d}.json'
+
+
+def _write_page(directory, number, rows):
+    return write_if_changed(
+        os.path.join(directory, _page_name(number)),
+        json.dumps(rows, ensure_ascii=False, separators=(',', ':')),
+    )
+
+
+def _write_manifest(directory, columns, page_size, row_count, reverse):
+    manifest = {
+        'columns': columns,
+        'page_size': page_size,
+        'row_count': row_count,
+        'pages': [_page_name(number) for number in range(-(-row_count // page_size))],
+        'reverse': reverse,
+    }
+    write_if_changed(os.path.join(directory, MANIFEST_NAME), json.dumps(manifest, indent=2) + '\n')
+    return manifest
+
+
+def write_json_shards(frame, directory, page_size=DEFAULT_PAGE_SIZE, reverse=False):
+    """Write the whole frame as page shards, replacing any shards already in the directory.
+
+    Returns the number of page files that were written or changed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    columns = view_columns(frame.columns)
+    rows = _rows(frame, columns)
+    written = sum(
+        _write_page(directory, number, rows[start:start + page_size])
+        for number, start in enumerate(range(0, len(rows), page_size))
+    )
+    manifest = _write_manifest(directory, columns, page_size, len(rows), reverse)
+    for filename in os.listdir(directory):
+        if filename.startswith('page-') and filename not in manifest['pages']:
+            os.remove(os.path.join(directory, filename))
+    return written
+
+
+def append_json_shards(frame, directory, page_size=DEFAULT_PAGE_SIZE, reverse=True):
+    """Append rows to existing shards, rewriting only the last partial page and adding new ones.
+
+    Falls back to write_json_shards when there are no shards yet. Returns the number of
+    page files that were written or changed.
+    """
+    manifest = read_shard_manifest(directory)
+    if manifest is None:
+        return write_json_shards(frame, directory, page_size, reverse)
+
+    columns = manifest['columns']
+    page_size = manifest['page_size']
+    row_count = manifest['row_count']
+    rows = _rows(frame, columns)
+
+    first_page = row_count // page_size
+    if row_count % page_size:
+        with open(os.path.join(directory, _page_name(first_page)), 'r', encoding='utf-8') as file:
+            rows = json.load(file) + rows
+
+    written = sum(
+        _write_page(directory, first_page + number, rows[start:start + page_size])
+        for number, start in enumerate(range(0, len(rows), page_size))
+    )
+    _write_manifest(directory, columns, page_size, row_count + len(frame), reverse)
+    return written
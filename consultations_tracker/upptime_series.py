@@ -0,0 +1,226 @@
+"""Time series of the Upptime checks, rolled up by department.
+
+Upptime keeps the last check of every monitored site in ``history/<slug>.yml`` (status,
+HTTP code and response time, with the time of the check) and the site's uptime and average
+response time over the last day, week, month and year in the ``api/<slug>/uptime-*.json``
+and ``response-time-*.json`` badges. ingest_upptime folds them into one row per site and
+check, appended to a columnar series under ``upptime_series/`` with one file per month of
+checks; only the badges of the sites checked since the last ingestion are read. Every row
+carries the owner_org of its site, found by joining the slug's URL to the sites list of
+.upptimerc.yml and the sites to the registry profile pages, so a site keeps its department
+in the series after it leaves the registry.
+
+department_rollups computes the uptime and the median and 95th percentile response times
+of every department's sites from the series with grouped aggregations, without going back
+to the per-site files.
+"""
+
+import glob
+import json
+import os
+
+import pandas as pd
+import yaml
+
+from consultations_tracker.changelog_store import SEGMENT_SUFFIX
+from consultations_tracker.manifest import file_digest, text_digest
+from consultations_tracker.upptime_sites import YamlLoader, read_sites, site_urls
+
+SERIES_DIR = 'upptime_series'
+DEPARTMENTS_CSV = 'upptime_departments.csv'
+ROLLUP_DAYS = 30
+
+BADGE_WINDOWS = ['day', 'week', 'month', 'year']
+UPTIME_COLUMNS = [f'uptime_{window}' for window in BADGE_WINDOWS]
+RESPONSE_TIME_COLUMNS = [f'response_time_{window}' for window in BADGE_WINDOWS]
+CHECK_COLUMNS = ['slug', 'url', 'checked_at', 'status', 'code', 'response_time']
+SERIES_COLUMNS = CHECK_COLUMNS[:2] + ['owner_org'] + CHECK_COLUMNS[2:] + UPTIME_COLUMNS + RESPONSE_TIME_COLUMNS
+ROLLUP_COLUMNS = [
+    'owner_org', 'sites', 'sites_down', 'uptime_month', 'p50_response_time', 'p95_response_time', 'checks',
+]
+
+
+def _typed(series):
+    """Return the series with its time, integer and badge columns typed (CSV files hold text)."""
+    series = series.reindex(columns=SERIES_COLUMNS)
+    series['checked_at'] = pd.to_datetime(series['checked_at'], utc=True, format='ISO8601')
+    for column in ['code', 'response_time']:
+        series[column] = pd.to_numeric(series[column], errors='coerce').astype('Int32')
+    for column in UPTIME_COLUMNS + RESPONSE_TIME_COLUMNS:
+        series[column] = pd.to_numeric(series[column], errors='coerce').astype('float64')
+    return series
+
+
+def history_paths(root='.'):
+    return sorted(glob.glob(os.path.join(root, 'history', '*.yml')))
+
+
+def upptime_digest(root='.'):
+    """Return a digest of the Upptime history files, which change with every new check."""
+    return text_digest(' '.join(f'{os.path.basename(path)}:{file_digest(path)}' for path in history_paths(root)))
+
+
+def read_checks(root='.'):
+    """Return the last check of every monitor with a history file under root."""
+    rows = []
+    for path in history_paths(root):
+        try:
+            with open(path, 'r', encoding='utf8') as file:
+                history = yaml.load(file, Loader=YamlLoader) or {}
+        except FileNotFoundError:
+            # Archived by the Upptime sync since the directory was listed.
+            continue
+        rows.append([
+            os.path.basename(path)[:-len('.yml')],
+            history.get('url'),
+            history.get('lastUpdated'),
+            history.get('status'),
+            history.get('code'),
+            history.get('responseTime'),
+        ])
+    checks = pd.DataFrame(rows, columns=CHECK_COLUMNS)
+    # PyYAML reads the times as datetimes; keep them in UTC.
+    checks['checked_at'] = pd.to_datetime(checks['checked_at'], utc=True, errors='coerce')
+    return checks.dropna(subset=['checked_at']).reset_index(drop=True)
+
+
+def read_badges(slugs, root='.'):
+    """Return the uptime (percent) and average response time (ms) badges of the slugs, by window."""
+    rows = []
+    for slug in slugs:
+        row = [slug]
+        for badge in ['uptime', 'response-time']:
+            for window in BADGE_WINDOWS:
+                try:
+                    with open(os.path.join(root, 'api', slug, f'{badge}-{window}.json'), 'r', encoding='utf8') as file:
+                        row.append(json.load(file).get('message'))
+                except (FileNotFoundError, ValueError):
+                    row.append(None)
+        rows.append(row)
+    badges = pd.DataFrame(rows, columns=['slug'] + UPTIME_COLUMNS + RESPONSE_TIME_COLUMNS)
+    # The messages read like '99.5%' and '305 ms'.
+    for column in UPTIME_COLUMNS + RESPONSE_TIME_COLUMNS:
+        values = badges[column].astype('string').str.extract(r'([\d.]+)', expand=False)
+        badges[column] = pd.to_numeric(values, errors='coerce').astype('float64')
+    return badges
+
+
+def site_departments(registry, sites):
+    """Return {url: owner_org} for the sites of the Upptime sites list with a registry profile page."""
+    registry = registry.dropna(subset=['profile_page_en', 'owner_org'])
+    owners = pd.Series(registry['owner_org'].astype(str).to_numpy(), index=site_urls(registry['profile_page_en']).to_numpy())
+    owners = owners[~owners.index.duplicated()]
+    return owners[owners.index.isin([str(site['url']) for site in sites])].to_dict()
+
+
+class UpptimeSeries:
+    """The Upptime checks stored under root, one file per month of checks."""
+
+    def __init__(self, root=SERIES_DIR):
+        self.root = root
+
+    def month_path(self, month):
+        return os.path.join(self.root, f'{month}{SEGMENT_SUFFIX}')
+
+    def paths(self):
+        return sorted(glob.glob(os.path.join(self.root, f'*{SEGMENT_SUFFIX}')))
+
+    def read(self, paths=None):
+        """Return the stored checks, sorted by time, of every month or of the files in paths."""
+        paths = self.paths() if paths is None else paths
+        if not paths:
+            return _typed(pd.DataFrame(columns=SERIES_COLUMNS))
+        series = pd.concat([self._read_month(path) for path in paths], ignore_index=True)
+        return series.sort_values(['checked_at', 'slug'], kind='stable', ignore_index=True)
+
+    def recent(self, days=ROLLUP_DAYS):
+        """Return the checks of the last days before the latest stored check."""
+        paths = self.paths()
+        if not paths:
+            return self.read([])
+        latest = self.read(paths[-1:])['checked_at'].max()
+        since = latest - pd.Timedelta(days=days)
+        series = self.read([path for path in paths if os.path.basename(path)[:7] >= f'{since:%Y-%m}'])
+        return series[series['checked_at'] > since].reset_index(drop=True)
+
+    def unstored(self, checks):
+        """Return the checks not in the series yet."""
+        months = checks['checked_at'].dt.strftime('%Y-%m')
+        paths = [self.month_path(month) for month in months.unique() if os.path.exists(self.month_path(month))]
+        stored = self.read(paths)
+        stored_keys = pd.MultiIndex.from_frame(stored[['slug', 'checked_at']])
+        return checks[~pd.MultiIndex.from_frame(checks[['slug', 'checked_at']]).isin(stored_keys)]
+
+    def append(self, rows):
+        """Add rows of new checks to the files of their months."""
+        rows = _typed(rows)
+        os.makedirs(self.root, exist_ok=True)
+        for month, month_rows in rows.groupby(rows['checked_at'].dt.strftime('%Y-%m')):
+            path = self.month_path(month)
+            if os.path.exists(path):
+                month_rows = pd.concat([self._read_month(path), month_rows], ignore_index=True)
+            month_rows = month_rows.sort_values(['checked_at', 'slug'], kind='stable', ignore_index=True)
+            if path.endswith('.parquet'):
+                month_rows.to_parquet(path, index=False)
+            else:
+                month_rows.to_csv(path, index=False, date_format='%Y-%m-%dT%H:%M:%S.%fZ')
+
+    @staticmethod
+    def _read_month(path):
+        if path.endswith('.parquet'):
+            return _typed(pd.read_parquet(path))
+        return _typed(pd.read_csv(path, dtype=str))
+
+
+def ingest_upptime(registry, root='.', config_path='.upptimerc.yml', series=None):
+    """Add the Upptime checks made since the last ingestion to the series; return them.
+
+    registry gives the owner_org of every site of the sites list at config_path.
+    """
+    series = series or UpptimeSeries()
+    checks = series.unstored(read_checks(root))
+    if checks.empty:
+        return _typed(pd.DataFrame(columns=SERIES_COLUMNS))
+    try:
+        with open(config_path, 'r', encoding='utf8') as file:
+            sites, _ = read_sites(file.read())
+    except FileNotFoundError:
+        sites = []
+    checks = checks.assign(owner_org=checks['url'].map(site_departments(registry, sites)))
+    rows = checks.merge(read_badges(checks['slug'], root), on='slug', how='left')
+    series.append(rows)
+    return _typed(rows)
+
+
+def department_rollups(series):
+    """Return the uptime and response times of every department's sites in the series.
+
+    sites_down counts the sites whose latest check was not up and uptime_month is the mean of
+    their 30-day uptime badges as of that check. The response time percentiles are taken over
+    every check that was up, so failed checks do not skew them.
+    """
+    series = series.dropna(subset=['owner_org'])
+    latest = series.drop_duplicates('slug', keep='last')
+    by_department = latest.groupby('owner_org')
+    rollups = pd.DataFrame({
+        'sites': by_department.size(),
+        'sites_down': latest['status'].ne('up').groupby(latest['owner_org']).sum(),
+        'uptime_month': by_department['uptime_month'].mean().round(2),
+    })
+    up = series[series['status'].eq('up')]
+    response_times = up['response_time'].astype('float64').groupby(up['owner_org']).quantile([0.5, 0.95])
+    response_times = response_times.unstack().reindex(columns=[0.5, 0.95])
+    rollups['p50_response_time'] = response_times[0.5].round().astype('Int64')
+    rollups['p95_response_time'] = response_times[0.95].round().astype('Int64')
+    rollups['checks'] = series.groupby('owner_org').size()
+    rollups = rollups.rename_axis('owner_org').reset_index()
+    return rollups.reindex(columns=ROLLUP_COLUMNS).sort_values('owner_org', ignore_index=True)
+
+
+def slowest_departments(rollups, limit=10):
+    return rollups.sort_values(['p95_response_time', 'p50_response_time'], ascending=False, kind='stable').head(limit)
+
+
+def least_available_departments(rollups, limit=10):
+    ranked = rollups.sort_values(['uptime_month', 'sites_down'], ascending=[True, False], kind='stable')
+    return ranked.head(limit)
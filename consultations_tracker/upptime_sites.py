@@ -0,0 +1,93 @@
+"""Diff-aware writer for the ``sites`` list of the Upptime configuration.
+
+Only the top-level ``sites:`` block of .upptimerc.yml is parsed and rewritten; the rest of
+the file is left byte-identical. The file is only written when the monitored sites really
+changed (compared by URL), because every rewrite makes Upptime regenerate its workflows.
+The libyaml C loader and dumper are used when PyYAML was built with them.
+"""
+
+import re
+from collections import namedtuple
+
+import yaml
+
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# The top-level 'sites:' key and every following line that is indented, a sequence item,
+# a comment or blank, up to the next top-level key.
+SITES_BLOCK_PATTERN = re.compile(r'^sites:.*(?:\n|$)(?:(?:[-\s#].*)?(?:\n|$))*', re.MULTILINE)
+
+SitesDiff = namedtuple('SitesDiff', ['added', 'removed', 'renamed', 'written'])
+
+
+def site_urls(urls):
+    """Return registry profile page URLs as they are written to the sites list."""
+    urls = urls.astype(str).str.replace(': ', '', regex=False)
+    return urls.str.replace('\n', '', regex=False).str.strip()
+
+
+def dump_sites(sites):
+    return yaml.dump({'sites': sites}, Dumper=YamlDumper, sort_keys=False, allow_unicode=True)
+
+
+def read_sites(text):
+    """Return the sites listed in an Upptime configuration and the span of their block."""
+    match = SITES_BLOCK_PATTERN.search(text)
+    if match is None:
+        return [], (len(text), len(text))
+    sites = yaml.load(match.group(0), Loader=YamlLoader)['sites'] or []
+    return sites, match.span()
+
+
+def diff_sites(old_sites, new_sites):
+    """Compare two site lists by URL; return (added, removed, renamed) lists of sites."""
+    old_names = {site['url']: site['name'] for site in old_sites}
+    new_names = {site['url']: site['name'] for site in new_sites}
+    added = [{'name': name, 'url': url} for url, name in new_names.items() if url not in old_names]
+    removed = [{'name': name, 'url': url} for url, name in old_names.items() if url not in new_names]
+    renamed = [
+        {'name': name, 'url': url, 'old_name': old_names[url]}
+        for url, name in new_names.items()
+        if url in old_names and old_names[url] != name
+    ]
+    return added, removed, renamed
+
+
+def update_sites(path, sites):
+    """Replace the sites block of the Upptime configuration at path when the sites changed.
+
+    Sites are compared by URL and name; a different order alone is not a change. Returns a
+    SitesDiff with the added, removed and renamed sites and whether the file was written.
+    """
+    with open(path, 'r', encoding='utf8') as file:
+        text = file.read()
+
+    old_sites, (start, end) = read_sites(text)
+    added, removed, renamed = diff_sites(old_sites, sites)
+
+    def site_pairs(site_list):
+        return sorted((str(site['url']), str(site['name'])) for site in site_list)
+
+    written = site_pairs(old_sites) != site_pairs(sites)
+    if written:
+        block = dump_sites(sites)
+        if start == end and text and not text.endswith('\n'):
+            block = '\n' + block
+        with open(path, 'w', encoding='utf8') as file:
+            file.write(text[:start] + block + text[end:])
+    return SitesDiff(added, removed, renamed, written)
+
+
+def print_sites_diff(diff):
+    """Print a summary of a SitesDiff for the run log."""
+    if not diff.written:
+        print("Upptime sites unchanged; .upptimerc.yml not rewritten.")
+        return
+    print(f"Upptime sites: {len(diff.added)} added, {len(diff.removed)} removed, {len(diff.renamed)} renamed.")
+    for site in diff.added:
+        print(f"  + {site['name']} <{site['url']}>")
+    for site in diff.removed:
+        print(f"  - {site['name']} <{site['url']}>")
+    for site in diff.renamed:
+        print(f"  ~ {site['old_name']} -> {site['name']} <{site['url']}>")
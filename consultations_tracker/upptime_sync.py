@@ -0,0 +1,165 @@
+"""Bad URL scan and Upptime sites sync (the ``bad-urls`` and ``sync-upptime`` subcommands).
+
+The consultations CSV is downloaded once through the shared conditional-GET cache and used
+both for the bad URL scan, written to bad-urls.csv, and for the list of open consultations
+Upptime monitors; upptime_steps declares both as pipeline steps, so the link probes and the
+sites update run concurrently. The functions the steps are made of take and return data
+frames, so they can be run on their own without any download.
+"""
+
+import os
+
+from consultations_tracker.download import fetch_cached
+from consultations_tracker.link_probe import probe_links
+from consultations_tracker.metrics import RunMetrics
+from consultations_tracker.monitor_archive import print_pruned_monitors, prune_monitors
+from consultations_tracker.pipeline import Step, run_steps
+from consultations_tracker.registry import read_registry
+from consultations_tracker.upptime_sites import print_sites_diff, site_urls, update_sites
+from consultations_tracker.url_checks import classify_invalid_urls, classify_url_columns, describe_invalid_urls, valid_urls
+
+# URL of the consultations CSV file
+consultations_csv_url = (
+    'https://open.canada.ca/data/dataset/7c03f039-3753-4093-af60-74b0f7b2385d/'
+    'resource/92bec4b7-6feb-4215-a5f7-61da342b2354/download/consultations.csv'
+)
+
+DEFAULT_UPPTIME_CONFIG = '.upptimerc.yml'
+BAD_URLS_PATH = 'bad-urls.csv'
+
+
+def bad_url_rows(consultations_df, url_syntax_reasons, link_reasons=None):
+    """Return the consultations with an invalid or broken URL, with an invalid_url_fields column."""
+    invalid_url_details = describe_invalid_urls(consultations_df, url_syntax_reasons, link_reasons)
+    bad_url_mask = invalid_url_details != ""
+    bad_urls_df = consultations_df.loc[bad_url_mask].copy()
+    bad_urls_df['invalid_url_fields'] = invalid_url_details[bad_url_mask]
+    return bad_urls_df
+
+
+def monitored_sites(consultations_df):
+    """Return the name and URL of the consultations Upptime should monitor."""
+    # Filter out rows where 'status' column equals 'C'
+    df_filtered = consultations_df[consultations_df['status'] != 'C']
+
+    # Select specific columns and rename them for YAML
+    selected_data = df_filtered[['title_en', 'profile_page_en']].rename(columns={'title_en': 'name', 'profile_page_en': 'url'})
+
+    # Further filter out entries where the URL is nan, blank, or not monitorable by Upptime.
+    filtered_data = selected_data.dropna(subset=['url']).copy()
+
+    # Normalize the name and URL values before validating them for the YAML output.
+    filtered_data['url'] = site_urls(filtered_data['url'])
+    filtered_data['name'] = filtered_data['name'].astype(str).str.replace('\n', '', regex=False)
+    return filtered_data[classify_invalid_urls(filtered_data['url']) == '']
+
+
+def read_consultations(consultations_download):
+    # Every column is written back to bad-urls.csv, so the dates stay as published.
+    return read_registry(consultations_download.path, dates=False)
+
+
+def upptime_steps(config_path=DEFAULT_UPPTIME_CONFIG, bad_urls=True, probe=True, bad_urls_path=BAD_URLS_PATH, consultations_from=None):
+    """Return the pipeline steps of the Upptime sync and, with bad_urls, of the bad URL scan.
+
+    The consultations are downloaded from consultations.csv or, with consultations_from,
+    taken from the (registry, from_remote) result of that step of the same run, without the
+    datastore '_id' column. The Upptime files of sites no longer monitored are archived and
+    removed from the directory of config_path.
+    """
+    def consultations(stage, **registry):
+        if consultations_from is None:
+            consultations_df = read_consultations(fetch_cached(consultations_csv_url))
+        elif registry[consultations_from][1]:
+            consultations_df = registry[consultations_from][0].drop(columns='_id', errors='ignore')
+        else:
+            # Without a CKAN copy the report falls back to the change log, which is not the registry.
+            print("Skipping the bad URL scan and the Upptime sync: the registry could not be downloaded.")
+            return None
+        stage.rows = len(consultations_df)
+        return consultations_df
+
+    # Check the syntax of every URL column.
+    def url_syntax(stage, consultations):
+        return None if consultations is None else classify_url_columns(consultations)
+
+    # Probe every distinct link that passed the syntax checks for error responses and
+    # redirects to a landing page.
+    def link_probe(stage, consultations, url_syntax):
+        if consultations is None or not probe:
+            return {}
+        link_reasons = probe_links(valid_urls(consultations, url_syntax))
+        stage.rows = len(link_reasons)
+        return link_reasons
+
+    def write_bad_urls(stage, consultations, url_syntax, link_probe):
+        if consultations is None:
+            return None
+        bad_urls_df = bad_url_rows(consultations, url_syntax, link_probe)
+        bad_urls_df.to_csv(bad_urls_path, index=False)
+        stage.rows = len(bad_urls_df)
+        stage.wrote(bad_urls_path)
+        return bad_urls_df
+
+    # Update the 'sites' section of the YAML file, rewriting it only when the monitored sites changed.
+    def upptime_sites(stage, consultations):
+        if consultations is None:
+            return None
+        sites = monitored_sites(consultations)
+        sites_diff = update_sites(config_path, sites.to_dict(orient='records'))
+        print_sites_diff(sites_diff)
+        stage.rows = len(sites)
+        if sites_diff.written:
+            stage.wrote(config_path)
+        return sites
+
+    # Archive and remove the Upptime history, badges and graphs of sites that are no longer monitored.
+    def prune(stage, upptime_sites):
+        if upptime_sites is None:
+            return None
+        upptime_root = os.path.dirname(os.path.abspath(config_path))
+        stage.watch(os.path.join(upptime_root, 'archive'))
+        pruned_monitors = prune_monitors(set(upptime_sites['url']), root=upptime_root)
+        print_pruned_monitors(pruned_monitors)
+        stage.rows = len(pruned_monitors)
+        return pruned_monitors
+
+    steps = [Step('consultations', consultations, [consultations_from] if consultations_from else [])]
+    if bad_urls:
+        steps += [
+            Step('url_syntax', url_syntax, ['consultations']),
+            Step('link_probe', link_probe, ['consultations', 'url_syntax']),
+            Step('bad_urls', write_bad_urls, ['consultations', 'url_syntax', 'link_probe']),
+        ]
+    steps += [
+        Step('upptime_sites', upptime_sites, ['consultations']),
+        Step('prune_monitors', prune, ['upptime_sites']),
+    ]
+    return steps
+
+
+def run_bad_urls(probe=True, path=BAD_URLS_PATH):
+    """Download the consultations and write the rows with invalid or broken URLs to path."""
+    metrics = RunMetrics('bad-urls')
+    outcome = 'failed'
+    try:
+        run_steps(upptime_steps(probe=probe, bad_urls_path=path), metrics, targets=['bad_urls'])
+        outcome = 'completed'
+    finally:
+        metrics.write(outcome)
+
+
+def run_sync_upptime(config_path=DEFAULT_UPPTIME_CONFIG, bad_urls=True, probe=True):
+    """Update the sites of the Upptime configuration at config_path from the open consultations.
+
+    With bad_urls, bad-urls.csv is written from the same download, while the sites are updated.
+    """
+    # Time every step of the run; the measurements are written to run_metrics.json at the end.
+    metrics = RunMetrics('sync-upptime')
+    outcome = 'failed'
+    try:
+        run_steps(upptime_steps(config_path, bad_urls, probe), metrics)
+        outcome = 'completed'
+    finally:
+        # A failed run is recorded too, with the steps it finished.
+        metrics.write(outcome)
@@ -0,0 +1,90 @@
+"""Checks for consultation URLs that Upptime cannot monitor, as reported in bad-urls.csv."""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+URL_COLUMNS = [
+    'profile_page_en',
+    'profile_page_fr',
+    'report_link_en',
+    'report_link_fr',
+]
+
+INVALID_URL_RULES = [
+    (
+        "canada-preview.adobecqms.net",
+        "Canada-ca Preview Link",
+    ),
+    (
+        "can01.safelinks.protection",
+        "Office 365 Safe Links",
+    ),
+]
+PLACEHOLDER_VALUES = {"", "na", "n/a", "s/o", "nan", "none", "null"}
+INVALID_SCHEME_PATTERN = re.compile(r"^[a-z][a-z0-9+.-]*:", re.IGNORECASE)
+
+
+def classify_invalid_urls(values, invalid_url_rules=INVALID_URL_RULES):
+    """Return a Series of invalid URL explanations, with empty strings for monitorable URLs.
+
+    Every rule is evaluated as a batched string operation over the whole Series, and the
+    first matching rule (in the order listed below) provides the explanation for a value.
+    """
+    present = values.notna()
+    normalized_urls = values[present].astype(str).str.strip().str.lower()
+    has_http_scheme = normalized_urls.str.startswith(("http://", "https://"))
+
+    rules = [(normalized_urls.isin(PLACEHOLDER_VALUES), "Placeholder or blank URL")]
+    rules += [
+        (normalized_urls.str.contains(marker, regex=False), reason)
+        for marker, reason in invalid_url_rules
+    ]
+    rules += [
+        (normalized_urls.str.startswith("mailto:"), "Email link is not monitorable"),
+        (normalized_urls.str.startswith("www."), "Missing URL scheme"),
+        (
+            ~has_http_scheme & normalized_urls.str.match(INVALID_SCHEME_PATTERN.pattern, flags=re.IGNORECASE),
+            "Unsupported URL scheme",
+        ),
+        (~has_http_scheme, "Missing URL scheme"),
+    ]
+
+    reasons = np.select(
+        [condition.to_numpy(dtype=bool) for condition, _ in rules],
+        [reason for _, reason in rules],
+        default="",
+    )
+    return pd.Series(reasons, index=normalized_urls.index, dtype=object).reindex(values.index, fill_value="")
+
+
+def classify_url_columns(frame, columns=URL_COLUMNS):
+    """Return {column: classify_invalid_urls(frame[column])} for the URL columns present in frame."""
+    return {column: classify_invalid_urls(frame[column]) for column in columns if column in frame.columns}
+
+
+def valid_urls(frame, column_reasons):
+    """Yield the stripped URLs that passed the syntax checks, for the link prober."""
+    for column, reasons in column_reasons.items():
+        yield from frame[column][reasons == ""].dropna().astype(str).str.strip()
+
+
+def describe_invalid_urls(frame, column_reasons, link_reasons=None):
+    """Return the invalid_url_fields text of every row, e.g. 'profile_page_en: Missing URL scheme'.
+
+    link_reasons maps URLs that passed the syntax checks to a link probe explanation, which is
+    reported for them in the same way; rows without problems get an empty string.
+    """
+    invalid_url_details = pd.Series("", index=frame.index, dtype=object)
+    for column, reasons in column_reasons.items():
+        if link_reasons:
+            probed_urls = frame[column].astype(str).str.strip()
+            reasons = reasons.mask(reasons == "", probed_urls.map(link_reasons).fillna(""))
+
+        has_reason = reasons != ""
+        separator = invalid_url_details.where(invalid_url_details == "", "; ")
+        invalid_url_details = invalid_url_details.mask(
+            has_reason, invalid_url_details + separator + f"{column}: " + reasons
+        )
+    return invalid_url_details
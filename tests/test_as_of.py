@@ -0,0 +1,77 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from consultations_tracker.as_of import AsOfIndex
+from consultations_tracker.changelog_store import ChangeLogStore
+
+FIELDS = ['title_en', 'status']
+CHANGE_TIMES = [
+    '2024-01-15 09:00:00', '2024-01-15 18:30:00', '2024-02-03 12:00:00', '2024-03-01 00:00:00',
+    '2024-03-20 07:45:00', '2024-05-02 12:00:00', '2024-05-02 12:00:01', '2024-07-30 23:59:59',
+]
+
+
+def snapshot_rows(rows, changed_at):
+    frame = pd.DataFrame(rows, columns=['composite_key'] + FIELDS)
+    frame['hash'] = [hashlib.sha256(repr(tuple(row)).encode('utf-8')).hexdigest() for row in rows]
+    frame['row_chng_datetime'] = changed_at
+    return frame[['composite_key', 'hash'] + FIELDS + ['row_chng_datetime']]
+
+
+def brute_force_snapshot(log, when):
+    """Return, for every key recorded by when, all of its rows recorded at its last change time by then."""
+    changed_at = pd.to_datetime(log['row_chng_datetime'])
+    seen = log[changed_at <= when]
+    last_change = changed_at[changed_at <= when].groupby(seen['composite_key']).transform('max')
+    return seen[changed_at[changed_at <= when] == last_change]
+
+
+def comparable(frame):
+    frame = frame[['composite_key', 'hash'] + FIELDS].astype(object)
+    return frame.sort_values(['composite_key', 'hash'], ignore_index=True)
+
+
+def test_snapshot_matches_a_filter_of_the_full_log(tmp_path):
+    store = ChangeLogStore(str(tmp_path / 'changelog'), str(tmp_path / 'log.csv'), keyframe_interval=3)
+    cache_dir = str(tmp_path / 'as_of')
+    rng = np.random.default_rng(1)
+    current = {}
+    log = []
+    for run, changed_at in enumerate(CHANGE_TIMES):
+        # A key joins the registry on every run and up to two change status.
+        current.setdefault(f'org-{run}', [f'Consultation {run}', 'P'])
+        for key in rng.choice(sorted(current), size=min(2, len(current)), replace=False):
+            current[key][1] = str(rng.choice(['O', 'C', 'P']))
+        rows = [[key] + fields for key, fields in current.items()]
+        if run == 4:
+            # A key listed twice in one snapshot.
+            rows.append(['org-0', 'Consultation 0 (duplicate)', 'O'])
+        snapshot = snapshot_rows(rows, changed_at)
+        if not store.exists():
+            snapshot.to_csv(store.csv_export_path, index=False)
+            store.import_history(snapshot)
+            log.append(snapshot)
+        else:
+            log.append(store.record_snapshot(snapshot).drop(columns='changed_fields'))
+
+        if run == 3:
+            # Build the cache halfway, so the later queries use an extended one.
+            AsOfIndex(store, cache_dir).versions()
+
+    log = pd.concat(log, ignore_index=True)
+    index = AsOfIndex(store, cache_dir)
+    times = pd.to_datetime(CHANGE_TIMES)
+    queries = list(times) + list(times - pd.Timedelta(seconds=1)) + [times[-1] + pd.Timedelta(days=400)]
+    for when in queries:
+        pd.testing.assert_frame_equal(comparable(index.snapshot(when)), comparable(brute_force_snapshot(log, when)))
+    assert index.snapshot(times[0] - pd.Timedelta(seconds=1)).empty
+
+    # Times with a timezone are compared in UTC; a full rebuild gives the same snapshots.
+    pd.testing.assert_frame_equal(
+        index.snapshot('2024-03-01T01:00:00+01:00'), index.snapshot(pd.Timestamp('2024-03-01 00:00:00')),
+    )
+    rebuilt = AsOfIndex(store, str(tmp_path / 'rebuilt'))
+    for when in queries:
+        pd.testing.assert_frame_equal(comparable(rebuilt.snapshot(when)), comparable(index.snapshot(when)))
@@ -0,0 +1,99 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from consultations_tracker.changelog_store import STORAGE_COLUMNS, ChangeLogStore
+
+FIELDS = ['title_en', 'status', 'end_date']
+
+
+def snapshot_rows(rows, changed_at):
+    """Return change log rows for (composite_key, title_en, status, end_date) tuples, None for missing."""
+    frame = pd.DataFrame(rows, columns=['composite_key'] + FIELDS).astype(object)
+    frame = frame.where(frame.notna(), None)
+    frame['hash'] = [
+        hashlib.sha256(repr(tuple(row)).encode('utf-8')).hexdigest() for row in frame[FIELDS].itertuples(index=False)
+    ]
+    frame['row_chng_datetime'] = changed_at
+    return frame[['composite_key', 'hash'] + FIELDS + ['row_chng_datetime']]
+
+
+def normalized(frame):
+    """Return the frame as objects with None for missing values, to compare text and missing values alike."""
+    return frame.astype(object).where(frame.notna(), None).reset_index(drop=True)
+
+
+def make_store(tmp_path, keyframe_interval=3):
+    return ChangeLogStore(
+        str(tmp_path / 'changelog'), str(tmp_path / 'consultations_chng_log.csv'), keyframe_interval=keyframe_interval,
+    )
+
+
+def record(store, snapshot):
+    """Record a snapshot as update_change_log does: the first one is imported."""
+    if not store.exists():
+        snapshot.to_csv(store.csv_export_path, index=False)
+        store.import_history(snapshot)
+        return snapshot
+    return store.record_snapshot(snapshot)
+
+
+def test_read_history_matches_full_rows_with_missing_values_and_keyframes(tmp_path):
+    store = make_store(tmp_path)
+    rng = np.random.default_rng(0)
+    choices = [['Budget', 'Parks', None], ['O', 'C', 'P', None], ['2024-01-01', '2024-02-01', None]]
+    current = {key: ['Budget', 'O', '2024-01-01'] for key in ['a-1', 'b-2', 'c-3']}
+    full_rows = []
+    for run in range(12):
+        for fields in current.values():
+            column = rng.integers(len(FIELDS))
+            fields[column] = choices[column][rng.integers(len(choices[column]))]
+        snapshot = snapshot_rows([[key] + fields for key, fields in current.items()], f'2024-01-{run + 1:02d} 12:00:00')
+        appended = record(store, snapshot)
+        full_rows.append(appended.drop(columns='changed_fields', errors='ignore'))
+
+    history = store.read_history().drop(columns=STORAGE_COLUMNS, errors='ignore')
+    expected = pd.concat(full_rows, ignore_index=True)
+    assert expected[FIELDS].isna().any().all()
+    assert not history[FIELDS].eq('').any().any()
+    pd.testing.assert_frame_equal(normalized(history[expected.columns]), normalized(expected))
+
+    # The CSV export holds every version in full.
+    export = pd.read_csv(store.csv_export_path, dtype=str)
+    pd.testing.assert_frame_equal(normalized(history[export.columns]), normalized(export))
+
+
+def test_record_snapshot_appends_only_rows_whose_hash_is_not_the_latest(tmp_path):
+    store = make_store(tmp_path)
+    first = snapshot_rows([['a-1', 'Budget', 'O', '2024-01-01'], ['b-2', 'Parks', 'P', None]], '2024-01-01 12:00:00')
+    record(store, first)
+
+    # The same snapshot again adds nothing.
+    unchanged = snapshot_rows([['a-1', 'Budget', 'O', '2024-01-01'], ['b-2', 'Parks', 'P', None]], '2024-01-02 12:00:00')
+    assert store.record_snapshot(unchanged).empty
+    assert len(store.read_history()) == 2
+
+    # Only the changed key is appended, and the index moves to its new hash.
+    changed = snapshot_rows([['a-1', 'Budget', 'C', '2024-01-01'], ['b-2', 'Parks', 'P', None]], '2024-01-03 12:00:00')
+    assert store.record_snapshot(changed)['composite_key'].tolist() == ['a-1']
+    index = store.latest_hashes().set_index('composite_key')['hash']
+    assert index.to_dict() == dict(zip(changed['composite_key'], changed['hash']))
+
+    # The index only holds the latest hash, so going back to an earlier version is a change.
+    reverted = snapshot_rows([['a-1', 'Budget', 'O', '2024-01-01'], ['b-2', 'Parks', 'P', None]], '2024-01-04 12:00:00')
+    assert store.record_snapshot(reverted)['composite_key'].tolist() == ['a-1']
+    assert store.record_snapshot(reverted.assign(row_chng_datetime='2024-01-05 12:00:00')).empty
+
+    # A key listed twice in a snapshot keeps both hashes in the index, so neither repeats.
+    duplicated = snapshot_rows(
+        [['a-1', 'Budget', 'O', '2024-01-01'], ['b-2', 'Parks', 'P', None], ['b-2', 'Parks', 'O', None]],
+        '2024-01-06 12:00:00',
+    )
+    assert store.record_snapshot(duplicated)['hash'].tolist() == [duplicated.loc[2, 'hash']]
+    assert sorted(store.latest_hashes().query("composite_key == 'b-2'")['hash']) == sorted(duplicated.loc[1:, 'hash'])
+    assert store.record_snapshot(duplicated.assign(row_chng_datetime='2024-01-07 12:00:00')).empty
+
+    history = store.read_history()
+    assert len(history) == 5
+    assert len(pd.read_csv(store.csv_export_path, dtype=str)) == 5
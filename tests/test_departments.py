@@ -0,0 +1,76 @@
+import hashlib
+from datetime import date
+
+import pandas as pd
+
+from consultations_tracker.changelog_store import ChangeLogStore
+from consultations_tracker.departments import ROLLUP_COLUMNS, DepartmentRollups
+
+FIELDS = ['owner_org', 'status', 'start_date', 'end_date']
+
+
+def snapshot_rows(registry, changed_at):
+    """Return change log rows for {registration_number: [owner_org, status, start_date, end_date]}."""
+    rows = [[f'{fields[0]}-{number}', *fields] for number, fields in registry.items()]
+    frame = pd.DataFrame(rows, columns=['composite_key'] + FIELDS)
+    frame['hash'] = [hashlib.sha256(repr(tuple(row)).encode('utf-8')).hexdigest() for row in rows]
+    frame['row_chng_datetime'] = changed_at
+    return frame[['composite_key', 'hash'] + FIELDS + ['row_chng_datetime']]
+
+
+def test_update_matches_recompute_through_moves_and_closures(tmp_path, capsys):
+    store = ChangeLogStore(str(tmp_path / 'changelog'), str(tmp_path / 'log.csv'))
+    rollups = DepartmentRollups(str(tmp_path / 'departments'))
+    registry = {
+        1: ['fin', 'O', '2024-01-01', '2024-02-15'],
+        2: ['fin', 'P', '2024-03-01', '2024-04-01'],
+        3: ['env', 'O', '2024-01-10', '2024-03-31'],
+        4: ['env', 'C', '2023-11-01', '2023-12-01'],
+        5: ['hc', 'O', '2024-01-05', None],
+    }
+    changes = [
+        # A consultation closes, another opens.
+        {1: ['fin', 'C', '2024-01-01', '2024-02-15'], 2: ['fin', 'O', '2024-03-01', '2024-04-01']},
+        # A consultation moves to another department, under a new composite_key.
+        {3: ['hc', 'O', '2024-01-10', '2024-03-31']},
+        # Its dates change; a planned consultation is added to a new department.
+        {3: ['hc', 'O', '2024-01-10', '2024-05-31'], 6: ['tbs', 'P', '2024-02-01', '2024-02-20']},
+        # It moves back, and a consultation closes early with an end date before its start.
+        {3: ['env', 'C', '2024-01-10', '2024-05-31'], 5: ['hc', 'C', '2024-01-05', '2023-12-31']},
+        # A closed consultation reopens.
+        {4: ['env', 'O', '2023-11-01', '2024-06-01']},
+    ]
+
+    snapshot = snapshot_rows(registry, '2024-01-15 12:00:00')
+    snapshot.to_csv(store.csv_export_path, index=False)
+    store.import_history(snapshot)
+    rollups.update(snapshot.iloc[:0], store)
+    for day, change in enumerate(changes, start=16):
+        registry.update(change)
+        appended = store.record_snapshot(snapshot_rows(registry, f'2024-01-{day} 12:00:00'))
+        assert not appended.empty
+        rollups.update(appended, store)
+
+        recomputed = DepartmentRollups(str(tmp_path / f'recomputed-{day}'))
+        recomputed.recompute(store)
+        assert rollups.verify(store).empty
+        pd.testing.assert_frame_equal(rollups.histograms(), recomputed.histograms())
+        for today in [date(2024, 1, 1), date(2024, 3, 15), date(2024, 12, 31)]:
+            pd.testing.assert_frame_equal(rollups.table(today), recomputed.table(today))
+
+    # Every update applied the appended rows; none fell back to a recompute.
+    assert 'do not match' not in capsys.readouterr().out
+    table = rollups.table(date(2024, 3, 15)).set_index('owner_org')
+    # The key the consultation had in hc keeps its last version, as in the change log.
+    assert table.loc['hc', ['consultations', 'open', 'closed']].tolist() == [2, 1, 1]
+    assert table.loc['env', ['consultations', 'open', 'closed']].tolist() == [2, 1, 1]
+
+
+def test_empty_change_log_gives_an_empty_table(tmp_path):
+    store = ChangeLogStore(str(tmp_path / 'changelog'), str(tmp_path / 'log.csv'))
+    rollups = DepartmentRollups(str(tmp_path / 'departments'))
+    rollups.recompute(store)
+    table = rollups.table(date(2024, 3, 15))
+    assert table.empty
+    assert table.columns.tolist() == ROLLUP_COLUMNS
+    assert rollups.verify(store).empty
@@ -0,0 +1,140 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from consultations_tracker import download, gazette
+from consultations_tracker.gazette import gazette_page_entries
+
+ENTRY = (
+    '<div class="entry"><p><a href="/rp-pr/p1/2026/2026-07-{day:02d}/html/reg{day}-eng.html">Regulations {day}</a></p>'
+    '<ul><li>Published: July {day:02d}, 2026</li><li>Comments accepted until August {day:02d}, 2026</li></ul></div>\n'
+)
+PAGE = (
+    '<html><body><h2 id="a3">Closed</h2><div><a href="/closed">Closed</a></div>\n'
+    '<h2 id="a4">Open consultations</h2>\n'
+    + ''.join(ENTRY.format(day=day) for day in range(1, 29))
+    + '<h2 id="a5">Notices</h2>\n'
+    # Enough of the rest of the page that the download stops before reaching its end.
+    + '<p>Notice</p>\n' * 5000
+    + '</body></html>\n'
+).encode('utf-8')
+ETAG = '"page-1"'
+
+
+class ListingPageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.validators.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        try:
+            self.wfile.write(PAGE)
+        except ConnectionError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def page_url(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(download, '_downloads_this_run', {})
+    monkeypatch.setattr(gazette, '_streamed_entries', {})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ListingPageHandler)
+    server.validators = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f'http://127.0.0.1:{server.server_address[1]}/consult/consult-eng.html'
+    server.shutdown()
+    server.server_close()
+
+
+def test_page_entries_are_parsed_once_and_reread_after_a_304(page_url, monkeypatch):
+    server, url = page_url
+    expected = list(gazette.iter_gazette_entries([PAGE]))
+    assert len(expected) == 28
+
+    # A fresh download keeps the entries its streaming parser collected.
+    with monkeypatch.context() as patched:
+        patched.setattr(gazette, 'iter_gazette_entries', lambda chunks: pytest.fail('page parsed again'))
+        assert gazette_page_entries(url) == expected
+        assert gazette_page_entries(url) == expected
+
+    # In a later run the server answers 304 and the cached copy is parsed from disk.
+    monkeypatch.setattr(download, '_downloads_this_run', {})
+    monkeypatch.setattr(gazette, '_streamed_entries', {})
+    assert gazette_page_entries(url) == expected
+    assert server.validators == [None, ETAG]
+
+
+def test_links_without_a_page_are_never_paired():
+    assert gazette.notice_identifier('https://gazette.gc.ca') is None
+    assert gazette.notice_identifier('https://gazette.gc.ca/#a4') is None
+    assert gazette.notice_identifier('https://gazette.gc.ca/rp-pr/p1/2026/html/reg1-fra.html#ne1') == (
+        '/rp-pr/p1/2026/html/reg1.html#ne1'
+    )
+
+    english = [
+        {'title_en': 'Regulations 1', 'link_en': 'https://gazette.gc.ca/rp-pr/p1/2026/html/reg1-eng.html',
+         'date_published': '2026-07-04', 'date_close': '2026-08-03'},
+        {'title_en': 'Notice', 'link_en': 'https://gazette.gc.ca', 'date_published': '2026-07-04', 'date_close': ''},
+    ]
+    french = [
+        {'title_fr': 'Avis', 'link_fr': 'https://gazette.gc.ca', 'date_published': '2026-07-04', 'date_close': ''},
+        {'title_fr': 'Règlement 1', 'link_fr': 'https://gazette.gc.ca/rp-pr/p1/2026/html/reg1-fra.html',
+         'date_published': '2026-07-04', 'date_close': '2026-08-03'},
+    ]
+    rows, english_only, french_only = gazette.join_bilingual_consultations(english, french)
+    assert [(row['title_en'], row['title_fr']) for row in rows] == [
+        ('Regulations 1', 'Règlement 1'), ('Notice', ''), ('', 'Avis'),
+    ]
+    assert english_only == [english[1]]
+    assert french_only == [french[0]]
+
+
+def test_entries_sharing_a_notice_are_paired_in_order_and_leftovers_reported():
+    def entry(language, title, page):
+        link = f'https://gazette.gc.ca/rp-pr/p1/2026/html/{page}-{"eng" if language == "en" else "fra"}.html'
+        return {f'title_{language}': title, f'link_{language}': link, 'date_published': '', 'date_close': ''}
+
+    english = [entry('en', 'A', 'reg1'), entry('en', 'B', 'reg1'), entry('en', 'C', 'reg3')]
+    french = [entry('fr', 'a', 'reg1'), entry('fr', 'x', 'reg2'), entry('fr', 'b', 'reg1'), entry('fr', 'c', 'reg1')]
+    rows, english_only, french_only = gazette.join_bilingual_consultations(english, french)
+    assert [(row['title_en'], row['title_fr']) for row in rows] == [
+        ('A', 'a'), ('B', 'b'), ('C', ''), ('', 'x'), ('', 'c'),
+    ]
+    assert english_only == [english[2]]
+    assert french_only == [french[1], french[3]]
+
+
+def test_closing_date_is_the_end_of_a_date_range():
+    entry = {
+        'title': 'Regulations', 'link': '/rp-pr/p1/2026/html/reg1-eng.html',
+        'items': ['Published: July 4, 2026', 'Comments accepted from July 4 until August 3, 2026'],
+    }
+    consultation = gazette.consultation_from_entry(entry, 'en')
+    assert (consultation['date_published'], consultation['date_close']) == ('2026-07-04', '2026-08-03')
+
+
+def test_dates_are_read_with_the_entry_language_only():
+    assert gazette.extract_dates('July 1st to 15th, 2026', 'en') == ['2026-07-01', '2026-07-15']
+    assert gazette.extract_dates('December 15 to January 15, 2027', 'en') == ['2026-12-15', '2027-01-15']
+    assert gazette.extract_dates("du 1er au 15 juillet 2026", 'fr') == ['2026-07-01', '2026-07-15']
+    assert gazette.extract_dates("du 4 juillet jusqu'au 3 août 2026", 'fr') == ['2026-07-04', '2026-08-03']
+    assert gazette.extract_dates('le 1er mai', 'fr', reference_year=2026) == ['2026-05-01']
+    assert gazette.extract_dates('18 juillet 2026', 'en') == []
+    assert gazette.extract_dates('July 18, 2026', 'fr') == []
+
+
+def test_day_and_month_words_in_prose_are_not_dates():
+    assert gazette.extract_dates('section 21 may 2 times', 'en') == []
+    assert gazette.extract_dates('persons may 3', 'en') == []
+    assert gazette.extract_dates('Comments may be sent to 2 May', 'en') == []
+    assert gazette.parse_text_date('persons may 3 and section 4', 'en') == ''
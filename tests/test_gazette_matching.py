@@ -0,0 +1,25 @@
+import pandas as pd
+
+from consultations_tracker.gazette_matching import match_gazette_consultations
+
+REGISTRY = pd.DataFrame({
+    'registration_number': ['1001', '1002'],
+    'title_en': ['Review of the tariff schedule', 'Fisheries Act gear regulations'],
+    'title_fr': ['Examen du tarif', 'Règlement sur les engins de pêche'],
+    # A report link to the Gazette home page identifies no notice.
+    'report_link_en': ['https://gazette.gc.ca', 'https://gazette.gc.ca/rp-pr/p1/2026/html/reg2-eng.html'],
+})
+
+
+def test_links_match_on_their_notice_and_links_without_a_page_do_not():
+    gazette = pd.DataFrame({
+        'title_en': ['Unattended fishing gear', 'Amendments to the Fisheries Act gear regulations'],
+        'title_fr': ['Engins de pêche abandonnés', ''],
+        'link_en': ['https://gazette.gc.ca/rp-pr/p1/2026/html/reg2-eng.html', ''],
+        'link_fr': ['https://gazette.gc.ca/rp-pr/p1/2026/html/reg2-fra.html', 'https://gazette.gc.ca/'],
+    })
+    matched = match_gazette_consultations(gazette, REGISTRY)
+    assert matched['registration_number'].tolist() == ['1002', '1002']
+    # The second notice is matched on its title, not through the links without a page.
+    assert matched.loc[0, 'match_confidence'] == 1.0
+    assert matched.loc[1, 'match_confidence'] < 1.0
@@ -0,0 +1,109 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from consultations_tracker.link_probe import probe_links
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers like the consultation sites the probe meets: working, missing, moved and HEAD-averse pages."""
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', self.path))
+        if self.path == '/no-head':
+            self.respond(405)
+        elif self.path == '/drops-head':
+            # Close the connection without answering.
+            self.close_connection = True
+        else:
+            self.route()
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path))
+        self.route()
+
+    def route(self):
+        if self.path in ('/ok', '/no-head', '/drops-head', '/en/index.html'):
+            self.respond(200)
+        elif self.path == '/consultations/budget-2024':
+            self.respond(302, location='/en/index.html')
+        else:
+            self.respond(404)
+
+    def respond(self, status, location=None):
+        self.send_response(status)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{sock.getsockname()[1]}/gone'
+
+
+def test_probe_links_reasons_and_cache(server, tmp_path):
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    urls = {
+        'ok': f'{base}/ok',
+        'missing': f'{base}/missing',
+        'landing': f'{base}/consultations/budget-2024',
+        'no_head': f'{base}/no-head',
+        'drops_head': f'{base}/drops-head',
+        'unreachable': closed_port_url(),
+    }
+    cache_path = str(tmp_path / 'link_probe.json')
+
+    reasons = probe_links(urls.values(), cache_path=cache_path, ttl=3600, timeout=5)
+    assert reasons == {
+        urls['ok']: '',
+        urls['missing']: 'Link returns HTTP 404',
+        urls['landing']: 'Link redirects to a generic landing page',
+        urls['no_head']: '',
+        urls['drops_head']: '',
+        urls['unreachable']: 'Link could not be reached',
+    }
+    # A HEAD answered with an error status, or not answered at all, is retried with GET.
+    assert ('GET', '/no-head') in server.requests
+    assert ('GET', '/drops-head') in server.requests
+    assert ('GET', '/ok') not in server.requests
+
+    # Every reachable result is cached; the unreachable link is not.
+    with open(cache_path, encoding='utf-8') as file:
+        cache = json.load(file)
+    assert set(cache) == set(urls.values()) - {urls['unreachable']}
+
+    # Within the TTL the cached links are not probed again.
+    cached_urls = sorted(cache)
+    server.requests.clear()
+    assert probe_links(cached_urls, cache_path=cache_path, ttl=3600, timeout=5) == {url: reasons[url] for url in cached_urls}
+    assert server.requests == []
+
+    # Results older than the TTL are probed again.
+    for entry in cache.values():
+        entry['checked_at'] -= 7200
+    with open(cache_path, 'w', encoding='utf-8') as file:
+        json.dump(cache, file)
+    assert probe_links(urls.values(), cache_path=cache_path, ttl=3600, timeout=5) == reasons
+    assert {path for _, path in server.requests} == {
+        '/ok', '/missing', '/consultations/budget-2024', '/en/index.html', '/no-head', '/drops-head',
+    }
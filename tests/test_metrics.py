@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from consultations_tracker import upptime_sync
+
+
+def test_a_failed_run_still_writes_its_metrics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def failing_run_steps(steps, metrics, targets=None):
+        with metrics.stage('consultations') as stage:
+            stage.rows = 3
+        raise OSError('download failed')
+
+    monkeypatch.setattr(upptime_sync, 'run_steps', failing_run_steps)
+    with pytest.raises(OSError):
+        upptime_sync.run_sync_upptime()
+
+    with open('run_metrics.json', encoding='utf-8') as file:
+        run = json.load(file)['sync-upptime']
+    assert run['outcome'] == 'failed'
+    assert [(stage['name'], stage['rows']) for stage in run['stages']] == [('consultations', 3)]
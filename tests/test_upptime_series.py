@@ -0,0 +1,20 @@
+from consultations_tracker import upptime_series
+from consultations_tracker.upptime_series import read_checks
+
+HISTORY = """url: https://example.gc.ca/consultation
+status: up
+code: 200
+responseTime: 305
+lastUpdated: 2024-05-01T12:00:00.000Z
+"""
+
+
+def test_read_checks_skips_history_files_removed_after_listing(tmp_path, monkeypatch):
+    (tmp_path / 'history').mkdir()
+    (tmp_path / 'history' / 'kept.yml').write_text(HISTORY, encoding='utf8')
+    listed = upptime_series.history_paths(str(tmp_path)) + [str(tmp_path / 'history' / 'archived.yml')]
+    monkeypatch.setattr(upptime_series, 'history_paths', lambda root: listed)
+
+    checks = read_checks(str(tmp_path))
+    assert checks['slug'].tolist() == ['kept']
+    assert checks.loc[0, 'response_time'] == 305